@@ -1,19 +1,35 @@
 import sqlite3
 from sqlite3 import Error
-import csv
+import argparse
 import os
+from datetime import date
+from itertools import chain
+from search_index import create_search_index
+from value_dictionary import create_value_dictionary, build_value_dictionary
+from price_series import create_price_series, parse_day
+from elasticity import create_elasticity_table, run_elasticity_job
+from rollup_cube import create_cube
+from suitability import create_climate_profiles
+from exposure import create_exposure
+from query_catalog import create_catalog_indexes
+from mutations import create_foreign_key_indexes, refresh_derived
+from sharded import create_shard_indexes
+from feeds import FEED_TABLES, STDIN, find_feed, is_plain_file, read_feed, resolve_feeds
+from checkpoints import DONE, RUNNING, Checkpoint, create_checkpoint_table, fingerprint, load_checkpoint, save_checkpoint
+from validation import CONSTRAINT, Quarantine, classify_error, create_quarantine, table_rules
+from profiles import BULK_LOAD, INTERACTIVE, connect, end_bulk_load, foreign_key_violations
+from telemetry import Telemetry
 
 # -------------------------
 # DATABASE CONNECTION
 # -------------------------
 
-def openConnection(_dbFile):
+def openConnection(_dbFile, profile=INTERACTIVE):
     print("+++++++++++++++++++++++++++++++++++++++++++++++++")
-    print("Open database:", _dbFile)
+    print("Open database:", _dbFile, f"({profile})")
     conn = None
     try:
-        conn = sqlite3.connect(_dbFile)
-        conn.execute("PRAGMA foreign_keys = ON;")
+        conn = connect(_dbFile, profile)
         print("Success")
     except Error as e:
         print(e)
@@ -121,6 +137,7 @@ def createTables(conn):
         area REAL,
         production REAL,
         yield REAL,
+        year INTEGER,
         FOREIGN KEY(crop_id) REFERENCES crops(crop_id),
         FOREIGN KEY(district_id) REFERENCES districts(district_id)
     );
@@ -150,6 +167,8 @@ def createTables(conn):
         windspeed REAL,
         humidity REAL,
         precipitation REAL,
+        date TEXT,
+        year INTEGER,
         FOREIGN KEY(district_id) REFERENCES districts(district_id)
     );
     """)
@@ -167,23 +186,284 @@ def createTables(conn):
         pesticide_usage REAL,
         crop_yield REAL,
         sustainability_score REAL,
+        year INTEGER,
         FOREIGN KEY(crop_id) REFERENCES crops(crop_id),
         FOREIGN KEY(district_id) REFERENCES districts(district_id)
     );
     """)
 
+    createYearDimension(conn)
+    createTableKeys(conn)
+    createRollups(conn)
+    create_search_index(conn)
+    create_value_dictionary(conn)
+    create_price_series(conn)
+    create_elasticity_table(conn)
+    create_cube(conn)
+    create_climate_profiles(conn)
+    create_exposure(conn)
+    create_catalog_indexes(conn)
+    create_foreign_key_indexes(conn)
+    create_shard_indexes(conn)
+    create_quarantine(conn)
+    create_checkpoint_table(conn)
+
     conn.commit()
     print("All tables created successfully!")
 
+# -------------------------
+# YEAR DIMENSION
+# -------------------------
+
+YEAR_TABLES = {
+    "crop_production_statistic": "year, district_id, crop_id",
+    "sustainability_data": "year, district_id, crop_id",
+    "farm_weather": "year, district_id",
+}
+
+def createYearDimension(conn):
+    # Tables created before the year column existed get it added in place.
+    # Every index leads with year so a per-year query reads one contiguous
+    # slice of the b-tree instead of the whole table.
+    cur = conn.cursor()
+    for table, key in YEAR_TABLES.items():
+        cur.execute(f"PRAGMA table_info({table});")
+        existing = [col[1] for col in cur.fetchall()]
+        if "year" not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN year INTEGER")
+        if table == "farm_weather" and "date" not in existing:
+            cur.execute("ALTER TABLE farm_weather ADD COLUMN date TEXT")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_year ON {table} ({key})")
+
+    # Older databases carry a per-row view under this name
+    cur.execute("PRAGMA table_info(yearly_state_production);")
+    view_cols = [col[1] for col in cur.fetchall()]
+    if view_cols and "state_production" not in view_cols:
+        cur.execute("DROP VIEW yearly_state_production")
+    cur.execute("""
+    CREATE VIEW IF NOT EXISTS yearly_state_production AS
+    SELECT r.year, d.state_name, SUM(r.sum_production) AS state_production
+    FROM crop_district_rollup r
+    JOIN districts d ON r.district_id = d.district_id
+    GROUP BY r.year, d.state_name
+    """)
+
+# -------------------------
+# COMPOSITE KEYS
+# -------------------------
+
+# Link tables declared without a primary key; each gets a unique index on
+# these columns, and the importer collapses rows that repeat a key
+KEY_TABLES = {
+    "crop_district": ("crop_id", "district_id"),
+    "crop_pesticide": ("crop_id", "pesticide_id"),
+}
+
+def createTableKeys(conn):
+    # Tables that already hold duplicates keep the last copy of each key,
+    # the one a re-import would have written
+    cur = conn.cursor()
+    for table, key in KEY_TABLES.items():
+        name = f"idx_{table}_key"
+        if cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone():
+            continue
+        cols = ", ".join(key)
+        present = " AND ".join(f"{c} IS NOT NULL" for c in key)
+        cur.execute(f"""DELETE FROM {table} WHERE {present} AND rowid NOT IN
+                       (SELECT MAX(rowid) FROM {table} WHERE {present} GROUP BY {cols})""")
+        if cur.rowcount:
+            print(f"Removed {cur.rowcount} duplicate rows from {table}")
+        cur.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({cols})")
+        # The plain index over the same columns that the unique one replaces
+        cur.execute(f"DROP INDEX IF EXISTS idx_{table}_crop")
+
+def upsertClause(table, columns):
+    key = KEY_TABLES[table]
+    rest = [c for c in columns if c not in key]
+    if not rest:
+        return f" ON CONFLICT({', '.join(key)}) DO NOTHING"
+    # Only a row whose values differ counts as a change, so an exact
+    # duplicate of a stored row leaves rowcount alone
+    return (f" ON CONFLICT({', '.join(key)}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in rest)
+            + f" WHERE ({', '.join(rest)}) IS NOT ({', '.join('excluded.' + c for c in rest)})")
+
+def collapseDuplicates(good, lines, key_pos):
+    """Keep the last row of each key within a batch. Memory is bounded by
+    the batch; repeats across batches and of rows already stored are
+    resolved by the unique index through the upsert."""
+    latest = {}
+    keep = []
+    for j, g in enumerate(good):
+        k = tuple(g[p] for p in key_pos)
+        if None in k:
+            # NULL never matches in a unique index, so neither does it here
+            keep.append(j)
+        else:
+            latest[k] = j
+    if len(keep) + len(latest) == len(good):
+        return good, lines, 0
+    keep = sorted(keep + list(latest.values()))
+    return [good[j] for j in keep], [lines[j] for j in keep], len(good) - len(keep)
+
+def feedYear(row, default=None):
+    # Feeds without a year column fall back to the year of their date column
+    day = parse_day(row.get("date"))
+    if day is not None:
+        return date.fromordinal(day).year
+    return default
+
+# -------------------------
+# PRODUCTION ROLLUPS
+# -------------------------
+
+def createRollups(conn):
+    # Running aggregates per year x crop x district x season. Triggers keep
+    # them in step with crop_production_statistic so readers never rescan
+    # history; NULL seasons are folded into '' and NULL years into 0.
+    cur = conn.cursor()
+
+    # Rollups from before the year dimension are keyed without it, and older
+    # ones lack yield_production; both are rebuilt with their triggers
+    cur.execute("PRAGMA table_info(crop_district_rollup);")
+    rollup_cols = [col[1] for col in cur.fetchall()]
+    if rollup_cols and ("year" not in rollup_cols or "yield_production" not in rollup_cols):
+        for t in ("insert", "delete", "update_old", "update_new"):
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_rollup_production_{t}")
+        cur.execute("DROP TABLE crop_district_rollup")
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cube_cells'")
+        if cur.fetchone():
+            cur.execute("DELETE FROM cube_cells")
+
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS crop_district_rollup (
+        year INTEGER NOT NULL DEFAULT 0,
+        crop_id INTEGER NOT NULL,
+        district_id INTEGER NOT NULL,
+        season TEXT NOT NULL DEFAULT '',
+        record_count INTEGER NOT NULL DEFAULT 0,
+        yield_count INTEGER NOT NULL DEFAULT 0,
+        sum_area REAL NOT NULL DEFAULT 0,
+        sum_production REAL NOT NULL DEFAULT 0,
+        sum_yield REAL NOT NULL DEFAULT 0,
+        yield_production REAL NOT NULL DEFAULT 0,  -- production of the rows that have a yield
+        PRIMARY KEY (year, crop_id, district_id, season)
+    ) WITHOUT ROWID;
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_production_insert
+    AFTER INSERT ON crop_production_statistic
+    WHEN NEW.crop_id IS NOT NULL AND NEW.district_id IS NOT NULL
+    BEGIN
+        INSERT INTO crop_district_rollup (year, crop_id, district_id, season, record_count, yield_count,
+                                          sum_area, sum_production, sum_yield, yield_production)
+        VALUES (COALESCE(NEW.year, 0), NEW.crop_id, NEW.district_id, COALESCE(NEW.season, ''), 1, NEW.yield IS NOT NULL,
+                COALESCE(NEW.area, 0), COALESCE(NEW.production, 0), COALESCE(NEW.yield, 0),
+                CASE WHEN NEW.yield IS NOT NULL THEN COALESCE(NEW.production, 0) ELSE 0 END)
+        ON CONFLICT(year, crop_id, district_id, season) DO UPDATE SET
+            record_count = record_count + 1,
+            yield_count = yield_count + excluded.yield_count,
+            sum_area = sum_area + excluded.sum_area,
+            sum_production = sum_production + excluded.sum_production,
+            sum_yield = sum_yield + excluded.sum_yield,
+            yield_production = yield_production + excluded.yield_production;
+    END;
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_production_delete
+    AFTER DELETE ON crop_production_statistic
+    WHEN OLD.crop_id IS NOT NULL AND OLD.district_id IS NOT NULL
+    BEGIN
+        UPDATE crop_district_rollup SET
+            record_count = record_count - 1,
+            yield_count = yield_count - (OLD.yield IS NOT NULL),
+            sum_area = sum_area - COALESCE(OLD.area, 0),
+            sum_production = sum_production - COALESCE(OLD.production, 0),
+            sum_yield = sum_yield - COALESCE(OLD.yield, 0),
+            yield_production = yield_production - CASE WHEN OLD.yield IS NOT NULL THEN COALESCE(OLD.production, 0) ELSE 0 END
+        WHERE year = COALESCE(OLD.year, 0) AND crop_id = OLD.crop_id AND district_id = OLD.district_id
+          AND season = COALESCE(OLD.season, '');
+        DELETE FROM crop_district_rollup
+        WHERE year = COALESCE(OLD.year, 0) AND crop_id = OLD.crop_id AND district_id = OLD.district_id
+          AND season = COALESCE(OLD.season, '') AND record_count <= 0;
+    END;
+    """)
+
+    # An update is a delete of the OLD row followed by an insert of the NEW one
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_production_update_old
+    AFTER UPDATE OF crop_id, district_id, season, area, production, yield, year ON crop_production_statistic
+    WHEN OLD.crop_id IS NOT NULL AND OLD.district_id IS NOT NULL
+    BEGIN
+        UPDATE crop_district_rollup SET
+            record_count = record_count - 1,
+            yield_count = yield_count - (OLD.yield IS NOT NULL),
+            sum_area = sum_area - COALESCE(OLD.area, 0),
+            sum_production = sum_production - COALESCE(OLD.production, 0),
+            sum_yield = sum_yield - COALESCE(OLD.yield, 0),
+            yield_production = yield_production - CASE WHEN OLD.yield IS NOT NULL THEN COALESCE(OLD.production, 0) ELSE 0 END
+        WHERE year = COALESCE(OLD.year, 0) AND crop_id = OLD.crop_id AND district_id = OLD.district_id
+          AND season = COALESCE(OLD.season, '');
+        DELETE FROM crop_district_rollup
+        WHERE year = COALESCE(OLD.year, 0) AND crop_id = OLD.crop_id AND district_id = OLD.district_id
+          AND season = COALESCE(OLD.season, '') AND record_count <= 0;
+    END;
+    """)
+
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_production_update_new
+    AFTER UPDATE OF crop_id, district_id, season, area, production, yield, year ON crop_production_statistic
+    WHEN NEW.crop_id IS NOT NULL AND NEW.district_id IS NOT NULL
+    BEGIN
+        INSERT INTO crop_district_rollup (year, crop_id, district_id, season, record_count, yield_count,
+                                          sum_area, sum_production, sum_yield, yield_production)
+        VALUES (COALESCE(NEW.year, 0), NEW.crop_id, NEW.district_id, COALESCE(NEW.season, ''), 1, NEW.yield IS NOT NULL,
+                COALESCE(NEW.area, 0), COALESCE(NEW.production, 0), COALESCE(NEW.yield, 0),
+                CASE WHEN NEW.yield IS NOT NULL THEN COALESCE(NEW.production, 0) ELSE 0 END)
+        ON CONFLICT(year, crop_id, district_id, season) DO UPDATE SET
+            record_count = record_count + 1,
+            yield_count = yield_count + excluded.yield_count,
+            sum_area = sum_area + excluded.sum_area,
+            sum_production = sum_production + excluded.sum_production,
+            sum_yield = sum_yield + excluded.sum_yield,
+            yield_production = yield_production + excluded.yield_production;
+    END;
+    """)
+
+    # Databases created before the rollup existed get a one-off backfill
+    cur.execute("SELECT EXISTS (SELECT 1 FROM crop_district_rollup)")
+    has_rollup = cur.fetchone()[0]
+    cur.execute("SELECT EXISTS (SELECT 1 FROM crop_production_statistic)")
+    has_stats = cur.fetchone()[0]
+    if has_stats and not has_rollup:
+        rebuildRollups(conn)
+
+def rebuildRollups(conn):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM crop_district_rollup")
+    cur.execute("""
+    INSERT INTO crop_district_rollup (year, crop_id, district_id, season, record_count, yield_count,
+                                      sum_area, sum_production, sum_yield, yield_production)
+    SELECT COALESCE(year, 0), crop_id, district_id, COALESCE(season, ''), COUNT(*), COUNT(yield),
+           TOTAL(area), TOTAL(production), TOTAL(yield), TOTAL(CASE WHEN yield IS NOT NULL THEN production END)
+    FROM crop_production_statistic
+    WHERE crop_id IS NOT NULL AND district_id IS NOT NULL
+    GROUP BY COALESCE(year, 0), crop_id, district_id, COALESCE(season, '')
+    """)
+    conn.commit()
+
 # -------------------------
 # CLEAR TABLES
 # -------------------------
 
 def clearTables(conn):
     cur = conn.cursor()
-    tables = ["sustainability_data", "farm_weather", "crop_requirements", "crop_district",
-              "crop_production_statistic", "crop_arrival_price", "crop_pesticide",
-              "pesticide_use", "markets", "districts", "crops"]
+    tables = ["search_index", "column_values", "column_stats", "sustainability_data", "farm_weather", "crop_requirements", "crop_district",
+              "crop_production_statistic", "crop_district_rollup", "price_elasticity", "price_daily", "price_series_state", "price_daily_dirty", "crop_arrival_price", "crop_pesticide",
+              "pesticide_use", "markets", "districts", "crops", "cube_cells", "cube_dirty", "cube_dirty_states", "import_checkpoints",
+              "district_weather_profile", "crop_climate_profile", "weather_profile_dirty", "crop_profile_dirty",
+              "pesticide_compounds", "exposure_district", "exposure_crop", "exposure_district_dirty", "exposure_crop_dirty"]
     for t in tables:
         cur.execute(f"DELETE FROM {t}")
     conn.commit()
@@ -193,99 +473,292 @@ def clearTables(conn):
 # IMPORT CSV
 # -------------------------
 
-def importCSV(conn, table_name):
-    filename = table_name + ".csv"
-    if not os.path.exists(filename):
-        print(f"CSV file '{filename}' not found. Skipping.")
+def importCSV(conn, table_name, year=None, quarantine=None, source=None, resume=False, telemetry=None):
+    if source is None:
+        source = find_feed(table_name)
+    if source is None or (source.path != STDIN and not os.path.exists(source.path)):
+        print(f"CSV file for '{table_name}' not found. Skipping.")
         return
 
-    print(f"Importing {filename} into {table_name}")
-    cur = conn.cursor()
-    cur.execute(f"PRAGMA table_info({table_name});")
-    columns = [col[1] for col in cur.fetchall()]
-
-    # Open with utf-8-sig encoding to automatically remove BOM
-    with open(filename, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        
-        row_count = 0
-        for row in reader:
-            row_count += 1
-            data = {}
-            for k in columns:
-                if k in row:
-                    val = row[k].strip()
-                    if val == "":
-                        data[k] = None
-                    else:
-                        if k in ["crop_id", "district_id", "pesticide_id", 
-                                 "arrival_id", "stat_id", "requirement_id", "weather_id", "record_id", "market_id"]:
-                            data[k] = int(float(val))
-                        else:
-                            try:
-                                data[k] = float(val)
-                            except:
-                                data[k] = val
-                else:
-                    data[k] = None
-
-            # Auto-insert missing parent records ONLY if not importing the parent table itself
-            if table_name != "crops" and "crop_id" in data and data["crop_id"] is not None:
-                cur.execute("INSERT OR IGNORE INTO crops(crop_id, crop_name, crop_group) VALUES (?, ?, ?)",
-                            (data["crop_id"], f"Unknown_{data['crop_id']}", "Unknown"))
-            
-            if table_name not in ["districts", "crops"] and "district_id" in data and data["district_id"] is not None:
-                cur.execute("INSERT OR IGNORE INTO districts(district_id, state_name, district_name) VALUES (?, ?, ?)",
-                            (data["district_id"], f"Unknown_{data['district_id']}", f"Unknown_{data['district_id']}"))
-            
-            if table_name == "crop_pesticide" and "pesticide_id" in data and data["pesticide_id"] is not None:
-                cur.execute("INSERT OR IGNORE INTO pesticide_use(pesticide_id, district_id, compound, low_estimate, high_estimate) VALUES (?, ?, ?, ?, ?)",
-                            (data["pesticide_id"], None, f"Unknown_{data['pesticide_id']}", None, None))
-
-            columns_str = ", ".join(data.keys())
-            placeholders = ", ".join(["?"] * len(data))
-            values = [data[k] for k in data.keys()]
+    feed_print = fingerprint(source)
+    cp = load_checkpoint(conn, table_name) if resume else None
+    # A finished table is only skipped when its feed is the one it finished on
+    if cp and (cp.source != str(source) or cp.fingerprint != feed_print):
+        raise SystemExit(f"The feed for {table_name} has changed since its checkpoint ({cp.source}); "
+                         f"rerun without --resume to start over")
+    if cp and cp.status == DONE:
+        print(f"{table_name} already imported ({cp.loaded} rows loaded). Skipping.\n")
+        return
 
+    print(f"Importing {source} into {table_name}")
+    cur = conn.cursor()
+    rules = table_rules(conn, table_name)
+    columns = rules.columns
+    if quarantine is None:
+        quarantine = Quarantine(conn)
+    quarantine.start_table(table_name, resume=cp is not None)
+    year_pos = columns.index("year") if "year" in columns else None
+
+    columns_str = ", ".join(columns)
+    placeholders = ", ".join(["?"] * len(columns))
+    insert_sql = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
+    key_pos = None
+    if table_name in KEY_TABLES:
+        insert_sql += upsertClause(table_name, columns)
+        key_pos = [columns.index(c) for c in KEY_TABLES[table_name]]
+    collapsed = 0
+
+    # Parent rows created on demand, except when importing the parent itself
+    parents = []
+    if table_name != "crops" and "crop_id" in columns:
+        parents.append((columns.index("crop_id"),
+                        "INSERT OR IGNORE INTO crops(crop_id, crop_name, crop_group) VALUES (?, ?, ?)",
+                        lambda i: (i, f"Unknown_{i}", "Unknown")))
+    if table_name not in ["districts", "crops"] and "district_id" in columns:
+        parents.append((columns.index("district_id"),
+                        "INSERT OR IGNORE INTO districts(district_id, state_name, district_name) VALUES (?, ?, ?)",
+                        lambda i: (i, f"Unknown_{i}", f"Unknown_{i}")))
+    if table_name == "crop_pesticide" and "pesticide_id" in columns:
+        parents.append((columns.index("pesticide_id"),
+                        "INSERT OR IGNORE INTO pesticide_use(pesticide_id, district_id, compound, low_estimate, high_estimate) VALUES (?, ?, ?, ?, ?)",
+                        lambda i: (i, None, f"Unknown_{i}", None, None)))
+
+    # Positional parsing: header -> column index worked out once, rows
+    # handled a batch at a time, a column at a time
+    start, row_count, loaded = (cp.position, cp.rows_done, cp.loaded) if cp else (0, 0, 0)
+    if cp:
+        print(f"Resuming {table_name} after row {row_count}")
+    header, batches = read_feed(source, table_name, start)
+    position = start
+    width = len(header)
+    positions = [header.index(c) if c in header else None for c in columns]
+    date_pos = header.index("date") if "date" in header else None
+
+    # Plain files report byte offsets; for compressed and piped feeds the
+    # bytes are counted from the parsed fields
+    plain = is_plain_file(source)
+    if telemetry is None:
+        telemetry = Telemetry(progress=False)
+    telemetry.start_table(table_name, str(source), os.path.getsize(source.path) if plain else None, row_count)
+
+    for rows, batch_end in telemetry.timed(batches, "parse"):
+        n = len(rows)
+        nbytes = batch_end - position if plain else sum(map(len, chain.from_iterable(rows))) + n * width
+        position = batch_end
+        with telemetry.phase("parse"):
+            if any(len(r) != width for r in rows):
+                rows = [r if len(r) == width else (r + [""] * (width - len(r)))[:width] for r in rows]
+            fields = list(zip(*rows))
+
+        with telemetry.phase("convert"):
+            values, rejects = rules.convert_columns([fields[p] if p is not None else None for p in positions], n)
+
+            if year_pos is not None and None in values[year_pos]:
+                year_col = values[year_pos]
+                for j, v in enumerate(year_col):
+                    if v is None:
+                        year_col[j] = feedYear({"date": rows[j][date_pos]} if date_pos is not None else {}, year)
+
+            good = list(zip(*values))
+            if rejects:
+                for j, r in sorted(rejects.items()):
+                    quarantine.add(table_name, row_count + j + 2, r.reason, r.column, r.detail, dict(zip(header, rows[j])))
+                lines = [row_count + j + 2 for j in range(n) if j not in rejects]
+                good = [g for j, g in enumerate(good) if j not in rejects]
+            else:
+                lines = None
+            if key_pos:
+                good, lines, dropped = collapseDuplicates(good, lines if lines is not None else [row_count + j + 2 for j in range(n)], key_pos)
+                collapsed += dropped
+
+        with telemetry.phase("parents"):
+            for pos, sql, make in parents:
+                ids = {g[pos] for g in good}
+                ids.discard(None)
+                cur.executemany(sql, [make(i) for i in sorted(ids)])
+
+        # The whole batch in one executemany; if any row violates a
+        # constraint, roll the batch back and redo it row by row so only the
+        # offending rows are quarantined
+        with telemetry.phase("insert"):
+            cur.execute("SAVEPOINT import_batch")
             try:
-                cur.execute(f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})", values)
-            except Error as e:
-                # Only print error if it's not a UNIQUE constraint failure
-                if "UNIQUE constraint failed" not in str(e):
-                    print(f"Error inserting row into {table_name}: {e}")
-                    print(f"Data: {data}")
-                continue
+                cur.executemany(insert_sql, good)
+                # An upsert that finds the same row already stored changes nothing
+                loaded += cur.rowcount
+                collapsed += len(good) - cur.rowcount
+            except Error:
+                cur.execute("ROLLBACK TO import_batch")
+                for k, g in enumerate(good):
+                    try:
+                        cur.execute(insert_sql, g)
+                        loaded += cur.rowcount
+                        collapsed += 1 - cur.rowcount
+                    except Error as e:
+                        line = lines[k] if lines else row_count + k + 2
+                        reason, column, detail = classify_error(e)
+                        quarantine.add(table_name, line, reason, column, detail, dict(zip(header, rows[line - row_count - 2])))
+            cur.execute("RELEASE import_batch")
+        row_count += n
+
+        # Rows, their rejects and the checkpoint covering them commit together
+        with telemetry.phase("commit"):
+            quarantine.flush()
+            save_checkpoint(conn, Checkpoint(table_name, str(source), feed_print, position, row_count, loaded, RUNNING))
+            conn.commit()
+        telemetry.batch(n, nbytes, position if plain else None)
+
+    with telemetry.phase("commit"):
+        quarantine.flush()
+        save_checkpoint(conn, Checkpoint(table_name, str(source), feed_print, position, row_count, loaded, DONE))
+        conn.commit()
+    summary = quarantine.table_summary(table_name)
+    timings = telemetry.finish_table(loaded, collapsed, sum(summary.values()))
+    rejected = ", ".join(f"{reason} {n}" for reason, n in summary.items())
+    print(f"Finished importing {table_name} ({row_count} rows, {loaded} loaded"
+          + (f", duplicates collapsed: {collapsed}" if collapsed else "")
+          + (f", quarantined: {rejected}" if rejected else "") + ")")
+    print(timings + "\n")
+
+# -------------------------
+# FOREIGN KEY CHECK
+# -------------------------
 
+def checkForeignKeys(conn, quarantine):
+    # The bulk-load profile does not enforce foreign keys per row; rows
+    # left without a parent are moved to the quarantine here instead, the
+    # same rows an enforcing import would have rejected one by one
+    violations = foreign_key_violations(conn)
+    if not violations:
+        print("Foreign key check: no violations\n")
+        return
+    cur = conn.cursor()
+    for table, rowid, parent, column in violations:
+        cur.execute(f"SELECT * FROM {table} WHERE rowid = ?", (rowid,))
+        names = [d[0] for d in cur.description]
+        row = cur.fetchone()
+        quarantine.add(table, None, CONSTRAINT, column,
+                       f"FOREIGN KEY constraint failed: {table}.{column} -> {parent}", dict(zip(names, row)))
+        cur.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+    quarantine.flush()
+    conn.commit()
+    print(f"Foreign key check: {len(violations)} rows without a parent quarantined\n")
+
+# -------------------------
+# UPGRADE
+# -------------------------
+
+def upgradeDatabase(dbfile="agriculture.db"):
+    """Bring a database written by an older version (the shipped
+    agriculture.db included) up to the current schema and fill its derived
+    tables. The GUIs run this once at startup; on a current database it
+    finds nothing to do."""
+    conn = openConnection(dbfile, INTERACTIVE)
+    try:
+        createTables(conn)
+        refresh_derived(conn)
+        if not conn.execute("SELECT EXISTS (SELECT 1 FROM column_stats)").fetchone()[0]:
+            build_value_dictionary(conn)
+    finally:
+        closeConnect(conn, dbfile)
+
+# -------------------------
+# SHADOW REBUILD
+# -------------------------
+
+def shadowPath(dbfile):
+    # Same directory as the live file, so it is on the same filesystem
+    return dbfile + ".rebuild"
+
+def analyzeShadow(conn):
+    print("Analyzing the rebuilt database")
+    conn.execute("ANALYZE;")
+    conn.execute("PRAGMA optimize;")
     conn.commit()
-    print(f"Finished importing {table_name} ({row_count} rows)\n")
+
+def swapIn(shadow, dbfile):
+    """Copy the rebuilt database over the live one with the backup API.
+    Readers see the copy as one write transaction: connections already open
+    (the GUIs keep theirs) move to the new contents and see data_version
+    change. Renaming over the file instead would leave them reading the
+    old, unlinked one until they reopen."""
+    src = sqlite3.connect(shadow)
+    dst = sqlite3.connect(dbfile, timeout=60)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(shadow + suffix):
+            os.remove(shadow + suffix)
+    print(f"Copied {shadow} into {dbfile}")
 
 # -------------------------
 # MAIN
 # -------------------------
 
 def main():
+    parser = argparse.ArgumentParser(description="Import the agriculture CSV feeds into SQLite")
+    parser.add_argument("--year", type=int, default=None,
+                        help="year to record for feed rows that carry no year or date column")
+    parser.add_argument("--quarantine-file", default=None,
+                        help="append rejected rows to this JSON-lines file instead of the import_quarantine table")
+    parser.add_argument("--input", default=".",
+                        help="directory or zip archive holding the feeds (plain, .gz, .xz, .bz2 or .zip each)")
+    parser.add_argument("--manifest", default=None,
+                        help='JSON file mapping table names to feed paths, e.g. {"crops": "feeds/crops.csv.gz"}')
+    parser.add_argument("--stdin", metavar="TABLE", default=None,
+                        help="read this table's feed from stdin (optionally gzip/xz/bz2 compressed)")
+    parser.add_argument("--resume", action="store_true",
+                        help="keep what earlier runs committed and continue each table from its checkpoint")
+    parser.add_argument("--telemetry", metavar="FILE", default=None,
+                        help="append per-batch and per-table import telemetry to this file as JSON lines")
+    parser.add_argument("--no-progress", action="store_true",
+                        help="no progress bar, even when stderr is a terminal")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="load into a shadow database and copy it over the live one when done, leaving the live file untouched until then")
+    args = parser.parse_args()
+
     dbfile = "agriculture.db"
-    conn = openConnection(dbfile)
+    target = dbfile
+    if args.rebuild:
+        target = shadowPath(dbfile)
+        if not args.resume:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(target + suffix):
+                    os.remove(target + suffix)
+    # WAL rather than no journal: with synchronous off it is nearly as fast,
+    # and a killed import can still be continued with --resume
+    conn = openConnection(target, BULK_LOAD)
     createTables(conn)
-    clearTables(conn)
-
-    tables_order = [
-        "crops",
-        "districts",
-        "markets",
-        "pesticide_use",
-        "crop_pesticide",
-        "crop_arrival_price",
-        "crop_production_statistic",
-        "crop_district",
-        "crop_requirements",
-        "farm_weather",
-        "sustainability_data"
-    ]
-
-    for t in tables_order:
-        importCSV(conn, t)
-
-    closeConnect(conn, dbfile)
+    if args.resume:
+        print("Resuming from import checkpoints")
+    else:
+        clearTables(conn)
+
+    feeds = resolve_feeds(FEED_TABLES, args.input, args.manifest, args.stdin)
+    quarantine = Quarantine(conn, args.quarantine_file)
+    telemetry = Telemetry(args.telemetry, progress=False if args.no_progress else None)
+    for t in FEED_TABLES:
+        if feeds[t] is None:
+            print(f"CSV file for '{t}' not found. Skipping.")
+            continue
+        importCSV(conn, t, args.year, quarantine, feeds[t], args.resume, telemetry)
+    telemetry.close()
+    checkForeignKeys(conn, quarantine)
+    quarantine.report()
+
+    build_value_dictionary(conn)
+    refresh_derived(conn)
+    run_elasticity_job(target)
+
+    if args.rebuild:
+        analyzeShadow(conn)
+    end_bulk_load(conn)
+    closeConnect(conn, target)
+    if args.rebuild:
+        swapIn(target, dbfile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
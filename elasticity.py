@@ -0,0 +1,136 @@
+# elasticity.py
+# Batch job: price-vs-arrival regressions per crop and market, written to
+# price_elasticity so the market views can show them without heavy joins.
+#
+# Each fit is log(modal price) = a + b * log(arrival tonnes) over the daily
+# points in price_daily; b is the price flexibility w.r.t. supply. Large jobs
+# split crops across a process pool, each worker reading with its own
+# read-only connection.
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from profiles import ANALYTICS, INTERACTIVE, connect
+
+DB_FILE = "agriculture.db"
+
+# Fewer daily points than this and the fit is not stored
+MIN_POINTS = 3
+
+# Below this many priced daily points per worker the fits run in-process,
+# as with sharded.MIN_ROWS_PER_SHARD
+MIN_POINTS_PER_WORKER = 20000
+
+def create_elasticity_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS price_elasticity (
+        crop_id INTEGER NOT NULL,
+        market_id INTEGER NOT NULL,  -- 0 = pooled over all markets
+        n_points INTEGER,
+        elasticity REAL,
+        intercept REAL,
+        r_squared REAL,
+        computed_at TEXT,
+        PRIMARY KEY (crop_id, market_id)
+    ) WITHOUT ROWID;
+    """)
+
+def fit_log_log(points) -> Optional[Tuple[int, float, float, Optional[float]]]:
+    """Least squares on (log tonnes, log price) in one pass over running sums."""
+    n = sx = sy = sxx = syy = sxy = 0.0
+    for tonnes, price in points:
+        if not tonnes or not price or tonnes <= 0 or price <= 0:
+            continue
+        x, y = math.log(tonnes), math.log(price)
+        n += 1
+        sx += x; sy += y
+        sxx += x * x; syy += y * y; sxy += x * y
+    if n < MIN_POINTS:
+        return None
+    vxx = sxx - sx * sx / n
+    if vxx <= 1e-12:
+        return None
+    vyy = syy - sy * sy / n
+    vxy = sxy - sx * sy / n
+    slope = vxy / vxx
+    intercept = (sy - slope * sx) / n
+    r2 = (vxy * vxy) / (vxx * vyy) if vyy > 1e-12 else None
+    return int(n), slope, intercept, r2
+
+def fit_crops(args) -> List[Tuple]:
+    """Worker: fit every market and the pooled series for a chunk of crops."""
+    db_path, crop_ids = args
+    conn = connect(db_path, ANALYTICS)
+    out = []
+    try:
+        for crop_id in crop_ids:
+            cur = conn.execute("""
+            SELECT market_id, arrival_tonnes, modal_sum / modal_count
+            FROM price_daily WHERE crop_id = ? AND modal_count > 0
+            ORDER BY market_id""", (crop_id,))
+            by_market = {}
+            pooled = []
+            for market_id, tonnes, price in cur:
+                by_market.setdefault(market_id, []).append((tonnes, price))
+                pooled.append((tonnes, price))
+            for market_id, points in by_market.items():
+                fit = fit_log_log(points)
+                if fit:
+                    out.append((crop_id, market_id) + fit)
+            fit = fit_log_log(pooled)
+            if fit:
+                out.append((crop_id, 0) + fit)
+    finally:
+        conn.close()
+    return out
+
+def run_elasticity_job(db_path: str = DB_FILE, workers: Optional[int] = None, chunk: int = 64):
+    conn = connect(db_path, INTERACTIVE)
+    try:
+        create_elasticity_table(conn)
+        # Only crops with enough usable days can yield a fit, per market or pooled
+        counts = conn.execute("""
+            SELECT crop_id, COUNT(*) FROM price_daily
+            WHERE modal_count > 0 AND modal_sum > 0 AND arrival_tonnes > 0
+            GROUP BY crop_id HAVING COUNT(*) >= ?
+            ORDER BY crop_id""", (MIN_POINTS,)).fetchall()
+        if not counts:
+            conn.execute("DELETE FROM price_elasticity")
+            conn.commit()
+            print(f"Skipped elasticity fits: no crop has {MIN_POINTS} priced days")
+            return 0
+    finally:
+        conn.close()
+
+    crop_ids = [crop_id for crop_id, _ in counts]
+    points = sum(n for _, n in counts)
+    chunks = [(db_path, crop_ids[i:i + chunk]) for i in range(0, len(crop_ids), chunk)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks), points // MIN_POINTS_PER_WORKER))
+    results = []
+    if workers <= 1:
+        for c in chunks:
+            results.extend(fit_crops(c))
+    else:
+        # Spawned as in sharded._get_pool, so no worker starts from a forked copy of a threaded parent
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for rows in pool.map(fit_crops, chunks):
+                results.extend(rows)
+
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    conn = connect(db_path, INTERACTIVE)
+    try:
+        conn.execute("DELETE FROM price_elasticity")
+        conn.executemany("""INSERT INTO price_elasticity
+                            (crop_id, market_id, n_points, elasticity, intercept, r_squared, computed_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", [r + (stamp,) for r in results])
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Stored {len(results)} elasticity fits for {len(crop_ids)} crops")
+    return len(results)
+
+if __name__ == "__main__":
+    run_elasticity_job(sys.argv[1] if len(sys.argv) > 1 else DB_FILE)
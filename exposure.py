@@ -0,0 +1,186 @@
+# exposure.py
+# Pesticide exposure model: pesticide_use totals and ranges per district x
+# compound and per crop x compound (through crop_pesticide), with compound
+# names dictionary-encoded as small integers in pesticide_compounds.
+#
+# Triggers on pesticide_use and crop_pesticide record which districts and
+# crops changed, and refresh_exposure() recomputes only their rows. Answers
+# per district, per crop or per compound are sums over these few rows, so
+# nothing rescans the raw tables or builds GROUP_CONCAT strings.
+from typing import List, NamedTuple, Optional, Tuple
+
+# compound_id for pesticide_use rows without a compound
+NO_COMPOUND = 0
+
+MEASURE_COLUMNS = ("pesticides", "low_sum", "low_count", "low_min", "low_max",
+                   "high_sum", "high_count", "high_min", "high_max")
+
+def create_exposure(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS pesticide_compounds (
+        compound_id INTEGER PRIMARY KEY,
+        compound TEXT NOT NULL UNIQUE
+    );
+    """)
+    for table, key in (("exposure_district", "district_id"), ("exposure_crop", "crop_id")):
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key} INTEGER NOT NULL,
+            compound_id INTEGER NOT NULL,  -- 0 = no compound recorded
+            pesticides INTEGER NOT NULL,
+            low_sum REAL NOT NULL DEFAULT 0,
+            low_count INTEGER NOT NULL DEFAULT 0,
+            low_min REAL,
+            low_max REAL,
+            high_sum REAL NOT NULL DEFAULT 0,
+            high_count INTEGER NOT NULL DEFAULT 0,
+            high_min REAL,
+            high_max REAL,
+            PRIMARY KEY ({key}, compound_id)
+        ) WITHOUT ROWID;
+        """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_exposure_district_compound ON exposure_district (compound_id)")
+    cur.execute("CREATE TABLE IF NOT EXISTS exposure_district_dirty (district_id INTEGER PRIMARY KEY)")
+    cur.execute("CREATE TABLE IF NOT EXISTS exposure_crop_dirty (crop_id INTEGER PRIMARY KEY)")
+
+    # NOT EXISTS rather than OR IGNORE, as in rollup_cube: crop_pesticide is
+    # written by an upsert
+    for event, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+        pesticide_marks = "\n".join(f"""
+            INSERT INTO exposure_district_dirty (district_id)
+            SELECT {r}.district_id
+            WHERE {r}.district_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM exposure_district_dirty WHERE district_id = {r}.district_id);
+            INSERT INTO exposure_crop_dirty (crop_id)
+            SELECT cp.crop_id FROM crop_pesticide cp
+            WHERE cp.pesticide_id = {r}.pesticide_id AND cp.crop_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM exposure_crop_dirty WHERE crop_id = cp.crop_id);""" for r in refs)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exposure_pesticide_{event.lower()}
+        AFTER {event} ON pesticide_use
+        BEGIN {pesticide_marks}
+        END;
+        """)
+        link_marks = "\n".join(f"""
+            INSERT INTO exposure_crop_dirty (crop_id)
+            SELECT {r}.crop_id
+            WHERE {r}.crop_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM exposure_crop_dirty WHERE crop_id = {r}.crop_id);""" for r in refs)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_exposure_crop_pesticide_{event.lower()}
+        AFTER {event} ON crop_pesticide
+        BEGIN {link_marks}
+        END;
+        """)
+
+_MEASURES = """COUNT(*), TOTAL(pu.low_estimate), COUNT(pu.low_estimate), MIN(pu.low_estimate), MAX(pu.low_estimate),
+       TOTAL(pu.high_estimate), COUNT(pu.high_estimate), MIN(pu.high_estimate), MAX(pu.high_estimate)"""
+
+_DISTRICT_SELECT = f"""SELECT pu.district_id, COALESCE(k.compound_id, {NO_COMPOUND}), {_MEASURES}
+FROM pesticide_use pu
+LEFT JOIN pesticide_compounds k ON k.compound = pu.compound
+WHERE pu.district_id IS NOT NULL"""
+
+# (crop_id, pesticide_id) is unique, so COUNT(*) counts distinct pesticides
+_CROP_SELECT = f"""SELECT cp.crop_id, COALESCE(k.compound_id, {NO_COMPOUND}), {_MEASURES}
+FROM crop_pesticide cp
+JOIN pesticide_use pu ON pu.pesticide_id = cp.pesticide_id
+LEFT JOIN pesticide_compounds k ON k.compound = pu.compound
+WHERE cp.crop_id IS NOT NULL"""
+
+def refresh_exposure(conn):
+    """Recompute the exposure rows of districts and crops touched since the last refresh."""
+    cur = conn.cursor()
+    targets = (("exposure_district", "exposure_district_dirty", "district_id", "pu.district_id", _DISTRICT_SELECT),
+               ("exposure_crop", "exposure_crop_dirty", "crop_id", "cp.crop_id", _CROP_SELECT))
+    full = {t for t, *_ in targets if not cur.execute(f"SELECT EXISTS (SELECT 1 FROM {t})").fetchone()[0]}
+    # New compounds get the next codes; codes are never reused
+    if full:
+        scope = ""
+    else:
+        scope = """AND (district_id IN (SELECT district_id FROM exposure_district_dirty)
+                        OR pesticide_id IN (SELECT cp.pesticide_id FROM crop_pesticide cp
+                                            WHERE cp.crop_id IN (SELECT crop_id FROM exposure_crop_dirty)))"""
+    cur.execute(f"""INSERT INTO pesticide_compounds (compound)
+                    SELECT DISTINCT compound FROM pesticide_use
+                    WHERE compound IS NOT NULL {scope}
+                      AND compound NOT IN (SELECT compound FROM pesticide_compounds)""")
+    columns = ", ".join(MEASURE_COLUMNS)
+    for table, dirty, key, source_key, select in targets:
+        if table in full:
+            cur.execute(f"INSERT INTO {table} ({key}, compound_id, {columns}) {select} GROUP BY 1, 2")
+        elif cur.execute(f"SELECT EXISTS (SELECT 1 FROM {dirty})").fetchone()[0]:
+            cur.execute(f"DELETE FROM {table} WHERE {key} IN (SELECT {key} FROM {dirty})")
+            cur.execute(f"""INSERT INTO {table} ({key}, compound_id, {columns})
+                            {select} AND {source_key} IN (SELECT {key} FROM {dirty}) GROUP BY 1, 2""")
+        cur.execute(f"DELETE FROM {dirty}")
+    conn.commit()
+
+# -------------------------
+# QUERIES
+# -------------------------
+
+EXPOSURE_COLUMNS = ["pesticides", "low_min", "low_max", "avg_low", "high_min", "high_max", "avg_high", "total_high"]
+
+_ROLLED = """SUM(e.pesticides), MIN(e.low_min), MAX(e.low_max),
+       ROUND(SUM(e.low_sum) / NULLIF(SUM(e.low_count), 0), 3),
+       MIN(e.high_min), MAX(e.high_max),
+       ROUND(SUM(e.high_sum) / NULLIF(SUM(e.high_count), 0), 3),
+       ROUND(SUM(e.high_sum), 3)"""
+
+class Level(NamedTuple):
+    columns: Tuple[str, ...]   # key columns shown
+    select: str                # ... and the expressions for them
+    source: str
+    key: str                   # grouping and filter column of e
+    name: str                  # sort column for by_compound()
+
+LEVELS = {
+    "district": Level(("district_id", "district_name"), "e.district_id, d.district_name",
+                      "exposure_district e LEFT JOIN districts d ON d.district_id = e.district_id",
+                      "e.district_id", "d.district_name"),
+    "crop": Level(("crop_id", "crop_name"), "e.crop_id, c.crop_name",
+                  "exposure_crop e LEFT JOIN crops c ON c.crop_id = e.crop_id",
+                  "e.crop_id", "c.crop_name"),
+    # Every pesticide_use row with a district is in exposure_district once
+    "compound": Level(("compound",), "k.compound",
+                      "exposure_district e LEFT JOIN pesticide_compounds k ON k.compound_id = e.compound_id",
+                      "e.compound_id", "k.compound"),
+}
+
+# Orderings for rank(); NULLs (no estimates) rank last
+RANK_BY = {
+    "avg_high": "SUM(e.high_sum) / NULLIF(SUM(e.high_count), 0)",
+    "total_high": "SUM(e.high_sum)",
+    "max_high": "MAX(e.high_max)",
+    "pesticides": "SUM(e.pesticides)",
+    "compounds": "COUNT(*)",
+}
+
+def rank(conn, level: str, by: str = "avg_high", limit: Optional[int] = 20) -> Tuple[List[str], List[Tuple]]:
+    """Districts, crops or compounds ordered by an exposure measure, highest first."""
+    lv = LEVELS[level]
+    order = RANK_BY[by]
+    sql = f"""SELECT {lv.select}, COUNT(*), {_ROLLED}
+              FROM {lv.source}
+              GROUP BY {lv.key}
+              ORDER BY {order} IS NULL, {order} DESC, {lv.key}"""
+    params = ()
+    if limit is not None:
+        sql += " LIMIT ?"
+        params = (limit,)
+    cols = list(lv.columns) + ["districts" if level == "compound" else "compounds"] + EXPOSURE_COLUMNS
+    return cols, conn.execute(sql, params).fetchall()
+
+def by_compound(conn, level: str, key: Optional[int] = None) -> Tuple[List[str], List[Tuple]]:
+    """One row per compound for a district or crop (for every one when key is None)."""
+    lv = LEVELS[level]
+    where, params = (f"WHERE {lv.key} = ?", (key,)) if key is not None else ("", ())
+    sql = f"""SELECT {lv.select}, k.compound, {_ROLLED}
+              FROM {lv.source}
+              LEFT JOIN pesticide_compounds k ON k.compound_id = e.compound_id
+              {where}
+              GROUP BY {lv.key}, e.compound_id
+              ORDER BY {lv.name}, {lv.key}, k.compound"""
+    return list(lv.columns) + ["compound"] + EXPOSURE_COLUMNS, conn.execute(sql, params).fetchall()
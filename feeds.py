@@ -0,0 +1,226 @@
+# feeds.py
+# Where the importer's CSV feeds come from: plain, gzip, xz, bz2 or zip
+# files, a directory or zip archive holding all of them, a JSON manifest,
+# or stdin. Compressed input is decompressed as it is read; the inflated
+# CSV is never written anywhere.
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import sys
+import zipfile
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+STDIN = "-"
+
+# Plain files are parsed in byte ranges of about this size, compressed or
+# piped feeds in batches of this many rows
+MMAP_BATCH_BYTES = 1 << 20
+STREAM_BATCH_ROWS = 10000
+
+# The tables loaded from feeds, parents first. Every other table is derived
+# from these (rollups, cube, price series, profiles, exposure, search and
+# value indexes) or is import bookkeeping
+FEED_TABLES = [
+    "crops",
+    "districts",
+    "markets",
+    "pesticide_use",
+    "crop_pesticide",
+    "crop_arrival_price",
+    "crop_production_statistic",
+    "crop_district",
+    "crop_requirements",
+    "farm_weather",
+    "sustainability_data",
+]
+
+# Tried in this order for each table inside an input directory
+SUFFIXES = (".csv", ".csv.gz", ".csv.xz", ".csv.bz2", ".csv.zip", ".gz", ".xz", ".bz2", ".zip")
+
+class FeedSource(NamedTuple):
+    path: str                      # file path, or "-" for stdin
+    member: Optional[str] = None   # member name when path is a zip archive
+
+    def __str__(self):
+        return f"{self.path}:{self.member}" if self.member else ("<stdin>" if self.path == STDIN else self.path)
+
+def _codec(head: bytes) -> Optional[str]:
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if head.startswith(b"BZh"):
+        return "bz2"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    return None
+
+def _zip_member(zf: zipfile.ZipFile, table: Optional[str]) -> str:
+    names = [n for n in zf.namelist() if not n.endswith("/")]
+    if table:
+        for n in names:
+            if os.path.basename(n) == table + ".csv":
+                return n
+    csvs = [n for n in names if n.lower().endswith(".csv")]
+    if len(csvs) == 1:
+        return csvs[0]
+    raise ValueError(f"cannot tell which member of the archive holds {table or 'the feed'}: {', '.join(names)}")
+
+def open_feed(source: FeedSource, table: Optional[str] = None):
+    """Text stream over a feed, decompressing on the fly. The codec comes
+    from the leading magic bytes, so extensions (or their absence) on
+    stdin and renamed files do not matter."""
+    if source.path == STDIN:
+        raw = sys.stdin.buffer
+    else:
+        raw = open(source.path, "rb")
+    buffered = raw if hasattr(raw, "peek") else io.BufferedReader(raw)
+    codec = _codec(buffered.peek(8)[:8])
+    if codec == "gzip":
+        stream = gzip.GzipFile(fileobj=buffered)
+    elif codec == "xz":
+        stream = lzma.LZMAFile(buffered)
+    elif codec == "bz2":
+        stream = bz2.BZ2File(buffered)
+    elif codec == "zip":
+        if source.path == STDIN:
+            raise ValueError("zip archives need a seekable file; pipe gzip or xz through stdin instead")
+        raw.close()
+        # Opened by path, the archive's file is released with its last member
+        zf = zipfile.ZipFile(source.path)
+        stream = zf.open(source.member or _zip_member(zf, table))
+    else:
+        stream = buffered
+    # utf-8-sig drops the BOM some of the feeds start with
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+def find_feed(table: str, input_path: str = ".") -> Optional[FeedSource]:
+    """The feed for a table in a directory, or inside a zip archive of feeds."""
+    if os.path.isfile(input_path) and zipfile.is_zipfile(input_path):
+        with zipfile.ZipFile(input_path) as zf:
+            for n in zf.namelist():
+                if os.path.basename(n) == table + ".csv":
+                    return FeedSource(input_path, n)
+        return None
+    for suffix in SUFFIXES:
+        path = os.path.join(input_path, table + suffix)
+        if os.path.isfile(path):
+            return FeedSource(path)
+    return None
+
+def read_manifest(path: str) -> Dict[str, FeedSource]:
+    """{"table": "path"} or {"table": {"path": ..., "member": ...}}; relative
+    paths are taken from the manifest's own directory."""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    feeds = {}
+    for table, entry in entries.items():
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        p = entry["path"]
+        if p != STDIN and not os.path.isabs(p):
+            p = os.path.join(base, p)
+        feeds[table] = FeedSource(p, entry.get("member"))
+    return feeds
+
+def resolve_feeds(tables: Sequence[str], input_path: str = ".", manifest: Optional[str] = None,
+                  stdin_table: Optional[str] = None) -> Dict[str, Optional[FeedSource]]:
+    listed = read_manifest(manifest) if manifest else {}
+    feeds = {}
+    for t in tables:
+        if t == stdin_table:
+            feeds[t] = FeedSource(STDIN)
+        elif manifest:
+            feeds[t] = listed.get(t)
+        else:
+            feeds[t] = find_feed(t, input_path)
+    return feeds
+
+# -------------------------
+# BATCHED READING
+# -------------------------
+
+def is_plain_file(source: FeedSource) -> bool:
+    if source.path == STDIN or source.member:
+        return False
+    with open(source.path, "rb") as f:
+        return _codec(f.read(8)) is None
+
+def _mapped_batches(mm, pos: int, size: int, batch_bytes: int) -> Iterator[Tuple[List[List[str]], int]]:
+    try:
+        while pos < size:
+            end = pos + batch_bytes
+            if end >= size:
+                end = size
+            else:
+                end = mm.find(b"\n", end)
+                end = size if end < 0 else end + 1
+            chunk = mm[pos:end]
+            # An odd number of quotes means the cut fell inside a quoted
+            # field that spans lines; carry on to the next line end
+            while chunk.count(b'"') % 2 and end < size:
+                nxt = mm.find(b"\n", end)
+                nxt = size if nxt < 0 else nxt + 1
+                chunk += mm[end:nxt]
+                end = nxt
+            # newline="" as in open_feed(): splitlines() would also break
+            # rows at \x0c, \x1c-\x1e, \x85 and \u2028/9 inside fields
+            rows = list(csv.reader(io.StringIO(chunk.decode("utf-8"), newline="")))
+            if [] in rows:
+                rows = [r for r in rows if r]
+            yield rows, end
+            pos = end
+    finally:
+        mm.close()
+
+def _stream_batches(f, reader, batch_rows: int, skip: int) -> Iterator[Tuple[List[List[str]], int]]:
+    with f:
+        # No offset to seek to once decompressing: read past what was done.
+        # Positions count non-empty rows, so blank lines are not counted
+        done = 0
+        while done < skip:
+            row = next(reader, None)
+            if row is None:
+                return
+            if row:
+                done += 1
+        while True:
+            rows = list(islice(reader, batch_rows))
+            if not rows:
+                return
+            if [] in rows:
+                # A batch of nothing but blank lines is not the end
+                rows = [r for r in rows if r]
+                if not rows:
+                    continue
+            done += len(rows)
+            yield rows, done
+
+def read_feed(source: FeedSource, table: Optional[str] = None, start: int = 0, batch_bytes: int = MMAP_BATCH_BYTES,
+              batch_rows: int = STREAM_BATCH_ROWS) -> Tuple[List[str], Iterator[Tuple[List[List[str]], int]]]:
+    """(header, batches of positional rows). Plain files are memory-mapped
+    and split at line ends, so no per-line read or decode calls are made;
+    each batch comes with the byte offset just past it. Compressed and
+    piped feeds stream through open_feed() and report rows read instead.
+    start is one of those positions, to carry on from."""
+    if is_plain_file(source):
+        with open(source.path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size == 0:
+                return [], iter(())
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = mm.find(b"\n")
+        header_end = size if header_end < 0 else header_end + 1
+        header = next(csv.reader([mm[:header_end].decode("utf-8-sig")]), [])
+        return header, _mapped_batches(mm, max(header_end, start), size, batch_bytes)
+    f = open_feed(source, table)
+    reader = csv.reader(f)
+    header = next(reader, [])
+    return header, _stream_batches(f, reader, batch_rows, start)
@@ -2,24 +2,30 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, scrolledtext
 import sqlite3
 from typing import List, Tuple
+from value_dictionary import get_value_dictionary
+from gui_components import MutationDialog
+from mutations import refresh_derived
+from feeds import FEED_TABLES
+from resultset import ResultSet
+from sharded import SHARDED_QUERIES, run_sharded
+from query_catalog import CATALOG, read_queries, bind, run as run_catalog, connect as connect_catalog
+from profiles import INTERACTIVE, connect
+from agriculture import upgradeDatabase
 
 DB_FILE = "agriculture.db"
 
 def open_conn():
-    conn = sqlite3.connect(DB_FILE)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    return connect(DB_FILE, INTERACTIVE)
 
 def run_query(query, params=()):
     try:
         conn = open_conn()
         cur = conn.cursor()
         cur.execute(query, params)
+        rows = ResultSet.from_cursor(cur)
         conn.commit()
-        rows = cur.fetchall()
-        col_names = [description[0] for description in cur.description] if cur.description else []
         conn.close()
-        return rows, col_names
+        return rows, rows.columns
     except Exception as e:
         messagebox.showerror("SQL Error", str(e))
         return [], []
@@ -41,6 +47,9 @@ def table_columns(table: str) -> List[Tuple]:
     return rows
 
 def get_sample_values(table: str, column: str, limit=50):
+    vd = get_value_dictionary(DB_FILE)
+    if vd.available:
+        return vd.top_values(table, column, limit)
     conn = open_conn()
     cur = conn.cursor()
     try:
@@ -51,146 +60,17 @@ def get_sample_values(table: str, column: str, limit=50):
     conn.close()
     return vals
 
-PREDEFINED_QUERIES = {
-    "Show all crops": "SELECT crop_id, crop_name, crop_group FROM crops;",
-    "List districts": "SELECT district_id, state_name, district_name FROM districts ORDER BY state_name;",
-    "Production overview": """SELECT p.stat_id, d.state_name, d.district_name, c.crop_name, p.season, p.area, p.production, p.yield
-        FROM crop_production_statistic p
-        LEFT JOIN districts d ON p.district_id = d.district_id
-        LEFT JOIN crops c ON p.crop_id = c.crop_id
-        LIMIT 100;""",
-    "Total production per state": """SELECT d.state_name, SUM(p.production) AS total_production
-        FROM crop_production_statistic p
-        JOIN districts d ON p.district_id = d.district_id
-        GROUP BY d.state_name
-        ORDER BY total_production DESC;""",
-    "Average yield by crop": """SELECT c.crop_name, ROUND(AVG(p.yield),2) AS avg_yield
-        FROM crop_production_statistic p
-        JOIN crops c ON p.crop_id = c.crop_id
-        GROUP BY c.crop_name
-        ORDER BY avg_yield DESC;""",
-    "Pesticides for Rice": """SELECT c.crop_name, pu.compound, pu.low_estimate, pu.high_estimate
-        FROM crop_pesticide cp
-        JOIN crops c ON cp.crop_id = c.crop_id
-        JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
-        WHERE c.crop_name LIKE '%Rice%';""",
-    "Weather data sample": "SELECT * FROM farm_weather LIMIT 100;",
-    "Market prices": """SELECT m.market_name, c.crop_name, cap.modal_price_rs_per_quintal, cap.arrival_tonnes
-        FROM crop_arrival_price cap
-        JOIN markets m ON cap.market_id = m.market_id
-        JOIN crops c ON cap.crop_id = c.crop_id
-        LIMIT 100;""",
-    "Crop Rainfall Requirements": """SELECT c.crop_name, 
-        ROUND(AVG(fw.rainfall_mm), 2) as avg_rainfall_mm,
-        ROUND(MIN(fw.rainfall_mm), 2) as min_rainfall_mm,
-        ROUND(MAX(fw.rainfall_mm), 2) as max_rainfall_mm,
-        COUNT(*) as data_points
-        FROM crops c
-        LEFT JOIN crop_production_statistic cps ON c.crop_id = cps.crop_id
-        LEFT JOIN farm_weather fw ON cps.district_id = fw.district_id
-        WHERE fw.rainfall_mm IS NOT NULL
-        GROUP BY c.crop_name
-        ORDER BY avg_rainfall_mm DESC;""",
-    "Crop Pesticide Usage": """SELECT c.crop_name,
-        COUNT(DISTINCT cp.pesticide_id) as pesticide_types,
-        ROUND(AVG(pu.low_estimate), 2) as avg_low_estimate,
-        ROUND(AVG(pu.high_estimate), 2) as avg_high_estimate,
-        GROUP_CONCAT(DISTINCT pu.compound) as compounds_used
-        FROM crops c
-        LEFT JOIN crop_pesticide cp ON c.crop_id = cp.crop_id
-        LEFT JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
-        WHERE pu.compound IS NOT NULL
-        GROUP BY c.crop_name
-        ORDER BY pesticide_types DESC;""",
-    "Sustainability Score Analysis": """SELECT 
-        c.crop_name,
-        ROUND(AVG(p.yield), 2) as avg_yield,
-        ROUND(AVG(fw.rainfall_mm), 2) as avg_rainfall,
-        COUNT(DISTINCT cp.pesticide_id) as pesticide_count,
-        CASE 
-            WHEN COUNT(DISTINCT cp.pesticide_id) <= 2 THEN 'High'
-            WHEN COUNT(DISTINCT cp.pesticide_id) <= 5 THEN 'Medium'
-            ELSE 'Low'
-        END as sustainability_score
-        FROM crops c
-        LEFT JOIN crop_production_statistic p ON c.crop_id = p.crop_id
-        LEFT JOIN farm_weather fw ON p.district_id = fw.district_id
-        LEFT JOIN crop_pesticide cp ON c.crop_id = cp.crop_id
-        GROUP BY c.crop_name
-        HAVING avg_yield IS NOT NULL
-        ORDER BY pesticide_count ASC, avg_yield DESC;""",
-    "Top Performing Crops by State": """SELECT 
-        d.state_name,
-        c.crop_name,
-        ROUND(AVG(p.yield), 2) as avg_yield,
-        ROUND(SUM(p.production), 2) as total_production,
-        ROUND(SUM(p.area), 2) as total_area
-        FROM crop_production_statistic p
-        JOIN districts d ON p.district_id = d.district_id
-        JOIN crops c ON p.crop_id = c.crop_id
-        WHERE p.yield IS NOT NULL
-        GROUP BY d.state_name, c.crop_name
-        ORDER BY d.state_name, avg_yield DESC;""",
-    "Weather Impact on Yield": """SELECT 
-        c.crop_name,
-        CASE 
-            WHEN fw.rainfall_mm < 500 THEN 'Low Rainfall'
-            WHEN fw.rainfall_mm BETWEEN 500 AND 1000 THEN 'Medium Rainfall'
-            ELSE 'High Rainfall'
-        END as rainfall_category,
-        ROUND(AVG(p.yield), 2) as avg_yield,
-        COUNT(*) as samples
-        FROM crop_production_statistic p
-        JOIN crops c ON p.crop_id = c.crop_id
-        JOIN farm_weather fw ON p.district_id = fw.district_id
-        WHERE p.yield IS NOT NULL AND fw.rainfall_mm IS NOT NULL
-        GROUP BY c.crop_name, rainfall_category
-        ORDER BY c.crop_name, rainfall_category;""",
-    "Market Price Trends": """SELECT 
-        c.crop_name,
-        m.market_name,
-        ROUND(AVG(cap.modal_price_rs_per_quintal), 2) as avg_price,
-        ROUND(MIN(cap.modal_price_rs_per_quintal), 2) as min_price,
-        ROUND(MAX(cap.modal_price_rs_per_quintal), 2) as max_price,
-        ROUND(SUM(cap.arrival_tonnes), 2) as total_arrival
-        FROM crop_arrival_price cap
-        JOIN crops c ON cap.crop_id = c.crop_id
-        JOIN markets m ON cap.market_id = m.market_id
-        WHERE cap.modal_price_rs_per_quintal IS NOT NULL
-        GROUP BY c.crop_name, m.market_name
-        ORDER BY avg_price DESC;""",
-    "Crop Efficiency Analysis": """SELECT 
-        c.crop_name,
-        ROUND(AVG(p.production / NULLIF(p.area, 0)), 2) as production_per_area,
-        ROUND(AVG(p.yield), 2) as avg_yield,
-        COUNT(DISTINCT cp.pesticide_id) as pesticide_usage,
-        ROUND(AVG(fw.rainfall_mm), 2) as avg_rainfall_req,
-        CASE 
-            WHEN AVG(p.yield) > 2000 AND COUNT(DISTINCT cp.pesticide_id) < 3 THEN 'Excellent'
-            WHEN AVG(p.yield) > 1000 AND COUNT(DISTINCT cp.pesticide_id) < 5 THEN 'Good'
-            WHEN AVG(p.yield) > 500 THEN 'Average'
-            ELSE 'Poor'
-        END as efficiency_rating
-        FROM crops c
-        LEFT JOIN crop_production_statistic p ON c.crop_id = p.crop_id
-        LEFT JOIN crop_pesticide cp ON c.crop_id = cp.crop_id
-        LEFT JOIN farm_weather fw ON p.district_id = fw.district_id
-        WHERE p.production IS NOT NULL AND p.area > 0
-        GROUP BY c.crop_name
-        ORDER BY production_per_area DESC;""",
-    "Season-wise Production": """SELECT 
-        p.season,
-        c.crop_name,
-        COUNT(*) as records,
-        ROUND(AVG(p.area), 2) as avg_area,
-        ROUND(AVG(p.production), 2) as avg_production,
-        ROUND(AVG(p.yield), 2) as avg_yield
-        FROM crop_production_statistic p
-        JOIN crops c ON p.crop_id = c.crop_id
-        WHERE p.season IS NOT NULL
-        GROUP BY p.season, c.crop_name
-        ORDER BY p.season, avg_production DESC;"""
-}
+# Quick queries are the read-only half of the shared catalog, by title
+QUICK_QUERIES = {CATALOG[name].title: name for name in read_queries()}
+
+_catalog_conn = None
+
+def catalog_conn():
+    # One long-lived connection so catalog statements stay in its statement cache
+    global _catalog_conn
+    if _catalog_conn is None:
+        _catalog_conn = connect_catalog(DB_FILE)
+    return _catalog_conn
 
 class ModernApp:
     def __init__(self, root):
@@ -202,9 +82,15 @@ class ModernApp:
         self.filters = []
         self.selected_tables = []
         self.all_tables = list_tables()
+        # Only feed tables are offered for edits; the rest are derived
+        self.edit_tables = [t for t in FEED_TABLES if t in self.all_tables]
         self.selected_columns_widgets = {}
         self.group_by_cols = []
         self.order_by_cols = []
+        self.result = None
+        self.sort_col = None
+        self.sort_desc = False
+        self._filter_job = None
         
         self.setup_styles()
         self.create_layout()
@@ -280,7 +166,7 @@ class ModernApp:
         query_frame = tk.Frame(container, bg="#2d2d2d")
         query_frame.pack(fill="x", pady=(0, 15))
         
-        self.query_combo = ttk.Combobox(query_frame, values=list(PREDEFINED_QUERIES.keys()),
+        self.query_combo = ttk.Combobox(query_frame, values=list(QUICK_QUERIES.keys()),
                                         state="readonly", font=("Segoe UI", 10))
         self.query_combo.pack(fill="x", pady=(0, 8))
         self.query_combo.set("Choose a query...")
@@ -377,6 +263,7 @@ class ModernApp:
         self.filter_op.pack(side="left", padx=(0, 3))
         self.filter_value = ttk.Combobox(row2, width=16, font=("Segoe UI", 9))
         self.filter_value.pack(side="left", padx=3)
+        self.filter_value.bind("<KeyRelease>", self.on_filter_value_typed)
         
         tk.Button(filter_add, text="+ Add Filter", bg="#10b981", fg="white",
                  font=("Segoe UI", 9, "bold"), relief="flat", cursor="hand2",
@@ -413,6 +300,12 @@ class ModernApp:
         self.result_count_label = tk.Label(results_header, text="", font=("Segoe UI", 11),
                                            bg="#2d2d2d", fg="#a0a0a0")
         self.result_count_label.pack(side="right")
+        self.result_filter_var = tk.StringVar()
+        self.result_filter_var.trace_add("write", self.schedule_result_filter)
+        tk.Entry(results_header, textvariable=self.result_filter_var, font=("Segoe UI", 10),
+                 width=24).pack(side="right", padx=10)
+        tk.Label(results_header, text="Filter:", font=("Segoe UI", 10),
+                 bg="#2d2d2d", fg="#a0a0a0").pack(side="right")
         
         table_frame = tk.Frame(top_section, bg="#2d2d2d")
         table_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
@@ -525,6 +418,21 @@ class ModernApp:
         if table and field:
             values = get_sample_values(table, field)
             self.filter_value["values"] = values
+            stats = get_value_dictionary(DB_FILE).column_stats(table, field)
+            if stats and stats[2] is not None:
+                self.active_filters_label.config(
+                    text=f"{field}: {stats[1]} distinct, range {stats[2]} – {stats[3]}")
+    
+    def on_filter_value_typed(self, event):
+        table = self.filter_table.get()
+        field = self.filter_field.get()
+        if table and field:
+            prefix = self.filter_value.get()
+            vd = get_value_dictionary(DB_FILE)
+            if prefix:
+                self.filter_value["values"] = vd.complete(table, field, prefix)
+            else:
+                self.filter_value["values"] = vd.top_values(table, field)
     
     def add_filter(self):
         table = self.filter_table.get()
@@ -583,7 +491,7 @@ class ModernApp:
             messagebox.showwarning("No Query", "No query to copy. Run a query first.")
     
     def export_results(self):
-        if not self.tree.get_children():
+        if not self.result:
             messagebox.showwarning("No Data", "No results to export")
             return
         
@@ -597,13 +505,10 @@ class ModernApp:
             if filename:
                 with open(filename, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
-                    headers = [self.tree.heading(col)['text'] for col in self.tree['columns']]
-                    writer.writerow(headers)
-                    for item in self.tree.get_children():
-                        values = self.tree.item(item)['values']
-                        writer.writerow(values)
+                    writer.writerow(self.result.columns)
+                    writer.writerows(self.result)
                 
-                messagebox.showinfo("Success", f"Exported {len(self.tree.get_children())} rows to {filename}")
+                messagebox.showinfo("Success", f"Exported {len(self.result)} rows to {filename}")
         except Exception as e:
             messagebox.showerror("Export Error", str(e))
     
@@ -719,38 +624,94 @@ class ModernApp:
     
     def run_quick_query(self):
         query_name = self.query_combo.get()
-        if query_name in PREDEFINED_QUERIES:
-            query = PREDEFINED_QUERIES[query_name]
-            self.update_sql_preview(query, ())
-            self.execute_query(query, ())
-        else:
+        if query_name not in QUICK_QUERIES:
             messagebox.showwarning("No Query", "Please select a query from the dropdown")
+            return
+        name = QUICK_QUERIES[query_name]
+        values = {}
+        for param, default in CATALOG[name].params:
+            val = simpledialog.askstring("Parameter", f"{param}:", initialvalue=str(default))
+            if val is None:
+                return
+            values[param] = val
+        try:
+            params = bind(name, values)
+            if name in SHARDED_QUERIES:
+                col_names, rows = run_sharded(DB_FILE, name)
+            else:
+                col_names, rows = run_catalog(catalog_conn(), name, params)
+        except (sqlite3.Error, ValueError) as e:
+            messagebox.showerror("SQL Error", str(e))
+            return
+        self.update_sql_preview(CATALOG[name].sql, params)
+        self.show_results(col_names, rows)
     
     def execute_query(self, query, params=()):
         rows, col_names = run_query(query, params)
-        
+        self.show_results(col_names, rows)
+    
+    def show_results(self, col_names, rows):
         if not col_names:
             messagebox.showinfo("Complete", "Query executed successfully (no results to display)")
             return
         
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
+        # Kept so export, sorting and filtering read the fetched values
+        # rather than the Treeview's strings, and never go back to SQLite
+        self.result = rows if isinstance(rows, ResultSet) else ResultSet.from_rows(col_names, rows)
+        self.sort_col = None
+        self.sort_desc = False
         self.tree["columns"] = col_names
         self.tree["show"] = "headings"
         
         for col in col_names:
-            self.tree.heading(col, text=col, anchor="w")
+            self.tree.heading(col, text=col, anchor="w", command=lambda c=col: self.sort_results(c))
             self.tree.column(col, width=120, anchor="w")
         
+        self.render_results()
+    
+    def render_results(self):
+        rows = self.result
+        if self.sort_col is not None:
+            rows = rows.sorted_by(self.sort_col, self.sort_desc)
+        text = self.result_filter_var.get().strip()
+        if text:
+            rows = rows.search(text)
+        
+        for item in self.tree.get_children():
+            self.tree.delete(item)
         for row in rows:
             self.tree.insert("", "end", values=row)
         
-        self.result_count_label.config(text=f"{len(rows)} results")
+        if text:
+            self.result_count_label.config(text=f"{len(rows)} of {len(self.result)} results")
+        else:
+            self.result_count_label.config(text=f"{len(rows)} results")
+    
+    def sort_results(self, col):
+        # Clicking the sorted column again flips the direction
+        if self.result is None:
+            return
+        self.sort_desc = not self.sort_desc if col == self.sort_col else False
+        self.sort_col = col
+        for c in self.result.columns:
+            arrow = (" ▼" if self.sort_desc else " ▲") if c == col else ""
+            self.tree.heading(c, text=c + arrow)
+        self.render_results()
+    
+    def schedule_result_filter(self, *args):
+        if self.result is None:
+            return
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(80, self._run_result_filter)
+    
+    def _run_result_filter(self):
+        self._filter_job = None
+        self.render_results()
     
     def insert_record(self):
-        table = simpledialog.askstring("Insert", f"Enter table name:\n{', '.join(self.all_tables)}")
-        if not table or table not in self.all_tables:
+        table = simpledialog.askstring("Insert", f"Enter table name:\n{', '.join(self.edit_tables)}")
+        if not table or table not in self.edit_tables:
             return
         
         cols = table_columns(table)
@@ -774,47 +735,21 @@ class ModernApp:
         query = f"INSERT INTO {table} ({','.join(non_auto_cols)}) VALUES ({placeholders})"
         
         run_query(query, values)
+        conn = open_conn()
+        try:
+            refresh_derived(conn)
+        finally:
+            conn.close()
         messagebox.showinfo("Success", "Record inserted successfully!")
     
     def update_record(self):
-        table = simpledialog.askstring("Update", f"Enter table name:\n{', '.join(self.all_tables)}")
-        if not table or table not in self.all_tables:
-            return
-        
-        col = simpledialog.askstring("Update", "Column to update:")
-        if not col:
-            return
-        
-        val = simpledialog.askstring("Update", f"New value for {col}:")
-        if val is None:
-            return
-        
-        cond = simpledialog.askstring("Update", "WHERE condition (e.g., id=1):")
-        if not cond:
-            return
-        
-        query = f"UPDATE {table} SET {col} = ? WHERE {cond}"
-        run_query(query, (val,))
-        messagebox.showinfo("Success", "Record updated successfully!")
+        MutationDialog(self.root, DB_FILE, self.edit_tables, mode="update")
     
     def delete_record(self):
-        table = simpledialog.askstring("Delete", f"Enter table name:\n{', '.join(self.all_tables)}")
-        if not table or table not in self.all_tables:
-            return
-        
-        cond = simpledialog.askstring("Delete", "WHERE condition (e.g., id=1):")
-        if not cond:
-            return
-        
-        confirm = messagebox.askyesno("Confirm", f"Delete from {table} WHERE {cond}?")
-        if not confirm:
-            return
-        
-        query = f"DELETE FROM {table} WHERE {cond}"
-        run_query(query, ())
-        messagebox.showinfo("Success", "Record deleted successfully!")
+        MutationDialog(self.root, DB_FILE, self.edit_tables, mode="delete")
 
 if __name__ == "__main__":
+    upgradeDatabase(DB_FILE)
     root = tk.Tk()
     app = ModernApp(root)
     root.mainloop()
\ No newline at end of file
@@ -1,6 +1,9 @@
 # gui_components.py
+import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
+import mutations
+from profiles import ANALYTICS, INTERACTIVE, connect
 
 def error_popup(message: str):
     messagebox.showerror("Error", message)
@@ -21,8 +24,10 @@ class StatusBar(ttk.Frame):
 
 class TreeTable(ttk.Frame):
     """Simple scrollable table using ttk.Treeview"""
-    def __init__(self, parent, columns=()):
+    def __init__(self, parent, columns=(), on_heading=None):
         super().__init__(parent)
+        # Called with the column name when a heading is clicked
+        self.on_heading = on_heading
         self.tree = ttk.Treeview(self, columns=columns, show="headings")
         self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
         self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
@@ -36,9 +41,17 @@ class TreeTable(ttk.Frame):
     def set_columns(self, columns):
         self.tree["columns"] = columns
         for c in columns:
-            self.tree.heading(c, text=c)
+            if self.on_heading:
+                self.tree.heading(c, text=c, command=lambda c=c: self.on_heading(c))
+            else:
+                self.tree.heading(c, text=c)
             self.tree.column(c, width=130, anchor="w")
 
+    def mark_sorted(self, column, descending=False):
+        for c in self.tree["columns"]:
+            arrow = (" ▼" if descending else " ▲") if c == column else ""
+            self.tree.heading(c, text=c + arrow)
+
     def clear(self):
         for r in self.tree.get_children():
             self.tree.delete(r)
@@ -48,4 +61,153 @@ class TreeTable(ttk.Frame):
             self.tree.insert("", "end", values=r)
 
     def get_all_rows(self):
-        return [self.tree.item(i)["values"] for i in self.tree.get_children()]
\ No newline at end of file
+        return [self.tree.item(i)["values"] for i in self.tree.get_children()]
+
+class LazyNotebook(ttk.Notebook):
+    """Notebook that builds each tab's contents the first time it is shown"""
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.factories = {}
+        self.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def add_lazy(self, title, factory):
+        holder = ttk.Frame(self)
+        self.add(holder, text=title)
+        self.factories[str(holder)] = factory
+        return holder
+
+    def on_tab_changed(self, event=None):
+        if not self.select():
+            return
+        holder = self.nametowidget(self.select())
+        factory = self.factories.pop(str(holder), None)
+        if factory is None:
+            return
+        widget = factory(holder)
+        widget.pack(fill=tk.BOTH, expand=True)
+        if getattr(widget, "auto_refresh", False):
+            widget.refresh()
+
+class MutationDialog(tk.Toplevel):
+    """Pick a table, conditions and (for updates) new values; preview the
+    affected-row count, then run through mutations.update_rows/delete_rows."""
+    def __init__(self, parent, db_path, tables, mode="delete"):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.mode = mode
+        self.title("Update Records" if mode == "update" else "Delete Records")
+        self.predicates = []
+        self.assignments = []
+
+        top = ttk.Frame(self, padding=8)
+        top.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(top, text="Table:").grid(row=0, column=0, sticky="w")
+        self.table_var = tk.StringVar()
+        table_cb = ttk.Combobox(top, textvariable=self.table_var, values=tables, state="readonly", width=30)
+        table_cb.grid(row=0, column=1, columnspan=3, sticky="w", pady=2)
+        table_cb.bind("<<ComboboxSelected>>", self.on_table_change)
+
+        ttk.Label(top, text="Where:").grid(row=1, column=0, sticky="w")
+        self.col_cb = ttk.Combobox(top, state="readonly", width=18)
+        self.col_cb.grid(row=1, column=1, pady=2)
+        self.op_cb = ttk.Combobox(top, values=mutations.OPERATORS, state="readonly", width=10)
+        self.op_cb.set("=")
+        self.op_cb.grid(row=1, column=2, padx=4)
+        self.value_entry = ttk.Entry(top, width=18)
+        self.value_entry.grid(row=1, column=3)
+        ttk.Button(top, text="+ Condition", command=self.add_predicate).grid(row=1, column=4, padx=4)
+
+        row = 2
+        if mode == "update":
+            ttk.Label(top, text="Set:").grid(row=row, column=0, sticky="w")
+            self.set_cb = ttk.Combobox(top, state="readonly", width=18)
+            self.set_cb.grid(row=row, column=1, pady=2)
+            ttk.Label(top, text="=").grid(row=row, column=2)
+            self.set_entry = ttk.Entry(top, width=18)
+            self.set_entry.grid(row=row, column=3)
+            ttk.Button(top, text="+ Value", command=self.add_assignment).grid(row=row, column=4, padx=4)
+            row += 1
+
+        self.summary = tk.StringVar()
+        ttk.Label(top, textvariable=self.summary, wraplength=520, justify="left").grid(
+            row=row, column=0, columnspan=5, sticky="w", pady=6)
+        buttons = ttk.Frame(top)
+        buttons.grid(row=row + 1, column=0, columnspan=5, sticky="e")
+        ttk.Button(buttons, text="Clear", command=self.clear).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Preview", command=self.preview).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="Run", command=self.run).pack(side=tk.LEFT)
+        self.update_summary()
+
+    def on_table_change(self, event=None):
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            cols = mutations.table_columns(conn, self.table_var.get())
+        finally:
+            conn.close()
+        self.col_cb["values"] = cols
+        if self.mode == "update":
+            self.set_cb["values"] = cols
+        self.clear()
+
+    def add_predicate(self):
+        col, op = self.col_cb.get(), self.op_cb.get()
+        if not col or not op:
+            return
+        self.predicates.append((col, op, self.value_entry.get()))
+        self.update_summary()
+
+    def add_assignment(self):
+        col = self.set_cb.get()
+        if not col:
+            return
+        val = self.set_entry.get()
+        self.assignments.append((col, val if val != "" else None))
+        self.update_summary()
+
+    def clear(self):
+        self.predicates, self.assignments = [], []
+        self.update_summary()
+
+    def update_summary(self, extra=""):
+        where = " AND ".join(f"{c} {o}" + ("" if o.startswith("IS") else f" {v!r}") for c, o, v in self.predicates)
+        text = f"WHERE {where or '(no conditions)'}"
+        if self.mode == "update":
+            text = "SET " + (", ".join(f"{c} = {v!r}" for c, v in self.assignments) or "(nothing)") + "\n" + text
+        self.summary.set(text + ("\n" + extra if extra else ""))
+
+    def preview(self):
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            count, indexed, _ = mutations.preview(conn, self.table_var.get(), self.predicates)
+        except (ValueError, sqlite3.Error) as e:
+            error_popup(str(e))
+            return None
+        finally:
+            conn.close()
+        note = "uses an index" if indexed else "full table scan"
+        self.update_summary(f"{count} rows affected ({note})")
+        return count
+
+    def run(self):
+        count = self.preview()
+        if count is None:
+            return
+        verb = "Update" if self.mode == "update" else "Delete"
+        if not messagebox.askyesno("Confirm", f"{verb} {count} rows in {self.table_var.get()}?", parent=self):
+            return
+        conn = connect(self.db_path, INTERACTIVE)
+        try:
+            if self.mode == "update":
+                done = mutations.update_rows(conn, self.table_var.get(), self.assignments, self.predicates)
+            else:
+                def progress(n):
+                    self.update_summary(f"Deleted {n} of {count} rows...")
+                    self.update_idletasks()
+                done = mutations.delete_rows(conn, self.table_var.get(), self.predicates, progress=progress)
+        except (ValueError, sqlite3.Error) as e:
+            error_popup(str(e))
+            return
+        finally:
+            conn.close()
+        self.update_summary(f"{verb}d {done} rows")
+        info_popup(f"{verb}d {done} rows in {self.table_var.get()}")
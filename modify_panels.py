@@ -2,13 +2,16 @@
 import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
+import mutations
+from profiles import ANALYTICS, INTERACTIVE, connect
 
 def execute(db_path: str, query: str, params: tuple = ()):
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path, INTERACTIVE)
     cur = conn.cursor()
     try:
         cur.execute(query, params)
         conn.commit()
+        mutations.refresh_derived(conn)
         return True, None
     except Exception as e:
         conn.rollback()
@@ -185,39 +188,78 @@ class UpdateRecordsPanel(ttk.Frame):
         else: messagebox.showerror("Error", err)
 
 class DeleteRecordsPanel(ttk.Frame):
+    TABLES = {
+        "crops": ("crops", "crop_id"), "districts": ("districts", "district_id"),
+        "markets": ("markets", "market_id"), "production": ("crop_production_statistic", "stat_id"),
+        "sustainability": ("sustainability_data", "record_id"), "pesticide": ("pesticide_use", "pesticide_id")
+    }
+
     def __init__(self, parent, db_path, status, **kwargs):
         super().__init__(parent, **kwargs)
         self.db = db_path; self.status = status
+        self.plan = []
         self.create_ui()
 
     def create_ui(self):
         frm = ttk.Frame(self, padding=10); frm.pack(fill=tk.X)
         ttk.Label(frm, text="Table (crops/districts/markets/production/sustainability/pesticide)").grid(row=0,column=0,sticky="w")
         self.tbl = tk.StringVar(value="crops"); ttk.Entry(frm, textvariable=self.tbl).grid(row=0,column=1,sticky="ew")
-        ttk.Label(frm, text="Primary ID").grid(row=1,column=0,sticky="w")
+        ttk.Label(frm, text="Primary IDs (comma separated)").grid(row=1,column=0,sticky="w")
         self.pid = tk.StringVar(); ttk.Entry(frm, textvariable=self.pid).grid(row=1,column=1,sticky="ew")
-        ttk.Button(frm, text="Delete", command=self.delete_record).grid(row=2,column=0,columnspan=2,pady=6)
+        ttk.Label(frm, text="Re-parent dependents to ID (optional)").grid(row=2,column=0,sticky="w")
+        self.new_parent = tk.StringVar(); ttk.Entry(frm, textvariable=self.new_parent).grid(row=2,column=1,sticky="ew")
+        btns = ttk.Frame(frm); btns.grid(row=3,column=0,columnspan=2,pady=6)
+        ttk.Button(btns, text="Plan", command=self.plan_delete).pack(side=tk.LEFT, padx=4)
+        ttk.Button(btns, text="Delete", command=self.delete_record).pack(side=tk.LEFT, padx=4)
         frm.columnconfigure(1, weight=1)
+        self.plan_tree = ttk.Treeview(self, columns=("rows", "via"), show="tree headings", height=10)
+        self.plan_tree.heading("#0", text="table"); self.plan_tree.heading("rows", text="rows"); self.plan_tree.heading("via", text="via")
+        self.plan_tree.column("rows", width=80, anchor="e"); self.plan_tree.column("via", width=420)
+        self.plan_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0,10))
 
-    def delete_record(self):
+    def plan_delete(self):
         table = self.tbl.get().strip()
-        pid = self.pid.get().strip()
-        if not table or not pid:
-            messagebox.showwarning("Input", "Table and ID required"); return
-        map_ids = {
-            "crops": "crop_id", "districts": "district_id", "markets": "market_id",
-            "production": "stat_id", "sustainability": "record_id", "pesticide": "pesticide_id"
-        }
-        if table not in map_ids:
-            messagebox.showwarning("Error", "Unsupported table key"); return
-        try: pid_i = int(pid)
-        except: messagebox.showwarning("Input", "ID must be integer"); return
-        real_table = table
-        if table == "production": real_table = "crop_production_statistic"
-        if table == "pesticide": real_table = "pesticide_use"
-        q = f"DELETE FROM {real_table} WHERE {map_ids[table]} = ?"
-        ok, err = execute(self.db, q, (pid_i,))
-        if ok:
-            self.status.set_status(f"Deleted {table} {pid_i}"); messagebox.showinfo("Deleted", f"Deleted {table} {pid_i}"); self.pid.set("")
-        else:
-            messagebox.showerror("Error", err)
\ No newline at end of file
+        if table not in self.TABLES:
+            messagebox.showwarning("Error", "Unsupported table key"); return None
+        try: ids = [int(p) for p in self.pid.get().split(",") if p.strip()]
+        except ValueError: messagebox.showwarning("Input", "IDs must be integers"); return None
+        if not ids:
+            messagebox.showwarning("Input", "Table and ID required"); return None
+        real_table, key = self.TABLES[table]
+        conn = connect(self.db, ANALYTICS)
+        try:
+            self.plan = mutations.plan_cascade(conn, real_table, [(key, "IN", ids)])
+        finally:
+            conn.close()
+        self.plan_tree.delete(*self.plan_tree.get_children())
+        parents = {}
+        for step in self.plan:
+            node = self.plan_tree.insert(parents.get(step.depth - 1, ""), "end", text=step.table,
+                                         values=(step.rows, step.via), open=True)
+            parents[step.depth] = node
+        dependents = sum(s.rows for s in self.plan[1:])
+        self.status.set_status(f"{self.plan[0].rows} {table} rows, {dependents} dependent rows")
+        return self.plan
+
+    def delete_record(self):
+        plan = self.plan_delete()
+        if not plan or not plan[0].rows:
+            return
+        reparent = self.new_parent.get().strip()
+        try: reparent = int(reparent) if reparent else None
+        except ValueError: messagebox.showwarning("Input", "Re-parent ID must be integer"); return
+        dependents = sum(s.rows for s in plan[1:])
+        action = f"re-parent {dependents} dependent rows to {reparent}" if reparent is not None else f"delete {dependents} dependent rows"
+        if not messagebox.askyesno("Confirm", f"Delete {plan[0].rows} {plan[0].table} rows and {action}?"):
+            return
+        conn = connect(self.db, INTERACTIVE)
+        try:
+            done = mutations.execute_cascade(conn, plan, reparent_to=reparent)
+        except ValueError as e:
+            messagebox.showwarning("Re-parent", str(e)); return
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", str(e)); return
+        finally:
+            conn.close()
+        self.status.set_status(f"Changed {done} rows"); messagebox.showinfo("Deleted", f"Changed {done} rows"); self.pid.set("")
+        self.plan_tree.delete(*self.plan_tree.get_children())
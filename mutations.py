@@ -0,0 +1,288 @@
+# mutations.py
+# Structured UPDATE / DELETE: identifiers are checked against the schema,
+# values are always bound, and the affected-row count can be previewed before
+# anything is written. Deletes run in rowid chunks with a commit between
+# them, so a large cleanup never holds the write lock for its whole run.
+import sqlite3
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from price_series import update_price_series
+from rollup_cube import refresh_cube
+from suitability import refresh_climate_profiles
+from exposure import refresh_exposure
+
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "LIKE", "IN", "IS NULL", "IS NOT NULL")
+
+DELETE_CHUNK = 500
+
+# (column, operator, value); value is ignored for IS [NOT] NULL and is a
+# sequence for IN
+Predicate = Tuple[str, str, object]
+
+def refresh_derived(conn):
+    """Bring the trigger-tracked derived tables up to date with the feed
+    tables; run after anything writes to those. Prices first: the cube is
+    built from price_daily."""
+    update_price_series(conn)
+    refresh_cube(conn)
+    refresh_climate_profiles(conn)
+    refresh_exposure(conn)
+
+def table_columns(conn, table: str) -> List[str]:
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    if not cur.fetchone():
+        raise ValueError(f"Unknown table: {table}")
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table});")]
+
+def where_clause(conn, table: str, predicates: Sequence[Predicate]) -> Tuple[str, list]:
+    if not predicates:
+        raise ValueError("At least one condition is required")
+    columns = table_columns(conn, table)
+    parts, params = [], []
+    for column, op, value in predicates:
+        op = op.upper()
+        if column not in columns:
+            raise ValueError(f"Unknown column {table}.{column}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        if op in ("IS NULL", "IS NOT NULL"):
+            parts.append(f"{column} {op}")
+        elif op == "IN":
+            values = [v.strip() for v in value.split(",")] if isinstance(value, str) else list(value)
+            if not values:
+                raise ValueError(f"IN on {column} needs at least one value")
+            parts.append(f"{column} IN ({', '.join(['?'] * len(values))})")
+            params.extend(values)
+        else:
+            parts.append(f"{column} {op} ?")
+            params.append(value)
+    return " AND ".join(parts), params
+
+def preview(conn, table: str, predicates: Sequence[Predicate]) -> Tuple[int, bool, List[str]]:
+    """(matching rows, whether the lookup is index-driven, plan lines)."""
+    where, params = where_clause(conn, table, predicates)
+    sql = f"SELECT COUNT(*) FROM {table} WHERE {where}"
+    plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    indexed = any(line.startswith("SEARCH") for line in plan)
+    count = conn.execute(sql, params).fetchone()[0]
+    return count, indexed, plan
+
+def update_rows(conn, table: str, assignments: Sequence[Tuple[str, object]],
+                predicates: Sequence[Predicate]) -> int:
+    if not assignments:
+        raise ValueError("Nothing to update")
+    columns = table_columns(conn, table)
+    for column, _ in assignments:
+        if column not in columns:
+            raise ValueError(f"Unknown column {table}.{column}")
+    where, params = where_clause(conn, table, predicates)
+    sets = ", ".join(f"{column} = ?" for column, _ in assignments)
+    cur = conn.execute(f"UPDATE {table} SET {sets} WHERE {where}",
+                       [value for _, value in assignments] + params)
+    conn.commit()
+    refresh_derived(conn)
+    return cur.rowcount
+
+def _has_rowid(conn, table: str) -> bool:
+    try:
+        conn.execute(f"SELECT rowid FROM {table} LIMIT 0")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def delete_rows(conn, table: str, predicates: Sequence[Predicate], chunk: int = DELETE_CHUNK,
+                progress: Optional[Callable[[int], None]] = None) -> int:
+    """Delete matching rows chunk by chunk; returns the total deleted."""
+    where, params = where_clause(conn, table, predicates)
+    done = _delete_where(conn, table, where, params, chunk, progress, commit=True)
+    refresh_derived(conn)
+    return done
+
+def _delete_where(conn, table, where, params, chunk, progress=None, commit=False, done=0) -> int:
+    if not _has_rowid(conn, table):
+        cur = conn.execute(f"DELETE FROM {table} WHERE {where}", params)
+        if commit:
+            conn.commit()
+        return cur.rowcount
+    # Each chunk resumes after the last rowid seen, so an unindexed filter
+    # still reads the table once overall rather than once per chunk
+    select = f"SELECT rowid FROM {table} WHERE rowid > ? AND ({where}) ORDER BY rowid LIMIT ?"
+    total, last = 0, -(2 ** 63)
+    while True:
+        rowids = [r[0] for r in conn.execute(select, [last] + list(params) + [chunk])]
+        if not rowids:
+            return total
+        conn.execute(f"DELETE FROM {table} WHERE rowid IN ({', '.join(['?'] * len(rowids))})", rowids)
+        if commit:
+            conn.commit()
+        total += len(rowids)
+        last = rowids[-1]
+        if progress:
+            progress(done + total)
+        if len(rowids) < chunk:
+            return total
+
+# -------------------------
+# CASCADE PLANNING
+# -------------------------
+
+def foreign_key_graph(conn) -> Dict[str, List[Tuple[str, str, str]]]:
+    """parent table -> [(child table, child column, parent column)] from the declared FKs."""
+    graph: Dict[str, List[Tuple[str, str, str]]] = {}
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    for child in tables:
+        for fk in conn.execute(f"PRAGMA foreign_key_list({child});"):
+            parent, from_col, to_col = fk[2], fk[3], fk[4]
+            if to_col is None:
+                to_col = next(c[1] for c in conn.execute(f"PRAGMA table_info({parent});") if c[5] == 1)
+            graph.setdefault(parent, []).append((child, from_col, to_col))
+    return graph
+
+def create_foreign_key_indexes(conn):
+    # Every FK child column gets an index it leads, so cascade counts and
+    # deletes (and SQLite's own FK checks on parent deletes) are lookups
+    for parent, children in foreign_key_graph(conn).items():
+        for child, column, _ in children:
+            leading = set()
+            for idx in conn.execute(f"PRAGMA index_list({child});"):
+                first = conn.execute(f"PRAGMA index_info({idx[1]});").fetchone()
+                if first:
+                    leading.add(first[2])
+            if column not in leading:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_fk_{child}_{column} ON {child} ({column})")
+
+class CascadeStep(NamedTuple):
+    depth: int          # longest FK path from the root, so children sort below all their parents
+    table: str
+    via: str            # "child.column -> parent.column" per link, "; "-joined; empty for the root
+    where: str
+    params: tuple
+    rows: int
+    links: Tuple[Tuple[str, str, str], ...] = ()   # (column, parent table, parent column)
+
+def plan_cascade(conn, table: str, predicates: Sequence[Predicate]) -> List[CascadeStep]:
+    """Root rows plus every dependent row reachable through FKs, one step
+    per table, parents first. A table reached along several paths (e.g.
+    crop_pesticide via crops and via pesticide_use) gets one step matching
+    any of them, so none of its rows is counted twice."""
+    where, params = where_clause(conn, table, predicates)
+    graph = foreign_key_graph(conn)
+
+    # Links reachable from the root, leaving out those that close a cycle;
+    # reversed DFS post-order is then parents before children
+    links: Dict[str, List[Tuple[str, str, str]]] = {}
+    seen, order = {table}, []
+
+    def visit(tbl, stack):
+        for child, column, parent_col in graph.get(tbl, []):
+            if child in stack:
+                continue
+            links.setdefault(child, []).append((column, tbl, parent_col))
+            if child not in seen:
+                seen.add(child)
+                visit(child, stack + (child,))
+        order.append(tbl)
+
+    visit(table, (table,))
+    steps: List[CascadeStep] = []
+    found = {}      # table -> its step, for tables with matching rows
+    for tbl in reversed(order):
+        if tbl == table:
+            step_where, step_params, step_links, depth = where, tuple(params), (), 0
+        else:
+            step_links = tuple(l for l in links[tbl] if l[1] in found)
+            if not step_links:
+                continue
+            parts, step_params = [], ()
+            for column, parent, parent_col in step_links:
+                parent_step = found[parent]
+                parts.append(f"{column} IN (SELECT {parent_col} FROM {parent} WHERE {parent_step.where})")
+                step_params += parent_step.params
+            step_where = parts[0] if len(parts) == 1 else " OR ".join(f"({p})" for p in parts)
+            depth = 1 + max(found[parent].depth for _, parent, _ in step_links)
+        rows = conn.execute(f"SELECT COUNT(*) FROM {tbl} WHERE {step_where}", step_params).fetchone()[0]
+        via = "; ".join(f"{tbl}.{column} -> {parent}.{parent_col}" for column, parent, parent_col in step_links)
+        step = CascadeStep(depth, tbl, via, step_where, step_params, rows, step_links)
+        steps.append(step)
+        if rows:
+            found[tbl] = step
+    return steps
+
+def _unique_partners(conn, table: str, column: str) -> List[List[str]]:
+    """For each unique index on table that includes column, its other columns."""
+    out = []
+    for idx in conn.execute(f"PRAGMA index_list({table});").fetchall():
+        if idx[2]:
+            cols = [r[2] for r in conn.execute(f"PRAGMA index_info({idx[1]});")]
+            if column in cols and len(cols) > 1:
+                out.append([c for c in cols if c != column])
+    return out
+
+def _drop_collisions(conn, table: str, column: str, move: str, params: tuple, target) -> int:
+    """Delete rows about to be moved to column = target that would break a
+    unique key: those the target already has, and all but the newest of
+    moved rows that match each other. The target's links stay as they are."""
+    if not _has_rowid(conn, table):
+        return 0
+    dropped = 0
+    for others in _unique_partners(conn, table, column):
+        same = " AND ".join(f"t.{c} = {table}.{c}" for c in others)
+        cur = conn.execute(f"""DELETE FROM {table} WHERE ({move})
+                               AND EXISTS (SELECT 1 FROM {table} t WHERE t.{column} = ? AND {same})""",
+                           params + (target,))
+        dropped += cur.rowcount
+        present = " AND ".join(f"{c} IS NOT NULL" for c in others)
+        cur = conn.execute(f"""DELETE FROM {table} WHERE ({move}) AND {present}
+                               AND rowid NOT IN (SELECT MAX(rowid) FROM {table} WHERE ({move})
+                                                 GROUP BY {", ".join(others)})""",
+                           params + params)
+        dropped += cur.rowcount
+    return dropped
+
+def check_reparent_target(conn, root: CascadeStep, steps: Sequence[CascadeStep], target):
+    """Raise ValueError unless every key the root's children point at exists
+    for target in a root row that is not itself being deleted."""
+    keys = {parent_col for step in steps for _, parent, parent_col in step.links if parent == root.table}
+    for key in keys:
+        found = conn.execute(f"SELECT EXISTS (SELECT 1 FROM {root.table} WHERE {key} = ? AND NOT ({root.where}))",
+                             (target,) + root.params).fetchone()[0]
+        if not found:
+            raise ValueError(f"No {root.table} row with {key} = {target} outside the rows being deleted")
+
+def execute_cascade(conn, steps: Sequence[CascadeStep], reparent_to=None, chunk: int = DELETE_CHUNK,
+                    progress: Optional[Callable[[int], None]] = None) -> int:
+    """Apply a plan in one transaction: dependents deepest first, then the root.
+
+    With reparent_to, the root's direct children are moved to that parent key
+    instead of deleted, and nothing below them is touched. Moved rows that
+    would duplicate a unique key at the new parent are deleted instead."""
+    if not steps:
+        return 0
+    root = steps[0]
+    if reparent_to is not None:
+        check_reparent_target(conn, root, steps, reparent_to)
+    total = 0
+    try:
+        conn.execute("BEGIN")
+        if reparent_to is not None:
+            for step in steps[1:]:
+                for column, parent, parent_col in step.links:
+                    if parent != root.table:
+                        continue
+                    move = f"{column} IN (SELECT {parent_col} FROM {root.table} WHERE {root.where})"
+                    total += _drop_collisions(conn, step.table, column, move, root.params, reparent_to)
+                    cur = conn.execute(f"UPDATE {step.table} SET {column} = ? WHERE {move}",
+                                       (reparent_to,) + root.params)
+                    total += cur.rowcount
+            ordered = [root]
+        else:
+            ordered = sorted(steps, key=lambda s: -s.depth)
+        for step in ordered:
+            if step.rows:
+                total += _delete_where(conn, step.table, step.where, step.params, chunk, progress, done=total)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    refresh_derived(conn)
+    return total
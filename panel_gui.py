@@ -0,0 +1,70 @@
+# panel_gui.py
+# Tabbed front end over view_panels / modify_panels. Tabs are created and
+# queried only when first opened, and panel modules are imported on demand.
+import importlib
+import tkinter as tk
+from gui_components import StatusBar, LazyNotebook
+from agriculture import upgradeDatabase
+
+DB_FILE = "agriculture.db"
+
+# (tab title, module, panel class)
+PANELS = [
+    ("Dashboard", "view_panels", "DashboardPanel"),
+    ("Crops", "view_panels", "CropsPanel"),
+    ("Districts", "view_panels", "DistrictsPanel"),
+    ("Markets", "view_panels", "MarketsPanel"),
+    ("Pesticides", "view_panels", "PesticidePanel"),
+    ("Crop-District", "view_panels", "CropDistrictPanel"),
+    ("Crop-Pesticide", "view_panels", "CropPesticidePanel"),
+    ("Weather", "view_panels", "WeatherPanel"),
+    ("Sustainability", "view_panels", "SustainabilityPanel"),
+    ("Requirements", "view_panels", "RequirementsPanel"),
+    ("Crops in District", "view_panels", "CropsInDistrictPanel"),
+    ("Pesticides in District", "view_panels", "PesticidesInDistrictPanel"),
+    ("Arrival Prices", "view_panels", "ArrivalPricePanel"),
+    ("Price Series", "view_panels", "PriceSeriesPanel"),
+    ("Price Elasticity", "view_panels", "ElasticityPanel"),
+    ("Rollup Cube", "view_panels", "CubePanel"),
+    ("Production", "view_panels", "ProductionJoinPanel"),
+    ("Yearly Production", "view_panels", "YearlyProductionPanel"),
+    ("Pesticide per Crop", "view_panels", "PesticidePerCropPanel"),
+    ("Pesticide Exposure", "view_panels", "ExposurePanel"),
+    ("Sustainability Detail", "view_panels", "SustainabilityJoinPanel"),
+    ("Best Crop", "view_panels", "BestCropForDistrictPanel"),
+    ("Climate Suitability", "view_panels", "ClimateSuitabilityPanel"),
+    ("High Prod / Low Sustain", "view_panels", "HighProdLowSustainPanel"),
+    ("District Risk", "view_panels", "DistrictRiskPanel"),
+    ("Yield vs Rainfall", "view_panels", "YieldVsRainfallPanel"),
+    ("Top Yield Crops", "view_panels", "TopYieldCropsPanel"),
+    ("Custom Query", "view_panels", "CustomQueryPanel"),
+    ("Add Records", "modify_panels", "AddRecordsPanel"),
+    ("Update Records", "modify_panels", "UpdateRecordsPanel"),
+    ("Delete Records", "modify_panels", "DeleteRecordsPanel"),
+]
+
+class PanelApp:
+    def __init__(self, root, db_path: str = DB_FILE):
+        self.root = root
+        self.db_path = db_path
+        self.root.title("Agriculture Database - Panels")
+        self.root.geometry("1300x850")
+        self.status = StatusBar(root)
+        self.notebook = LazyNotebook(root)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        for title, module, cls in PANELS:
+            self.notebook.add_lazy(title, self.panel_factory(module, cls))
+        # Build the first tab once the empty window has been drawn
+        self.root.after_idle(self.notebook.on_tab_changed)
+
+    def panel_factory(self, module: str, cls: str):
+        def build(parent):
+            panel_cls = getattr(importlib.import_module(module), cls)
+            return panel_cls(parent, self.db_path, self.status)
+        return build
+
+if __name__ == "__main__":
+    upgradeDatabase(DB_FILE)
+    root = tk.Tk()
+    app = PanelApp(root)
+    root.mainloop()
@@ -0,0 +1,268 @@
+# price_series.py
+# Daily crop x market price series kept beside crop_arrival_price, plus the
+# rolling / resampling helpers the price views are built from.
+import math
+from collections import deque
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from resultset import ResultSet, fetch
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%y", "%m/%d/%Y", "%d-%m-%Y", "%d/%m/%Y")
+
+@lru_cache(maxsize=4096)
+def parse_day(text) -> Optional[int]:
+    """Arrival date text -> proleptic ordinal day (None if unparseable)."""
+    if text is None:
+        return None
+    text = str(text).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).toordinal()
+        except ValueError:
+            continue
+    return None
+
+def create_price_series(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS price_daily (
+        crop_id INTEGER NOT NULL,
+        market_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        arrivals INTEGER NOT NULL,
+        arrival_tonnes REAL,
+        min_price REAL,
+        max_price REAL,
+        modal_sum REAL,
+        modal_count INTEGER NOT NULL DEFAULT 0,
+        modal_min REAL,
+        modal_max REAL,
+        PRIMARY KEY (crop_id, market_id, day)
+    ) WITHOUT ROWID;
+    """)
+    # Highest arrival_id already folded into price_daily
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS price_series_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_arrival_id INTEGER NOT NULL
+    );
+    """)
+    # Days whose arrivals were updated or deleted after being folded in.
+    # The raw date text is kept: parse_day is only registered on the
+    # connection that runs update_price_series
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS price_daily_dirty (
+        crop_id INTEGER NOT NULL,
+        market_id INTEGER NOT NULL,
+        arrival_date TEXT NOT NULL,
+        PRIMARY KEY (crop_id, market_id, arrival_date)
+    ) WITHOUT ROWID;
+    """)
+    # New arrivals are found by the watermark; only rows at or below it
+    # need marking, inserts with an explicit id below it included. This
+    # also keeps clearing the table (after its state row) from filling the
+    # dirty table
+    watermark = "(SELECT last_arrival_id FROM price_series_state WHERE id = 1)"
+    for event, refs, when in (("INSERT", ("NEW",), f"NEW.arrival_id <= {watermark}"),
+                              ("UPDATE", ("OLD", "NEW"), f"OLD.arrival_id <= {watermark} OR NEW.arrival_id <= {watermark}"),
+                              ("DELETE", ("OLD",), f"OLD.arrival_id <= {watermark}")):
+        marks = "\n".join(f"""
+            INSERT INTO price_daily_dirty (crop_id, market_id, arrival_date)
+            SELECT {r}.crop_id, {r}.market_id, {r}.arrival_date
+            WHERE {r}.crop_id IS NOT NULL AND {r}.market_id IS NOT NULL AND {r}.arrival_date IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM price_daily_dirty WHERE crop_id = {r}.crop_id
+                              AND market_id = {r}.market_id AND arrival_date = {r}.arrival_date);""" for r in refs)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_price_daily_dirty_{event.lower()}
+        AFTER {event} ON crop_arrival_price
+        WHEN {when}
+        BEGIN {marks}
+        END;
+        """)
+
+def _low(col):
+    return f"min(COALESCE({col}, excluded.{col}), COALESCE(excluded.{col}, {col}))"
+
+def _high(col):
+    return f"max(COALESCE({col}, excluded.{col}), COALESCE(excluded.{col}, {col}))"
+
+_DAILY_SELECT = """SELECT a.crop_id, a.market_id, parse_day(a.arrival_date) AS day, COUNT(*), SUM(a.arrival_tonnes),
+       MIN(a.min_price_rs_per_quintal), MAX(a.max_price_rs_per_quintal),
+       TOTAL(a.modal_price_rs_per_quintal), COUNT(a.modal_price_rs_per_quintal),
+       MIN(a.modal_price_rs_per_quintal), MAX(a.modal_price_rs_per_quintal)"""
+
+_DAILY_COLUMNS = """crop_id, market_id, day, arrivals, arrival_tonnes, min_price, max_price,
+                         modal_sum, modal_count, modal_min, modal_max"""
+
+def _refresh_dirty_days(cur, last_id):
+    """Recompute the price_daily rows of marked days from the arrivals
+    already folded in; newer ones are added by the watermark pass."""
+    keys = "(SELECT crop_id, market_id, parse_day(arrival_date) FROM price_daily_dirty)"
+    cur.execute(f"DELETE FROM price_daily WHERE (crop_id, market_id, day) IN {keys}")
+    cur.execute(f"""
+    INSERT INTO price_daily ({_DAILY_COLUMNS})
+    {_DAILY_SELECT}
+    FROM (SELECT DISTINCT crop_id, market_id FROM price_daily_dirty) k
+    JOIN crop_arrival_price a ON a.crop_id = k.crop_id AND a.market_id = k.market_id
+    WHERE a.arrival_id <= ?
+    GROUP BY a.crop_id, a.market_id, day
+    HAVING day IS NOT NULL AND (a.crop_id, a.market_id, day) IN {keys}
+    """, (last_id,))
+    cur.execute("DELETE FROM price_daily_dirty")
+
+def update_price_series(conn):
+    """Fold arrivals newer than the stored watermark into price_daily, and
+    recompute the days whose older arrivals were updated or deleted."""
+    conn.create_function("parse_day", 1, parse_day, deterministic=True)
+    cur = conn.cursor()
+    cur.execute("SELECT last_arrival_id FROM price_series_state WHERE id = 1")
+    row = cur.fetchone()
+    last_id = row[0] if row else 0
+    cur.execute("SELECT MAX(arrival_id) FROM crop_arrival_price")
+    max_id = cur.fetchone()[0] or 0
+    if max_id < last_id:
+        # Arrivals were cleared or rewritten below the watermark
+        cur.execute("DELETE FROM price_daily")
+        cur.execute("DELETE FROM price_daily_dirty")
+        last_id = 0
+    cur.execute("SELECT EXISTS (SELECT 1 FROM price_daily_dirty)")
+    if cur.fetchone()[0]:
+        _refresh_dirty_days(cur, last_id)
+    cur.execute(f"""
+    INSERT INTO price_daily ({_DAILY_COLUMNS})
+    {_DAILY_SELECT}
+    FROM crop_arrival_price a
+    WHERE a.arrival_id > ? AND a.crop_id IS NOT NULL AND a.market_id IS NOT NULL
+    GROUP BY a.crop_id, a.market_id, day
+    HAVING day IS NOT NULL
+    ON CONFLICT(crop_id, market_id, day) DO UPDATE SET
+        arrivals = arrivals + excluded.arrivals,
+        arrival_tonnes = COALESCE(arrival_tonnes, 0) + COALESCE(excluded.arrival_tonnes, 0),
+        min_price = {_low("min_price")},
+        max_price = {_high("max_price")},
+        modal_sum = modal_sum + excluded.modal_sum,
+        modal_count = modal_count + excluded.modal_count,
+        modal_min = {_low("modal_min")},
+        modal_max = {_high("modal_max")}
+    """, (last_id,))
+    cur.execute("""INSERT INTO price_series_state (id, last_arrival_id) VALUES (1, ?)
+                   ON CONFLICT(id) DO UPDATE SET last_arrival_id = excluded.last_arrival_id""", (max_id,))
+    conn.commit()
+
+def rebuild_price_series(conn):
+    conn.execute("DELETE FROM price_daily")
+    conn.execute("DELETE FROM price_series_state")
+    conn.execute("DELETE FROM price_daily_dirty")
+    update_price_series(conn)
+
+# -------------------------
+# SERIES ACCESS
+# -------------------------
+
+# (day, arrival_tonnes, min_price, max_price, modal_price)
+Point = Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float]]
+
+def load_series(conn, crop_id: int, market_id: int) -> ResultSet:
+    return fetch(conn, """
+    SELECT day, arrival_tonnes, min_price, max_price, modal_sum / NULLIF(modal_count, 0)
+    FROM price_daily WHERE crop_id = ? AND market_id = ? ORDER BY day""", (crop_id, market_id))
+
+def day_label(day: int) -> str:
+    return date.fromordinal(day).isoformat()
+
+def rolling_mean(values, window: int):
+    out, buf, total, n = [], deque(), 0.0, 0
+    for v in values:
+        buf.append(v)
+        if v is not None:
+            total += v
+            n += 1
+        if len(buf) > window:
+            old = buf.popleft()
+            if old is not None:
+                total -= old
+                n -= 1
+        out.append(total / n if n else None)
+    return out
+
+def rolling_volatility(values, window: int):
+    """Rolling sample standard deviation of day-over-day log returns."""
+    returns = [None]
+    for prev, cur in zip(values, values[1:]):
+        returns.append(math.log(cur / prev) if prev and cur and prev > 0 and cur > 0 else None)
+    out, buf, s1, s2, n = [], deque(), 0.0, 0.0, 0
+    for r in returns:
+        buf.append(r)
+        if r is not None:
+            s1 += r
+            s2 += r * r
+            n += 1
+        if len(buf) > window:
+            old = buf.popleft()
+            if old is not None:
+                s1 -= old
+                s2 -= old * old
+                n -= 1
+        if n < 2:
+            out.append(None)
+        else:
+            out.append(math.sqrt(max(s2 - s1 * s1 / n, 0.0) / (n - 1)))
+    return out
+
+def _rolling_extreme(values, window: int, pick):
+    # Monotonic deque: O(n) over the whole series
+    out, dq = [], deque()
+    for i, v in enumerate(values):
+        if v is not None:
+            while dq and pick(v, values[dq[-1]]):
+                dq.pop()
+            dq.append(i)
+        while dq and dq[0] <= i - window:
+            dq.popleft()
+        out.append(values[dq[0]] if dq else None)
+    return out
+
+def price_bands(series: List[Point], window: int):
+    """Rolling (lowest min_price, highest max_price) per point."""
+    lows = _rolling_extreme([p[2] for p in series], window, lambda a, b: a <= b)
+    highs = _rolling_extreme([p[3] for p in series], window, lambda a, b: a >= b)
+    return list(zip(lows, highs))
+
+def resample(series: List[Point], period: str = "W") -> List[Point]:
+    """Aggregate daily points into weekly ('W', Monday start) or monthly ('M') buckets."""
+    buckets = {}
+    for day, tonnes, lo, hi, modal in series:
+        d = date.fromordinal(day)
+        if period == "M":
+            key = date(d.year, d.month, 1).toordinal()
+        else:
+            key = day - d.weekday()
+        b = buckets.setdefault(key, [0.0, None, None, 0.0, 0])
+        b[0] += tonnes or 0
+        if lo is not None:
+            b[1] = lo if b[1] is None else min(b[1], lo)
+        if hi is not None:
+            b[2] = hi if b[2] is None else max(b[2], hi)
+        if modal is not None:
+            b[3] += modal
+            b[4] += 1
+    return [(k, b[0], b[1], b[2], b[3] / b[4] if b[4] else None)
+            for k, b in sorted(buckets.items())]
+
+def series_report(conn, crop_id: int, market_id: int, window: int = 7, period: str = "D"):
+    """Rows for display: date, tonnes, min, max, modal, rolling mean, volatility, band."""
+    series = load_series(conn, crop_id, market_id)
+    if period in ("W", "M"):
+        series = resample(series, period)
+    modal = [p[4] for p in series]
+    means = rolling_mean(modal, window)
+    vols = rolling_volatility(modal, window)
+    bands = price_bands(series, window)
+    rows = []
+    for p, m, v, (lo, hi) in zip(series, means, vols, bands):
+        rows.append((day_label(p[0]), p[1], p[2], p[3],
+                     round(p[4], 2) if p[4] is not None else None,
+                     round(m, 2) if m is not None else None,
+                     round(v, 4) if v is not None else None, lo, hi))
+    return rows
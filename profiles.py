@@ -0,0 +1,152 @@
+# profiles.py
+# Connection profiles: the PRAGMAs each kind of connection runs with.
+#   bulk-load    the importer. WAL with synchronous off and a large page
+#                cache; foreign keys are not enforced per row but checked
+#                once at the end with PRAGMA foreign_key_check
+#   interactive  the GUIs' edits and ad-hoc SQL. Foreign keys on, and a
+#                busy timeout so a write waits out an import's commit
+#                instead of failing with "database is locked"
+#   analytics    reports and background reads. Opened read-only, with a
+#                bigger cache and the file memory-mapped
+#
+#   python profiles.py --bench                  import throughput per profile
+#   python profiles.py --bench --input DIR      ... with the feeds in DIR
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DB_FILE = "agriculture.db"
+
+BULK_LOAD = "bulk-load"
+INTERACTIVE = "interactive"
+ANALYTICS = "analytics"
+
+class Profile(NamedTuple):
+    name: str
+    pragmas: Tuple[Tuple[str, object], ...]   # applied in this order
+    read_only: bool = False
+
+PROFILES: Dict[str, Profile] = {
+    BULK_LOAD: Profile(BULK_LOAD, (
+        ("journal_mode", "WAL"),
+        ("synchronous", "OFF"),
+        ("cache_size", -262144),             # 256 MB
+        ("foreign_keys", "OFF"),
+        # temp_store stays on disk: in memory it made the trigger-maintained
+        # tables about ten times slower to load
+    )),
+    INTERACTIVE: Profile(INTERACTIVE, (
+        ("foreign_keys", "ON"),
+        ("busy_timeout", 5000),
+        ("cache_size", -16384),
+    )),
+    ANALYTICS: Profile(ANALYTICS, (
+        ("foreign_keys", "ON"),
+        ("busy_timeout", 5000),
+        ("query_only", "ON"),
+        ("cache_size", -65536),
+        ("mmap_size", 268435456),
+    ), read_only=True),
+}
+
+def apply_profile(conn: sqlite3.Connection, profile: str) -> sqlite3.Connection:
+    for pragma, value in PROFILES[profile].pragmas:
+        conn.execute(f"PRAGMA {pragma} = {value};")
+    return conn
+
+def connect(db_path: str = DB_FILE, profile: str = INTERACTIVE, **kwargs) -> sqlite3.Connection:
+    if PROFILES[profile].read_only:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, **kwargs)
+    else:
+        conn = sqlite3.connect(db_path, **kwargs)
+    return apply_profile(conn, profile)
+
+def foreign_key_violations(conn) -> List[Tuple[str, int, str, str]]:
+    """(table, rowid, parent table, child column) for every row whose parent is missing."""
+    columns = {}
+    out = []
+    for table, rowid, parent, fkid in conn.execute("PRAGMA foreign_key_check;").fetchall():
+        if table not in columns:
+            columns[table] = {r[0]: r[3] for r in conn.execute(f"PRAGMA foreign_key_list({table});")}
+        out.append((table, rowid, parent, columns[table].get(fkid)))
+    return out
+
+def end_bulk_load(conn):
+    """Fold the WAL back into the file and return to the interactive
+    settings, so the database is complete on its own once closed."""
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE;")
+    except sqlite3.OperationalError as e:
+        # Leaving WAL needs the only connection; a reader that is still
+        # open just means the file stays in WAL mode
+        print(f"Database left in WAL mode: {e}")
+    conn.execute("PRAGMA synchronous = FULL;")
+    apply_profile(conn, INTERACTIVE)
+
+# -------------------------
+# BENCHMARK
+# -------------------------
+
+# Feeds the benchmark loads, parents first
+BENCH_TABLES = ["crops", "districts", "markets", "crop_arrival_price", "sustainability_data"]
+
+def _timed_import(input_path: str, profile: Optional[str], workdir: str) -> Tuple[float, int]:
+    import agriculture
+    from feeds import find_feed
+    from validation import Quarantine
+    db = os.path.join(workdir, f"{profile or 'default'}.db")
+    if profile is None:
+        # What the importer did before profiles: defaults plus per-row FK checks
+        conn = sqlite3.connect(db)
+        conn.execute("PRAGMA foreign_keys = ON;")
+    else:
+        conn = connect(db, profile)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agriculture.createTables(conn)
+        quarantine = Quarantine(conn)
+        start = time.perf_counter()
+        for t in BENCH_TABLES:
+            source = find_feed(t, input_path)
+            if source is not None:
+                agriculture.importCSV(conn, t, quarantine=quarantine, source=source)
+        if profile == BULK_LOAD:
+            foreign_key_violations(conn)
+            end_bulk_load(conn)
+        conn.commit()
+        seconds = time.perf_counter() - start
+    rows = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in BENCH_TABLES)
+    conn.close()
+    return seconds, rows
+
+def benchmark(input_path: str = ".") -> List[Tuple[str, float, int]]:
+    """(profile, seconds, rows) for importing BENCH_TABLES into a fresh database."""
+    workdir = tempfile.mkdtemp(prefix="profile-bench-")
+    try:
+        return [(p or "default", *_timed_import(input_path, p, workdir)) for p in (None, INTERACTIVE, BULK_LOAD)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite connection profiles")
+    parser.add_argument("--bench", action="store_true", help="time an import under each writable profile")
+    parser.add_argument("--input", default=".", help="directory holding the feeds to import")
+    args = parser.parse_args()
+    if args.bench:
+        results = benchmark(args.input)
+        base = results[0][1]
+        for name, seconds, rows in results:
+            print(f"{name:12s} {seconds:8.2f} s {rows / seconds:10.0f} rows/s  x{base / seconds:.2f}")
+        return
+    for p in PROFILES.values():
+        print(f"{p.name:12s} " + ", ".join(f"{k}={v}" for k, v in p.pragmas) + (" (read-only)" if p.read_only else ""))
+
+if __name__ == "__main__":
+    main()
@@ -1,161 +1,431 @@
+-- Generated from query_catalog.py (python query_catalog.py --export-sql queries.sql).
+-- Edit the catalog, not this file. Change a .parameter line to run another variant.
 
--- ============================
--- 20+ DIVERSE SQL STATEMENTS
--- (SELECTs, JOINs, AGGREGATES, SUBQUERY, VIEW, INSERT, UPDATE, DELETE)
--- ============================
+.parameter set :district_id 1
+.parameter set :limit 100
+.parameter set :year 2023
+.parameter set :crop 'Rice'
+.parameter set :min_production 3000.0
+.parameter set :min_yield 2000.0
+.parameter set :low_mm 5.0
+.parameter set :high_mm 20.0
+.parameter set :month '2023-07'
+.parameter set :state_name 'Karnataka'
+.parameter set :district_name 'Bengaluru Urban'
+.parameter set :crop_name 'Cotton'
+.parameter set :crop_group 'Cash Crops'
+.parameter set :stat_id 6
+.parameter set :production 3900.0
+.parameter set :crop_id 1
+.parameter set :avg_yield 3000.0
+.parameter set :pesticide_id 1
+.parameter set :high_estimate 500.0
+.parameter set :arrival_id 3
+.parameter set :record_id 3
 
-/* 1. Simple SELECT: show crops */
-SELECT crop_id, crop_name, crop_group FROM crops;
+/* 1. Show all crops [crops] */
+SELECT crop_id, crop_name, crop_group FROM crops ORDER BY crop_id;
 
-/* 2. List districts */
+/* 2. List districts [districts] */
 SELECT district_id, state_name, district_name FROM districts ORDER BY state_name, district_name;
 
-/* 3. Join: production with district & crop (latest year sample) */
+/* 3. Markets with district info [markets_with_districts] */
+SELECT m.market_name, d.district_name, d.state_name
+        FROM markets m
+        JOIN districts d ON m.district_id = d.district_id
+        ORDER BY d.state_name, d.district_name, m.market_name;
+
+/* 4. Crops grown in a district [crops_in_district] */
+SELECT DISTINCT c.crop_name
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.district_id = :district_id
+        ORDER BY c.crop_name;
+
+/* 5. Production overview [production_overview] */
+SELECT p.stat_id, p.year, d.state_name, d.district_name, c.crop_name, p.season, p.area, p.production, p.yield
+        FROM crop_production_statistic p
+        LEFT JOIN districts d ON p.district_id = d.district_id
+        LEFT JOIN crops c ON p.crop_id = c.crop_id
+        LIMIT :limit;
+
+/* 6. Production for a year [production_for_year] */
 SELECT p.year, d.state_name, d.district_name, c.crop_name, p.season, p.area, p.production, p.yield
-FROM crop_production_statistic p
-JOIN districts d ON p.district_id = d.district_id
-JOIN crops c ON p.crop_id = c.crop_id
-WHERE p.year = 2023
-ORDER BY p.production DESC;
-
-/* 4. Aggregate: total production per state in 2023 */
-SELECT d.state_name, SUM(p.production) AS total_production_2023
-FROM crop_production_statistic p
-JOIN districts d ON p.district_id = d.district_id
-WHERE p.year = 2023
-GROUP BY d.state_name
-ORDER BY total_production_2023 DESC;
-
-/* 5. Average yield by crop */
-SELECT c.crop_name, ROUND(AVG(p.yield),2) AS avg_yield
-FROM crop_production_statistic p
-JOIN crops c ON p.crop_id = c.crop_id
-GROUP BY c.crop_name
-ORDER BY avg_yield DESC;
-
-/* 6. Many-to-many example: pesticides used for Rice */
-SELECT c.crop_name, pu.compound, cp.avg_estimate, cp.effectiveness_score
-FROM crop_pesticide cp
-JOIN crops c ON cp.crop_id = c.crop_id
-JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
-WHERE c.crop_name = 'Rice';
-
-/* 7. Correlation-like: join rainfall (sustainability) with yield */
-SELECT d.district_name, s.year, s.rainfall_mm, ROUND(AVG(s.crop_yield),2) AS avg_yield
-FROM sustainability_data s
-JOIN districts d ON s.district_id = d.district_id
-GROUP BY d.district_name, s.year
-ORDER BY s.year DESC;
-
-/* 8. Subquery: states with production > 3000 in 2022 */
+        FROM crop_production_statistic p
+        JOIN districts d ON p.district_id = d.district_id
+        JOIN crops c ON p.crop_id = c.crop_id
+        WHERE p.year = :year
+        ORDER BY p.production DESC
+        LIMIT :limit;
+
+/* 7. Production stats by season for a crop [production_for_crop_by_season] */
+SELECT c.crop_name, d.district_name, p.season, p.area, p.production, p.yield
+        FROM crop_production_statistic p
+        JOIN crops c ON p.crop_id = c.crop_id
+        JOIN districts d ON p.district_id = d.district_id
+        WHERE p.crop_id IN (SELECT crop_id FROM crops WHERE crop_name = :crop)
+        ORDER BY p.season, p.production DESC;
+
+/* 8. Total production per state [state_production] */
+SELECT geo_key AS state_name, production AS total_production
+        FROM cube_cells
+        WHERE geo_level = 'state' AND crop_level = 'all' AND season = '*'
+        ORDER BY total_production DESC;
+
+/* 9. Total production per state in a year [state_production_for_year] */
+SELECT state_name, ROUND(state_production, 2) AS total_production
+        FROM yearly_state_production
+        WHERE year = :year
+        ORDER BY total_production DESC;
+
+/* 10. Year-over-year production by state [state_production_yoy] */
+SELECT
+        year,
+        state_name,
+        ROUND(state_production, 2) as production,
+        ROUND(state_production - LAG(state_production) OVER (PARTITION BY state_name ORDER BY year), 2) as change
+        FROM yearly_state_production
+        ORDER BY state_name, year;
+
+/* 11. States with a district-crop above a production level in a year [states_above_production] */
 SELECT DISTINCT d.state_name
-FROM crop_production_statistic p
-JOIN districts d ON p.district_id = d.district_id
-WHERE p.year = 2022
-  AND p.production > 3000;
-
-/* 9. Window function (SQLite supports window funcs): top crop per district by production (2023) */
-SELECT district_name, crop_name, production, rank() OVER (PARTITION BY district_id ORDER BY production DESC) as rk
-FROM (
-  SELECT p.district_id, d.district_name, c.crop_name, p.production
-  FROM crop_production_statistic p
-  JOIN districts d ON p.district_id = d.district_id
-  JOIN crops c ON p.crop_id = c.crop_id
-  WHERE p.year = 2023
-)
-WHERE rk = 1;
-
-/* 10. Price analysis: average modal price by crop */
-SELECT c.crop_name, ROUND(AVG(cap.modal_price_rs_per_quintal),2) as avg_modal_price
-FROM crop_arrival_price cap
-JOIN crops c ON cap.crop_id = c.crop_id
-GROUP BY c.crop_name
-ORDER BY avg_modal_price DESC;
-
-/* 11. Market supply: total arrival tonnes per market */
-SELECT m.market_name, SUM(cap.arrival_tonnes) AS total_tonnes
-FROM crop_arrival_price cap
-JOIN markets m ON cap.market_id = m.market_id
-GROUP BY m.market_name
-ORDER BY total_tonnes DESC;
-
-/* 12. Create a VIEW: yearly_state_production */
-CREATE VIEW IF NOT EXISTS yearly_state_production AS
-SELECT p.year, d.state_name, SUM(p.production) AS state_production
-FROM crop_production_statistic p
-JOIN districts d ON p.district_id = d.district_id
-GROUP BY p.year, d.state_name;
-
-/* 13. Query the VIEW */
-SELECT * FROM yearly_state_production WHERE year = 2023 ORDER BY state_production DESC;
-
-/* 14. Insert: add a new district */
-INSERT INTO districts (state_name, district_name) VALUES ('Karnataka', 'Bengaluru Urban');
-
-/* 15. Insert: add a new crop and requirement */
-INSERT INTO crops (crop_name, crop_group) VALUES ('Cotton', 'Cash Crops');
-INSERT INTO crop_requirements (crop_id, N, P, K, temperature, humidity, ph, rainfall) VALUES (
-  (SELECT crop_id FROM crops WHERE crop_name='Cotton'), 60, 30, 20, 28, 65, 6.8, 600
-);
-
-/* 16. Update: fix a production value (example) */
-UPDATE crop_production_statistic
-SET production = 3900, yield = ROUND(3900.0/1250.0,3), year = 2023
-WHERE stat_id = 6; -- previously inserted row for stat_id 6
-
-/* 17. Update: mark a pesticide avg_estimate (adjust) */
-UPDATE pesticide_use SET avg_estimate = avg_estimate * 1.05 WHERE year = 2022 AND compound = 'CompoundA';
-
-/* 18. Delete: remove a demo arrival price record by ID */
-DELETE FROM crop_arrival_price WHERE arrival_id = 3;
-
-/* 19. Complex SELECT: join production, weather, and sustainability to get context */
-SELECT p.year, d.state_name, d.district_name, c.crop_name, p.production, w.precipitation, s.sustainability_score
-FROM crop_production_statistic p
-LEFT JOIN farm_weather w ON p.district_id = w.district_id AND w.date LIKE '2023-07-%'
-LEFT JOIN sustainability_data s ON p.crop_id = s.crop_id AND p.district_id = s.district_id AND s.year = p.year
-JOIN districts d ON p.district_id = d.district_id
-JOIN crops c ON p.crop_id = c.crop_id
-WHERE p.year = 2023
-ORDER BY p.production DESC
-LIMIT 10;
-
-/* 20. Aggregate with HAVING: districts with avg yield > 3.0 */
-SELECT d.district_name, AVG(p.yield) AS avg_yield
-FROM crop_production_statistic p
-JOIN districts d ON p.district_id = d.district_id
-GROUP BY d.district_name
-HAVING AVG(p.yield) > 3.0;
-
-/* 21. Insert multiple production rows (batch demo) */
-INSERT INTO crop_production_statistic (crop_id, district_id, season, area, production, yield, year) VALUES
-(1, 5, 'Kharif', 300.0, 900.0, 3.0, 2023),
-(3, 4, 'Kharif', 600.0, 1800.0, 3.0, 2023);
-
-/* 22. Subquery with IN: crops grown in Ludhiana (district_id = 1) */
-SELECT DISTINCT c.crop_name
-FROM crop_production_statistic p
-JOIN crops c ON p.crop_id = c.crop_id
-WHERE p.district_id = 1;
+        FROM crop_production_statistic p
+        JOIN districts d ON p.district_id = d.district_id
+        WHERE p.year = :year AND p.production > :min_production;
+
+/* 12. Total production per district [total_production_per_district] */
+SELECT d.district_name, ROUND(SUM(r.sum_production), 2) AS total_production
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        GROUP BY d.district_name
+        ORDER BY total_production DESC;
+
+/* 13. Top crop per district in a year [top_crop_per_district] */
+SELECT district_name, crop_name, production
+        FROM (
+          SELECT d.district_name, c.crop_name, p.production,
+                 rank() OVER (PARTITION BY p.district_id ORDER BY p.production DESC) AS rk
+          FROM crop_production_statistic p
+          JOIN districts d ON p.district_id = d.district_id
+          JOIN crops c ON p.crop_id = c.crop_id
+          WHERE p.year = :year
+        )
+        WHERE rk = 1
+        ORDER BY production DESC;
+
+/* 14. Top Performing Crops by State [top_crops_by_state] */
+SELECT
+        d.state_name,
+        c.crop_name,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        ROUND(SUM(r.sum_production), 2) as total_production,
+        ROUND(SUM(r.sum_area), 2) as total_area
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.yield_count > 0
+        GROUP BY d.state_name, c.crop_name
+        ORDER BY d.state_name, avg_yield DESC;
+
+/* 15. Season-wise Production [season_production] */
+SELECT
+        r.season,
+        c.crop_name,
+        SUM(r.record_count) as records,
+        ROUND(SUM(r.sum_area) / SUM(r.record_count), 2) as avg_area,
+        ROUND(SUM(r.sum_production) / SUM(r.record_count), 2) as avg_production,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.season <> ''
+        GROUP BY r.season, c.crop_name
+        ORDER BY r.season, avg_production DESC;
+
+/* 16. Crop Efficiency Analysis [crop_efficiency] */
+SELECT
+        c.crop_name,
+        ROUND(AVG(p.production / NULLIF(p.area, 0)), 2) as production_per_area,
+        ROUND(AVG(p.yield), 2) as avg_yield,
+        pc.pesticide_count as pesticide_usage,
+        ROUND(AVG(w.precip_sum / NULLIF(w.precip_count, 0)), 2) as avg_rainfall_req,
+        CASE
+            WHEN AVG(p.yield) > 2000 AND pc.pesticide_count < 3 THEN 'Excellent'
+            WHEN AVG(p.yield) > 1000 AND pc.pesticide_count < 5 THEN 'Good'
+            WHEN AVG(p.yield) > 500 THEN 'Average'
+            ELSE 'Poor'
+        END as efficiency_rating
+        FROM crops c
+        JOIN crop_production_statistic p ON c.crop_id = p.crop_id
+        JOIN (SELECT c2.crop_name, COUNT(DISTINCT cp.pesticide_id) AS pesticide_count
+              FROM crops c2 LEFT JOIN crop_pesticide cp ON cp.crop_id = c2.crop_id
+              GROUP BY c2.crop_name) pc ON pc.crop_name = c.crop_name
+        LEFT JOIN district_weather_profile w ON w.district_id = p.district_id
+        WHERE p.production IS NOT NULL AND p.area > 0
+        GROUP BY c.crop_name
+        ORDER BY production_per_area DESC;
+
+/* 17. Average yield by crop [avg_yield_by_crop] */
+SELECT c.crop_name, ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0),2) AS avg_yield
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        GROUP BY c.crop_name
+        ORDER BY avg_yield DESC;
+
+/* 18. High yield crops [high_yield_crops] */
+SELECT c.crop_name, d.district_name, cd.avg_yield
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        WHERE cd.avg_yield > :min_yield
+        ORDER BY cd.avg_yield DESC;
+
+/* 19. Districts with average yield above a level [districts_above_yield] */
+SELECT d.district_name, ROUND(SUM(r.sum_yield) / SUM(r.yield_count), 3) AS avg_yield
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        GROUP BY d.district_id
+        HAVING SUM(r.yield_count) > 0 AND SUM(r.sum_yield) / SUM(r.yield_count) > :min_yield
+        ORDER BY avg_yield DESC;
+
+/* 20. Crop requirements vs average yield [requirements_vs_yield] */
+SELECT c.crop_name, cr.N, cr.P, cr.K,
+               ROUND(SUM(y.sum_yield) / NULLIF(SUM(y.yield_count), 0), 2) AS avg_yield
+        FROM crop_requirements cr
+        JOIN crops c ON cr.crop_id = c.crop_id
+        LEFT JOIN (SELECT crop_id, SUM(sum_yield) AS sum_yield, SUM(yield_count) AS yield_count
+                   FROM crop_district_rollup GROUP BY crop_id) y ON y.crop_id = c.crop_id
+        GROUP BY c.crop_name, cr.N, cr.P, cr.K
+        ORDER BY avg_yield DESC;
+
+/* 21. Crop yield with weather [yield_with_weather] */
+SELECT c.crop_name, d.district_name, cd.avg_yield,
+               ROUND(w.max_temp, 2) AS maxT, ROUND(w.min_temp, 2) AS minT,
+               ROUND(w.precip_sum / NULLIF(w.precip_count, 0), 2) AS precipitation
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        JOIN district_weather_profile w ON d.district_id = w.district_id
+        ORDER BY cd.avg_yield DESC
+        LIMIT :limit;
 
-/* 23. Show crop requirements vs average yield (join) */
-SELECT c.crop_name, cr.N, cr.P, cr.K, ROUND(AVG(p.yield),2) AS avg_yield
-FROM crop_requirements cr
-JOIN crops c ON cr.crop_id = c.crop_id
-LEFT JOIN crop_production_statistic p ON p.crop_id = c.crop_id
-GROUP BY c.crop_name, cr.N, cr.P, cr.K;
+/* 22. Weather Impact on Yield [weather_impact_on_yield] */
+SELECT
+        c.crop_name,
+        CASE
+            WHEN w.precipitation < :low_mm THEN 'Low Rainfall'
+            WHEN w.precipitation <= :high_mm THEN 'Medium Rainfall'
+            ELSE 'High Rainfall'
+        END as rainfall_category,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        SUM(r.record_count) as samples
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        JOIN (SELECT district_id, precip_sum / precip_count AS precipitation
+              FROM district_weather_profile WHERE precip_count > 0) w
+          ON r.district_id = w.district_id
+        GROUP BY c.crop_name, rainfall_category
+        ORDER BY c.crop_name, rainfall_category;
+
+/* 23. Crop Rainfall Requirements [crop_rainfall] */
+SELECT c.crop_name,
+        ROUND(SUM(w.precip_sum) / SUM(w.precip_count), 2) as avg_precipitation,
+        ROUND(MIN(w.precip_min), 2) as min_precipitation,
+        ROUND(MAX(w.precip_max), 2) as max_precipitation,
+        SUM(w.precip_count) as data_points
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        JOIN district_weather_profile w ON r.district_id = w.district_id
+        WHERE w.precip_count > 0
+        GROUP BY c.crop_name
+        ORDER BY avg_precipitation DESC;
+
+/* 24. Production with weather and sustainability for a year [production_context] */
+SELECT p.year, d.state_name, d.district_name, c.crop_name, p.production,
+               (SELECT ROUND(AVG(w.precipitation), 2) FROM farm_weather w
+                WHERE w.district_id = p.district_id AND w.date LIKE :month || '-%') AS precipitation,
+               s.sustainability_score
+        FROM crop_production_statistic p
+        LEFT JOIN sustainability_data s ON p.crop_id = s.crop_id AND p.district_id = s.district_id AND s.year = p.year
+        JOIN districts d ON p.district_id = d.district_id
+        JOIN crops c ON p.crop_id = c.crop_id
+        WHERE p.year = :year
+        ORDER BY p.production DESC
+        LIMIT :limit;
+
+/* 25. Rainfall vs yield by district and year [rainfall_vs_yield_by_year] */
+SELECT d.district_name, s.year, ROUND(AVG(s.rainfall_mm), 2) AS rainfall_mm, ROUND(AVG(s.crop_yield),2) AS avg_yield
+        FROM sustainability_data s
+        JOIN districts d ON s.district_id = d.district_id
+        GROUP BY d.district_name, s.year
+        ORDER BY s.year DESC, d.district_name;
 
-/* 24. Delete example: remove a sustainability record (demo) */
-DELETE FROM sustainability_data WHERE record_id = 3;
+/* 26. Sustainability score per district [sustainability_per_district] */
+SELECT d.district_name, ROUND(AVG(s.sustainability_score), 2) AS avg_sustainability
+        FROM sustainability_data s
+        JOIN districts d ON s.district_id = d.district_id
+        GROUP BY d.district_name
+        ORDER BY avg_sustainability DESC;
 
-/* 25. Final SELECT: quick dashboard numbers */
+/* 27. Sustainability Score Analysis [sustainability_analysis] */
 SELECT
-  (SELECT COUNT(*) FROM districts) AS num_districts,
-  (SELECT COUNT(*) FROM crops) AS num_crops,
-  (SELECT COUNT(*) FROM crop_production_statistic WHERE year = 2023) AS production_records_2023,
-  (SELECT ROUND(AVG(percent),2) FROM (
-     SELECT 100.0 * SUM(production) / NULLIF((SELECT SUM(production) FROM crop_production_statistic WHERE year = 2023),0) as percent
-     FROM crop_production_statistic WHERE year = 2023
-  )) AS dummy_percent;
+        c.crop_name,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        pc.pesticide_count,
+        CASE
+            WHEN pc.pesticide_count <= 2 THEN 'High'
+            WHEN pc.pesticide_count <= 5 THEN 'Medium'
+            ELSE 'Low'
+        END as sustainability_score
+        FROM crops c
+        JOIN crop_district_rollup r ON c.crop_id = r.crop_id
+        JOIN (SELECT c2.crop_name, COUNT(DISTINCT cp.pesticide_id) AS pesticide_count
+              FROM crops c2 LEFT JOIN crop_pesticide cp ON cp.crop_id = c2.crop_id
+              GROUP BY c2.crop_name) pc ON pc.crop_name = c.crop_name
+        GROUP BY c.crop_name
+        HAVING avg_yield IS NOT NULL
+        ORDER BY pc.pesticide_count ASC, avg_yield DESC;
+
+/* 28. Avg yield & sustainability [yield_and_sustainability] */
+SELECT c.crop_name, d.district_name,
+               ROUND(AVG(cd.avg_yield),2) AS avg_yield,
+               ROUND(AVG(s.sustainability_score),2) AS avg_sustainability
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        LEFT JOIN sustainability_data s ON cd.crop_id = s.crop_id AND cd.district_id = s.district_id
+        GROUP BY c.crop_name, d.district_name
+        ORDER BY avg_yield DESC, avg_sustainability DESC;
+
+/* 29. Sustainability with pesticide [sustainability_with_pesticide] */
+SELECT s.record_id, c.crop_name, d.district_name, s.sustainability_score, p.compound, p.high_estimate
+        FROM sustainability_data s
+        JOIN crops c ON s.crop_id = c.crop_id
+        JOIN districts d ON s.district_id = d.district_id
+        LEFT JOIN pesticide_use p ON d.district_id = p.district_id
+        ORDER BY s.sustainability_score DESC
+        LIMIT :limit;
+
+/* 30. Pesticides for a crop [pesticides_for_crop] */
+SELECT c.crop_name, pu.compound, pu.low_estimate, pu.high_estimate
+        FROM crop_pesticide cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
+        WHERE c.crop_id IN (SELECT ref_id FROM search_index
+                            WHERE search_index MATCH 'label:"' || replace(:crop, '"', '""') || '"*' AND kind = 'crop');
+
+/* 31. Crop Pesticide Usage [pesticide_usage_by_crop] */
+SELECT c.crop_name,
+        SUM(e.pesticides) as pesticide_types,
+        ROUND(SUM(e.low_sum) / NULLIF(SUM(e.low_count), 0), 2) as avg_low_estimate,
+        ROUND(SUM(e.high_sum) / NULLIF(SUM(e.high_count), 0), 2) as avg_high_estimate,
+        COUNT(DISTINCT e.compound_id) as compounds
+        FROM crops c
+        JOIN exposure_crop e ON c.crop_id = e.crop_id
+        WHERE e.compound_id <> 0
+        GROUP BY c.crop_name
+        ORDER BY pesticide_types DESC;
+
+/* 32. Pesticide per crop & district [pesticide_per_crop_district] */
+SELECT c.crop_name, d.district_name, p.compound, p.low_estimate, p.high_estimate
+        FROM crop_pesticide cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN pesticide_use p ON cp.pesticide_id = p.pesticide_id
+        JOIN districts d ON p.district_id = d.district_id
+        ORDER BY c.crop_name, d.district_name;
+
+/* 33. Market prices [market_prices] */
+SELECT m.market_name, c.crop_name, cap.modal_price_rs_per_quintal, cap.arrival_tonnes
+        FROM crop_arrival_price cap
+        JOIN markets m ON cap.market_id = m.market_id
+        JOIN crops c ON cap.crop_id = c.crop_id
+        LIMIT :limit;
+
+/* 34. Crop price with market [market_prices_for_crop] */
+SELECT c.crop_name, d.district_name, m.market_name, cap.arrival_date, cap.modal_price_rs_per_quintal
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        WHERE c.crop_name = :crop
+        ORDER BY cap.arrival_date ASC;
+
+/* 35. Arrivals with pesticides [arrivals_with_pesticides] */
+SELECT c.crop_name, d.district_name, m.market_name, cap.arrival_date,
+               cap.modal_price_rs_per_quintal, p.compound
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        LEFT JOIN crop_pesticide cp ON c.crop_id = cp.crop_id
+        LEFT JOIN pesticide_use p ON cp.pesticide_id = p.pesticide_id
+        WHERE c.crop_name = :crop
+        ORDER BY cap.arrival_date ASC;
+
+/* 36. Crops with markets and districts [crops_markets_districts] */
+SELECT c.crop_name, d.district_name, m.market_name
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        GROUP BY c.crop_name, d.district_name, m.market_name
+        ORDER BY c.crop_name;
+
+/* 37. Average modal price by crop [avg_price_by_crop] */
+SELECT c.crop_name, ROUND(SUM(pd.modal_sum) / SUM(pd.modal_count), 2) as avg_modal_price
+        FROM price_daily pd
+        JOIN crops c ON pd.crop_id = c.crop_id
+        WHERE pd.modal_count > 0
+        GROUP BY c.crop_name
+        ORDER BY avg_modal_price DESC;
+
+/* 38. Total arrival tonnes per market [market_supply] */
+SELECT m.market_name, ROUND(SUM(pd.arrival_tonnes), 2) AS total_tonnes
+        FROM price_daily pd
+        JOIN markets m ON pd.market_id = m.market_id
+        GROUP BY m.market_name
+        ORDER BY total_tonnes DESC;
+
+/* 39. Market Price Trends [market_price_trends] */
+SELECT
+        c.crop_name,
+        m.market_name,
+        ROUND(SUM(pd.modal_sum) / SUM(pd.modal_count), 2) as avg_price,
+        ROUND(MIN(pd.modal_min), 2) as min_price,
+        ROUND(MAX(pd.modal_max), 2) as max_price,
+        ROUND(SUM(pd.arrival_tonnes), 2) as total_arrival
+        FROM price_daily pd
+        JOIN crops c ON pd.crop_id = c.crop_id
+        JOIN markets m ON pd.market_id = m.market_id
+        WHERE pd.modal_count > 0
+        GROUP BY c.crop_name, m.market_name
+        ORDER BY avg_price DESC;
+
+/* 40. Quick dashboard numbers for a year [dashboard_numbers] */
+SELECT
+        (SELECT COUNT(*) FROM districts) AS num_districts,
+        (SELECT COUNT(*) FROM crops) AS num_crops,
+        (SELECT COUNT(*) FROM crop_production_statistic WHERE year = :year) AS production_records,
+        (SELECT ROUND(SUM(production), 2) FROM crop_production_statistic WHERE year = :year) AS total_production;
+
+/* 41. Insert district [insert_district] */
+INSERT INTO districts (state_name, district_name) VALUES (:state_name, :district_name);
+
+/* 42. Insert crop [insert_crop] */
+INSERT INTO crops (crop_name, crop_group) VALUES (:crop_name, :crop_group);
+
+/* 43. Update a production value [update_production] */
+UPDATE crop_production_statistic
+        SET production = :production, yield = ROUND(:production / NULLIF(area, 0), 3), year = :year
+        WHERE stat_id = :stat_id;
+
+/* 44. Update crop yield [update_crop_yield] */
+UPDATE crop_district SET avg_yield = :avg_yield WHERE crop_id = :crop_id AND district_id = :district_id;
+
+/* 45. Update pesticide high estimate [update_pesticide_high_estimate] */
+UPDATE pesticide_use SET high_estimate = :high_estimate WHERE pesticide_id = :pesticide_id;
 
+/* 46. Delete an arrival price record [delete_arrival] */
+DELETE FROM crop_arrival_price WHERE arrival_id = :arrival_id;
 
+/* 47. Delete a sustainability record [delete_sustainability_record] */
+DELETE FROM sustainability_data WHERE record_id = :record_id;
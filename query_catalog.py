@@ -0,0 +1,658 @@
+# query_catalog.py
+# The one list of named analyses shared by the Tk GUIs, gui.html and
+# queries.sql. Values that used to be pasted into the SQL ('Rice',
+# district_id = 1, year = 2023) are named :parameters, so every variant of a
+# query is the same statement text and sqlite3's per-connection statement
+# cache prepares it once.
+#
+#   python query_catalog.py --check          expected indexes vs. query plans
+#   python query_catalog.py --bench          time every read against its budget
+#   python query_catalog.py --export-sql queries.sql --export-html gui.html
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from resultset import ResultSet
+import profiles
+
+DB_FILE = "agriculture.db"
+
+class Query(NamedTuple):
+    title: str
+    sql: str
+    params: Tuple[Tuple[str, object], ...] = ()   # (name, default); the default's type is the param's type
+    indexes: Tuple[str, ...] = ()                  # index names the plan should use; "PRIMARY KEY" = any rowid/PK lookup
+    budget_ms: float = 50.0                        # --bench flags a best-of-N run slower than this
+    writes: bool = False
+
+CATALOG: Dict[str, Query] = {
+    # ---- lookups ----
+    "crops": Query(
+        "Show all crops",
+        "SELECT crop_id, crop_name, crop_group FROM crops ORDER BY crop_id"),
+    "districts": Query(
+        "List districts",
+        "SELECT district_id, state_name, district_name FROM districts ORDER BY state_name, district_name"),
+    "markets_with_districts": Query(
+        "Markets with district info",
+        """SELECT m.market_name, d.district_name, d.state_name
+        FROM markets m
+        JOIN districts d ON m.district_id = d.district_id
+        ORDER BY d.state_name, d.district_name, m.market_name""",
+        indexes=("PRIMARY KEY",)),
+    "crops_in_district": Query(
+        "Crops grown in a district",
+        """SELECT DISTINCT c.crop_name
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.district_id = :district_id
+        ORDER BY c.crop_name""",
+        params=(("district_id", 1),)),
+
+    # ---- production ----
+    "production_overview": Query(
+        "Production overview",
+        """SELECT p.stat_id, p.year, d.state_name, d.district_name, c.crop_name, p.season, p.area, p.production, p.yield
+        FROM crop_production_statistic p
+        LEFT JOIN districts d ON p.district_id = d.district_id
+        LEFT JOIN crops c ON p.crop_id = c.crop_id
+        LIMIT :limit""",
+        params=(("limit", 100),)),
+    "production_for_year": Query(
+        "Production for a year",
+        """SELECT p.year, d.state_name, d.district_name, c.crop_name, p.season, p.area, p.production, p.yield
+        FROM crop_production_statistic p
+        JOIN districts d ON p.district_id = d.district_id
+        JOIN crops c ON p.crop_id = c.crop_id
+        WHERE p.year = :year
+        ORDER BY p.production DESC
+        LIMIT :limit""",
+        params=(("year", 2023), ("limit", 500))),
+    "production_for_crop_by_season": Query(
+        "Production stats by season for a crop",
+        """SELECT c.crop_name, d.district_name, p.season, p.area, p.production, p.yield
+        FROM crop_production_statistic p
+        JOIN crops c ON p.crop_id = c.crop_id
+        JOIN districts d ON p.district_id = d.district_id
+        WHERE p.crop_id IN (SELECT crop_id FROM crops WHERE crop_name = :crop)
+        ORDER BY p.season, p.production DESC""",
+        params=(("crop", "Rice"),),
+        indexes=("idx_production_crop",)),
+    "state_production": Query(
+        "Total production per state",
+        """SELECT geo_key AS state_name, production AS total_production
+        FROM cube_cells
+        WHERE geo_level = 'state' AND crop_level = 'all' AND season = '*'
+        ORDER BY total_production DESC""",
+        indexes=("PRIMARY KEY",)),
+    "state_production_for_year": Query(
+        "Total production per state in a year",
+        """SELECT state_name, ROUND(state_production, 2) AS total_production
+        FROM yearly_state_production
+        WHERE year = :year
+        ORDER BY total_production DESC""",
+        params=(("year", 2023),),
+        indexes=("PRIMARY KEY",)),
+    "state_production_yoy": Query(
+        "Year-over-year production by state",
+        """SELECT
+        year,
+        state_name,
+        ROUND(state_production, 2) as production,
+        ROUND(state_production - LAG(state_production) OVER (PARTITION BY state_name ORDER BY year), 2) as change
+        FROM yearly_state_production
+        ORDER BY state_name, year"""),
+    "states_above_production": Query(
+        "States with a district-crop above a production level in a year",
+        """SELECT DISTINCT d.state_name
+        FROM crop_production_statistic p
+        JOIN districts d ON p.district_id = d.district_id
+        WHERE p.year = :year AND p.production > :min_production""",
+        params=(("year", 2022), ("min_production", 3000.0))),
+    "total_production_per_district": Query(
+        "Total production per district",
+        """SELECT d.district_name, ROUND(SUM(r.sum_production), 2) AS total_production
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        GROUP BY d.district_name
+        ORDER BY total_production DESC"""),
+    "top_crop_per_district": Query(
+        "Top crop per district in a year",
+        """SELECT district_name, crop_name, production
+        FROM (
+          SELECT d.district_name, c.crop_name, p.production,
+                 rank() OVER (PARTITION BY p.district_id ORDER BY p.production DESC) AS rk
+          FROM crop_production_statistic p
+          JOIN districts d ON p.district_id = d.district_id
+          JOIN crops c ON p.crop_id = c.crop_id
+          WHERE p.year = :year
+        )
+        WHERE rk = 1
+        ORDER BY production DESC""",
+        params=(("year", 2023),),
+        indexes=("idx_crop_production_statistic_year",)),
+    "top_crops_by_state": Query(
+        "Top Performing Crops by State",
+        """SELECT
+        d.state_name,
+        c.crop_name,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        ROUND(SUM(r.sum_production), 2) as total_production,
+        ROUND(SUM(r.sum_area), 2) as total_area
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.yield_count > 0
+        GROUP BY d.state_name, c.crop_name
+        ORDER BY d.state_name, avg_yield DESC"""),
+    "season_production": Query(
+        "Season-wise Production",
+        """SELECT
+        r.season,
+        c.crop_name,
+        SUM(r.record_count) as records,
+        ROUND(SUM(r.sum_area) / SUM(r.record_count), 2) as avg_area,
+        ROUND(SUM(r.sum_production) / SUM(r.record_count), 2) as avg_production,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        WHERE r.season <> ''
+        GROUP BY r.season, c.crop_name
+        ORDER BY r.season, avg_production DESC"""),
+    "crop_efficiency": Query(
+        "Crop Efficiency Analysis",
+        """SELECT
+        c.crop_name,
+        ROUND(AVG(p.production / NULLIF(p.area, 0)), 2) as production_per_area,
+        ROUND(AVG(p.yield), 2) as avg_yield,
+        pc.pesticide_count as pesticide_usage,
+        ROUND(AVG(w.precip_sum / NULLIF(w.precip_count, 0)), 2) as avg_rainfall_req,
+        CASE
+            WHEN AVG(p.yield) > 2000 AND pc.pesticide_count < 3 THEN 'Excellent'
+            WHEN AVG(p.yield) > 1000 AND pc.pesticide_count < 5 THEN 'Good'
+            WHEN AVG(p.yield) > 500 THEN 'Average'
+            ELSE 'Poor'
+        END as efficiency_rating
+        FROM crops c
+        JOIN crop_production_statistic p ON c.crop_id = p.crop_id
+        JOIN (SELECT c2.crop_name, COUNT(DISTINCT cp.pesticide_id) AS pesticide_count
+              FROM crops c2 LEFT JOIN crop_pesticide cp ON cp.crop_id = c2.crop_id
+              GROUP BY c2.crop_name) pc ON pc.crop_name = c.crop_name
+        LEFT JOIN district_weather_profile w ON w.district_id = p.district_id
+        WHERE p.production IS NOT NULL AND p.area > 0
+        GROUP BY c.crop_name
+        ORDER BY production_per_area DESC""",
+        indexes=("idx_crop_pesticide_key",)),
+
+    # ---- yield ----
+    "avg_yield_by_crop": Query(
+        "Average yield by crop",
+        """SELECT c.crop_name, ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0),2) AS avg_yield
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        GROUP BY c.crop_name
+        ORDER BY avg_yield DESC"""),
+    "high_yield_crops": Query(
+        "High yield crops",
+        """SELECT c.crop_name, d.district_name, cd.avg_yield
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        WHERE cd.avg_yield > :min_yield
+        ORDER BY cd.avg_yield DESC""",
+        params=(("min_yield", 2000.0),)),
+    "districts_above_yield": Query(
+        "Districts with average yield above a level",
+        """SELECT d.district_name, ROUND(SUM(r.sum_yield) / SUM(r.yield_count), 3) AS avg_yield
+        FROM crop_district_rollup r
+        JOIN districts d ON r.district_id = d.district_id
+        GROUP BY d.district_id
+        HAVING SUM(r.yield_count) > 0 AND SUM(r.sum_yield) / SUM(r.yield_count) > :min_yield
+        ORDER BY avg_yield DESC""",
+        params=(("min_yield", 3.0),)),
+    "requirements_vs_yield": Query(
+        "Crop requirements vs average yield",
+        """SELECT c.crop_name, cr.N, cr.P, cr.K,
+               ROUND(SUM(y.sum_yield) / NULLIF(SUM(y.yield_count), 0), 2) AS avg_yield
+        FROM crop_requirements cr
+        JOIN crops c ON cr.crop_id = c.crop_id
+        LEFT JOIN (SELECT crop_id, SUM(sum_yield) AS sum_yield, SUM(yield_count) AS yield_count
+                   FROM crop_district_rollup GROUP BY crop_id) y ON y.crop_id = c.crop_id
+        GROUP BY c.crop_name, cr.N, cr.P, cr.K
+        ORDER BY avg_yield DESC"""),
+    "yield_with_weather": Query(
+        "Crop yield with weather",
+        """SELECT c.crop_name, d.district_name, cd.avg_yield,
+               ROUND(w.max_temp, 2) AS maxT, ROUND(w.min_temp, 2) AS minT,
+               ROUND(w.precip_sum / NULLIF(w.precip_count, 0), 2) AS precipitation
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        JOIN district_weather_profile w ON d.district_id = w.district_id
+        ORDER BY cd.avg_yield DESC
+        LIMIT :limit""",
+        params=(("limit", 500),),
+        indexes=("PRIMARY KEY",)),
+    "weather_impact_on_yield": Query(
+        "Weather Impact on Yield",
+        """SELECT
+        c.crop_name,
+        CASE
+            WHEN w.precipitation < :low_mm THEN 'Low Rainfall'
+            WHEN w.precipitation <= :high_mm THEN 'Medium Rainfall'
+            ELSE 'High Rainfall'
+        END as rainfall_category,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        SUM(r.record_count) as samples
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        JOIN (SELECT district_id, precip_sum / precip_count AS precipitation
+              FROM district_weather_profile WHERE precip_count > 0) w
+          ON r.district_id = w.district_id
+        GROUP BY c.crop_name, rainfall_category
+        ORDER BY c.crop_name, rainfall_category""",
+        params=(("low_mm", 5.0), ("high_mm", 20.0))),
+    "crop_rainfall": Query(
+        "Crop Rainfall Requirements",
+        """SELECT c.crop_name,
+        ROUND(SUM(w.precip_sum) / SUM(w.precip_count), 2) as avg_precipitation,
+        ROUND(MIN(w.precip_min), 2) as min_precipitation,
+        ROUND(MAX(w.precip_max), 2) as max_precipitation,
+        SUM(w.precip_count) as data_points
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        JOIN district_weather_profile w ON r.district_id = w.district_id
+        WHERE w.precip_count > 0
+        GROUP BY c.crop_name
+        ORDER BY avg_precipitation DESC""",
+        indexes=("PRIMARY KEY",)),
+    "production_context": Query(
+        "Production with weather and sustainability for a year",
+        """SELECT p.year, d.state_name, d.district_name, c.crop_name, p.production,
+               (SELECT ROUND(AVG(w.precipitation), 2) FROM farm_weather w
+                WHERE w.district_id = p.district_id AND w.date LIKE :month || '-%') AS precipitation,
+               s.sustainability_score
+        FROM crop_production_statistic p
+        LEFT JOIN sustainability_data s ON p.crop_id = s.crop_id AND p.district_id = s.district_id AND s.year = p.year
+        JOIN districts d ON p.district_id = d.district_id
+        JOIN crops c ON p.crop_id = c.crop_id
+        WHERE p.year = :year
+        ORDER BY p.production DESC
+        LIMIT :limit""",
+        params=(("year", 2023), ("month", "2023-07"), ("limit", 10))),
+
+    # ---- sustainability ----
+    "rainfall_vs_yield_by_year": Query(
+        "Rainfall vs yield by district and year",
+        """SELECT d.district_name, s.year, ROUND(AVG(s.rainfall_mm), 2) AS rainfall_mm, ROUND(AVG(s.crop_yield),2) AS avg_yield
+        FROM sustainability_data s
+        JOIN districts d ON s.district_id = d.district_id
+        GROUP BY d.district_name, s.year
+        ORDER BY s.year DESC, d.district_name"""),
+    "sustainability_per_district": Query(
+        "Sustainability score per district",
+        """SELECT d.district_name, ROUND(AVG(s.sustainability_score), 2) AS avg_sustainability
+        FROM sustainability_data s
+        JOIN districts d ON s.district_id = d.district_id
+        GROUP BY d.district_name
+        ORDER BY avg_sustainability DESC"""),
+    "sustainability_analysis": Query(
+        "Sustainability Score Analysis",
+        """SELECT
+        c.crop_name,
+        ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0), 2) as avg_yield,
+        pc.pesticide_count,
+        CASE
+            WHEN pc.pesticide_count <= 2 THEN 'High'
+            WHEN pc.pesticide_count <= 5 THEN 'Medium'
+            ELSE 'Low'
+        END as sustainability_score
+        FROM crops c
+        JOIN crop_district_rollup r ON c.crop_id = r.crop_id
+        JOIN (SELECT c2.crop_name, COUNT(DISTINCT cp.pesticide_id) AS pesticide_count
+              FROM crops c2 LEFT JOIN crop_pesticide cp ON cp.crop_id = c2.crop_id
+              GROUP BY c2.crop_name) pc ON pc.crop_name = c.crop_name
+        GROUP BY c.crop_name
+        HAVING avg_yield IS NOT NULL
+        ORDER BY pc.pesticide_count ASC, avg_yield DESC""",
+        indexes=("idx_crop_pesticide_key",)),
+    "yield_and_sustainability": Query(
+        "Avg yield & sustainability",
+        """SELECT c.crop_name, d.district_name,
+               ROUND(AVG(cd.avg_yield),2) AS avg_yield,
+               ROUND(AVG(s.sustainability_score),2) AS avg_sustainability
+        FROM crop_district cd
+        JOIN crops c ON cd.crop_id = c.crop_id
+        JOIN districts d ON cd.district_id = d.district_id
+        LEFT JOIN sustainability_data s ON cd.crop_id = s.crop_id AND cd.district_id = s.district_id
+        GROUP BY c.crop_name, d.district_name
+        ORDER BY avg_yield DESC, avg_sustainability DESC"""),
+    "sustainability_with_pesticide": Query(
+        "Sustainability with pesticide",
+        """SELECT s.record_id, c.crop_name, d.district_name, s.sustainability_score, p.compound, p.high_estimate
+        FROM sustainability_data s
+        JOIN crops c ON s.crop_id = c.crop_id
+        JOIN districts d ON s.district_id = d.district_id
+        LEFT JOIN pesticide_use p ON d.district_id = p.district_id
+        ORDER BY s.sustainability_score DESC
+        LIMIT :limit""",
+        params=(("limit", 500),),
+        indexes=("idx_pesticide_use_district",)),
+
+    # ---- pesticides ----
+    "pesticides_for_crop": Query(
+        "Pesticides for a crop",
+        """SELECT c.crop_name, pu.compound, pu.low_estimate, pu.high_estimate
+        FROM crop_pesticide cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
+        WHERE c.crop_id IN (SELECT ref_id FROM search_index
+                            WHERE search_index MATCH 'label:"' || replace(:crop, '"', '""') || '"*' AND kind = 'crop')""",
+        params=(("crop", "Rice"),),
+        indexes=("idx_crop_pesticide_key",)),
+    "pesticide_usage_by_crop": Query(
+        "Crop Pesticide Usage",
+        """SELECT c.crop_name,
+        SUM(e.pesticides) as pesticide_types,
+        ROUND(SUM(e.low_sum) / NULLIF(SUM(e.low_count), 0), 2) as avg_low_estimate,
+        ROUND(SUM(e.high_sum) / NULLIF(SUM(e.high_count), 0), 2) as avg_high_estimate,
+        COUNT(DISTINCT e.compound_id) as compounds
+        FROM crops c
+        JOIN exposure_crop e ON c.crop_id = e.crop_id
+        WHERE e.compound_id <> 0
+        GROUP BY c.crop_name
+        ORDER BY pesticide_types DESC""",
+        indexes=("PRIMARY KEY",)),
+    "pesticide_per_crop_district": Query(
+        "Pesticide per crop & district",
+        """SELECT c.crop_name, d.district_name, p.compound, p.low_estimate, p.high_estimate
+        FROM crop_pesticide cp
+        JOIN crops c ON cp.crop_id = c.crop_id
+        JOIN pesticide_use p ON cp.pesticide_id = p.pesticide_id
+        JOIN districts d ON p.district_id = d.district_id
+        ORDER BY c.crop_name, d.district_name"""),
+
+    # ---- markets ----
+    "market_prices": Query(
+        "Market prices",
+        """SELECT m.market_name, c.crop_name, cap.modal_price_rs_per_quintal, cap.arrival_tonnes
+        FROM crop_arrival_price cap
+        JOIN markets m ON cap.market_id = m.market_id
+        JOIN crops c ON cap.crop_id = c.crop_id
+        LIMIT :limit""",
+        params=(("limit", 100),)),
+    "market_prices_for_crop": Query(
+        "Crop price with market",
+        """SELECT c.crop_name, d.district_name, m.market_name, cap.arrival_date, cap.modal_price_rs_per_quintal
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        WHERE c.crop_name = :crop
+        ORDER BY cap.arrival_date ASC""",
+        params=(("crop", "Rice"),),
+        indexes=("idx_arrival_crop",)),
+    "arrivals_with_pesticides": Query(
+        "Arrivals with pesticides",
+        """SELECT c.crop_name, d.district_name, m.market_name, cap.arrival_date,
+               cap.modal_price_rs_per_quintal, p.compound
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        LEFT JOIN crop_pesticide cp ON c.crop_id = cp.crop_id
+        LEFT JOIN pesticide_use p ON cp.pesticide_id = p.pesticide_id
+        WHERE c.crop_name = :crop
+        ORDER BY cap.arrival_date ASC""",
+        params=(("crop", "Rice"),),
+        indexes=("idx_arrival_crop", "idx_crop_pesticide_key")),
+    "crops_markets_districts": Query(
+        "Crops with markets and districts",
+        """SELECT c.crop_name, d.district_name, m.market_name
+        FROM crop_arrival_price cap
+        JOIN crops c ON cap.crop_id = c.crop_id
+        JOIN districts d ON cap.district_id = d.district_id
+        JOIN markets m ON cap.market_id = m.market_id
+        GROUP BY c.crop_name, d.district_name, m.market_name
+        ORDER BY c.crop_name"""),
+    "avg_price_by_crop": Query(
+        "Average modal price by crop",
+        """SELECT c.crop_name, ROUND(SUM(pd.modal_sum) / SUM(pd.modal_count), 2) as avg_modal_price
+        FROM price_daily pd
+        JOIN crops c ON pd.crop_id = c.crop_id
+        WHERE pd.modal_count > 0
+        GROUP BY c.crop_name
+        ORDER BY avg_modal_price DESC"""),
+    "market_supply": Query(
+        "Total arrival tonnes per market",
+        """SELECT m.market_name, ROUND(SUM(pd.arrival_tonnes), 2) AS total_tonnes
+        FROM price_daily pd
+        JOIN markets m ON pd.market_id = m.market_id
+        GROUP BY m.market_name
+        ORDER BY total_tonnes DESC"""),
+    "market_price_trends": Query(
+        "Market Price Trends",
+        """SELECT
+        c.crop_name,
+        m.market_name,
+        ROUND(SUM(pd.modal_sum) / SUM(pd.modal_count), 2) as avg_price,
+        ROUND(MIN(pd.modal_min), 2) as min_price,
+        ROUND(MAX(pd.modal_max), 2) as max_price,
+        ROUND(SUM(pd.arrival_tonnes), 2) as total_arrival
+        FROM price_daily pd
+        JOIN crops c ON pd.crop_id = c.crop_id
+        JOIN markets m ON pd.market_id = m.market_id
+        WHERE pd.modal_count > 0
+        GROUP BY c.crop_name, m.market_name
+        ORDER BY avg_price DESC"""),
+
+    # ---- summary ----
+    "dashboard_numbers": Query(
+        "Quick dashboard numbers for a year",
+        """SELECT
+        (SELECT COUNT(*) FROM districts) AS num_districts,
+        (SELECT COUNT(*) FROM crops) AS num_crops,
+        (SELECT COUNT(*) FROM crop_production_statistic WHERE year = :year) AS production_records,
+        (SELECT ROUND(SUM(production), 2) FROM crop_production_statistic WHERE year = :year) AS total_production""",
+        params=(("year", 2023),),
+        indexes=("idx_crop_production_statistic_year",)),
+
+    # ---- changes (gui.html / queries.sql) ----
+    "insert_district": Query(
+        "Insert district",
+        "INSERT INTO districts (state_name, district_name) VALUES (:state_name, :district_name)",
+        params=(("state_name", "Karnataka"), ("district_name", "Bengaluru Urban")),
+        writes=True),
+    "insert_crop": Query(
+        "Insert crop",
+        "INSERT INTO crops (crop_name, crop_group) VALUES (:crop_name, :crop_group)",
+        params=(("crop_name", "Cotton"), ("crop_group", "Cash Crops")),
+        writes=True),
+    "update_production": Query(
+        "Update a production value",
+        """UPDATE crop_production_statistic
+        SET production = :production, yield = ROUND(:production / NULLIF(area, 0), 3), year = :year
+        WHERE stat_id = :stat_id""",
+        params=(("stat_id", 6), ("production", 3900.0), ("year", 2023)),
+        indexes=("PRIMARY KEY",),
+        writes=True),
+    "update_crop_yield": Query(
+        "Update crop yield",
+        "UPDATE crop_district SET avg_yield = :avg_yield WHERE crop_id = :crop_id AND district_id = :district_id",
+        params=(("crop_id", 1), ("district_id", 1), ("avg_yield", 3000.0)),
+        indexes=("idx_crop_district_key",),
+        writes=True),
+    "update_pesticide_high_estimate": Query(
+        "Update pesticide high estimate",
+        "UPDATE pesticide_use SET high_estimate = :high_estimate WHERE pesticide_id = :pesticide_id",
+        params=(("pesticide_id", 1), ("high_estimate", 500.0)),
+        indexes=("PRIMARY KEY",),
+        writes=True),
+    "delete_arrival": Query(
+        "Delete an arrival price record",
+        "DELETE FROM crop_arrival_price WHERE arrival_id = :arrival_id",
+        params=(("arrival_id", 3),),
+        indexes=("PRIMARY KEY",),
+        writes=True),
+    "delete_sustainability_record": Query(
+        "Delete a sustainability record",
+        "DELETE FROM sustainability_data WHERE record_id = :record_id",
+        params=(("record_id", 3),),
+        indexes=("PRIMARY KEY",),
+        writes=True),
+}
+
+# Indexes the catalog's plans rely on, beyond the ones the importer's
+# derived tables already carry.
+CATALOG_INDEXES = {
+    "idx_production_crop": "crop_production_statistic (crop_id)",
+    "idx_arrival_crop": "crop_arrival_price (crop_id, arrival_date)",
+    "idx_pesticide_use_district": "pesticide_use (district_id)",
+    "idx_farm_weather_district": "farm_weather (district_id, precipitation)",
+    "idx_markets_district": "markets (district_id)",
+}
+
+def create_catalog_indexes(conn):
+    for name, target in CATALOG_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+def connect(db_path: str = DB_FILE) -> sqlite3.Connection:
+    # Room for every catalog statement plus the callers' own ad-hoc SQL
+    return profiles.connect(db_path, profiles.INTERACTIVE, cached_statements=len(CATALOG) + 64)
+
+def read_queries() -> List[str]:
+    return [name for name, q in CATALOG.items() if not q.writes]
+
+def bind(name: str, values: Optional[dict] = None) -> dict:
+    """Catalog defaults overlaid with values, each coerced to its default's type."""
+    out = {}
+    values = values or {}
+    for param, default in CATALOG[name].params:
+        value = values.get(param, default)
+        if isinstance(value, str) and not isinstance(default, str):
+            value = type(default)(value.strip())
+        out[param] = value
+    return out
+
+def run(conn, name: str, values: Optional[dict] = None) -> Tuple[List[str], ResultSet]:
+    q = CATALOG[name]
+    rows = ResultSet.from_cursor(conn.execute(q.sql, bind(name, values)))
+    if q.writes:
+        conn.commit()
+    return rows.columns, rows
+
+def plan(conn, name: str, values: Optional[dict] = None) -> List[str]:
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + CATALOG[name].sql, bind(name, values))]
+
+def check_indexes(conn) -> List[Tuple[str, List[str]]]:
+    """(query, expected indexes missing from its plan) for every query that misses one."""
+    problems = []
+    for name, q in CATALOG.items():
+        details = plan(conn, name)
+        missing = [idx for idx in q.indexes if not any(idx in d for d in details)]
+        if missing:
+            problems.append((name, missing))
+    return problems
+
+def benchmark(db_path: str = DB_FILE, repeat: int = 5) -> List[Tuple[str, float, int, float]]:
+    """(query, best ms, rows, budget ms) per query; writes are rolled back."""
+    conn = connect(db_path)
+    out = []
+    try:
+        for name, q in CATALOG.items():
+            best, rows = None, 0
+            for _ in range(repeat):
+                t = time.perf_counter()
+                cur = conn.execute(q.sql, bind(name))
+                rows = len(cur.fetchall()) if cur.description else cur.rowcount
+                ms = (time.perf_counter() - t) * 1000
+                if q.writes:
+                    conn.rollback()
+                best = ms if best is None else min(best, ms)
+            out.append((name, best, rows, q.budget_ms))
+    finally:
+        conn.close()
+    return out
+
+# -------------------------
+# EXPORTS
+# -------------------------
+
+def _sql_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+def sql_script() -> str:
+    """The catalog as a sqlite3 shell script; parameters are set from the defaults."""
+    lines = ["-- Generated from query_catalog.py (python query_catalog.py --export-sql queries.sql).",
+             "-- Edit the catalog, not this file. Change a .parameter line to run another variant.", ""]
+    seen = {}
+    for q in CATALOG.values():
+        for param, default in q.params:
+            seen.setdefault(param, default)
+    for param, default in seen.items():
+        lines.append(f".parameter set :{param} {_sql_literal(default)}")
+    lines.append("")
+    for i, (name, q) in enumerate(CATALOG.items(), 1):
+        lines.append(f"/* {i}. {q.title} [{name}] */")
+        lines.append(q.sql.strip() + ";")
+        lines.append("")
+    return "\n".join(lines)
+
+HTML_BEGIN = "/* BEGIN QUERY CATALOG */"
+HTML_END = "/* END QUERY CATALOG */"
+
+def html_catalog() -> str:
+    entries = {q.title: {"name": name, "sql": q.sql, "params": [[p, d] for p, d in q.params], "writes": q.writes}
+               for name, q in CATALOG.items()}
+    return "const QUERY_CATALOG = " + json.dumps(entries, indent=2) + ";"
+
+def export_html(path: str):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    pattern = re.compile(re.escape(HTML_BEGIN) + ".*?" + re.escape(HTML_END), re.S)
+    if not pattern.search(text):
+        raise ValueError(f"{path} has no {HTML_BEGIN} ... {HTML_END} block")
+    text = pattern.sub(lambda m: f"{HTML_BEGIN}\n{html_catalog()}\n{HTML_END}", text)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Named, parameterized agriculture queries")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--check", action="store_true", help="report expected indexes missing from query plans")
+    parser.add_argument("--bench", action="store_true", help="time every query against its budget")
+    parser.add_argument("--export-sql", metavar="PATH")
+    parser.add_argument("--export-html", metavar="PATH")
+    args = parser.parse_args(argv)
+
+    status = 0
+    if args.export_sql:
+        with open(args.export_sql, "w", encoding="utf-8") as f:
+            f.write(sql_script())
+        print(f"Wrote {len(CATALOG)} queries to {args.export_sql}")
+    if args.export_html:
+        export_html(args.export_html)
+        print(f"Wrote {len(CATALOG)} queries into {args.export_html}")
+    if args.check:
+        conn = connect(args.db)
+        try:
+            problems = check_indexes(conn)
+        finally:
+            conn.close()
+        for name, missing in problems:
+            print(f"{name}: plan does not use {', '.join(missing)}")
+        print(f"{len(CATALOG) - len(problems)}/{len(CATALOG)} queries use their expected indexes")
+        status = 1 if problems else status
+    if args.bench:
+        for name, ms, rows, budget in benchmark(args.db):
+            flag = "" if ms <= budget else "  OVER BUDGET"
+            print(f"{name:32s} {ms:9.2f} ms {rows:7d} rows  (budget {budget:g} ms){flag}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+# resultset.py
+# Column-oriented query results. Integer and real columns live in typed
+# arrays, text columns are dictionary-encoded (one copy of each distinct
+# string plus an array of codes), and rows are only built as tuples when
+# something asks for one. Slices, filters and sorts are views: they share
+# the column storage and carry only an index of row numbers.
+from array import array
+from itertools import compress
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+FETCH_CHUNK = 2000
+
+class _Column:
+    """One result column; kind is 'q' (int64), 'd' (double), 's' (dictionary text) or 'o' (objects)."""
+    __slots__ = ("kind", "data", "nulls", "values", "lookup", "size")
+
+    def __init__(self):
+        self.kind = None
+        self.data = None
+        self.nulls = None      # bytearray, only once a NULL has been seen
+        self.values = None     # 's': code -> string
+        self.lookup = None     # 's': string -> code, dropped by finish()
+        self.size = 0
+
+    def _start(self, v):
+        pending = self.size
+        if type(v) is int:
+            self.kind, self.data = "q", array("q", bytes(8 * pending))
+        elif type(v) is float:
+            self.kind, self.data = "d", array("d", bytes(8 * pending))
+        elif type(v) is str:
+            self.kind, self.data, self.values, self.lookup = "s", array("l", [0]) * pending, [], {}
+        else:
+            self.kind, self.data = "o", [None] * pending
+
+    def _degrade(self):
+        # Mixed types (SQLite columns are dynamically typed) fall back to objects
+        self.data = [self.get(i) for i in range(self.size)]
+        self.kind, self.values, self.lookup = "o", None, None
+
+    def append(self, v):
+        if v is None:
+            if self.nulls is None:
+                self.nulls = bytearray(self.size)
+            self.nulls.append(1)
+            if self.kind in ("q", "s"):
+                self.data.append(0)
+            elif self.kind == "d":
+                self.data.append(0.0)
+            elif self.kind == "o":
+                self.data.append(None)
+            self.size += 1
+            return
+        if self.kind is None:
+            self._start(v)
+        elif (self.kind == "q" and type(v) is not int) or (self.kind == "d" and type(v) is not float) \
+                or (self.kind == "s" and type(v) is not str):
+            self._degrade()
+        if self.kind == "s":
+            code = self.lookup.get(v)
+            if code is None:
+                code = self.lookup[v] = len(self.values)
+                self.values.append(v)
+            self.data.append(code)
+        elif self.kind == "q":
+            try:
+                self.data.append(v)
+            except OverflowError:
+                self._degrade()
+                self.data.append(v)
+        else:
+            self.data.append(v)
+        if self.nulls is not None:
+            self.nulls.append(0)
+        self.size += 1
+
+    def extend(self, vals):
+        # Whole-chunk fast paths when the chunk is one type with no NULLs;
+        # anything else goes value by value through append()
+        types = set(map(type, vals))
+        if len(types) == 1:
+            t = types.pop()
+            if self.kind is None and t in (int, float, str):
+                self._start(vals[0])
+            if (self.kind, t) in (("q", int), ("d", float)):
+                try:
+                    self.data.extend(array(self.kind, vals))
+                except OverflowError:
+                    pass
+                else:
+                    if self.nulls is not None:
+                        self.nulls.extend(bytes(len(vals)))
+                    self.size += len(vals)
+                    return
+            elif (self.kind, t) == ("s", str):
+                lookup = self.lookup
+                for v in set(vals).difference(lookup):
+                    lookup[v] = len(self.values)
+                    self.values.append(v)
+                self.data.extend(map(lookup.__getitem__, vals))
+                if self.nulls is not None:
+                    self.nulls.extend(bytes(len(vals)))
+                self.size += len(vals)
+                return
+        for v in vals:
+            self.append(v)
+
+    def finish(self):
+        if self.kind is None:
+            self.kind, self.data = "o", [None] * self.size
+        self.lookup = None
+
+    def get(self, i):
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        if self.kind == "s":
+            return self.values[self.data[i]]
+        if self.kind is None:
+            return None
+        return self.data[i]
+
+    def take(self, idx) -> List:
+        """Values for a run of row numbers, as a list."""
+        if self.kind == "s":
+            out = list(map(self.values.__getitem__, map(self.data.__getitem__, idx)))
+        else:
+            out = list(map(self.data.__getitem__, idx))
+        if self.nulls is not None and self.kind != "o":
+            nulls = self.nulls
+            for j, i in enumerate(idx):
+                if nulls[i]:
+                    out[j] = None
+        return out
+
+    def sort_keys(self):
+        """Per-row keys ordering like SQLite ASC: NULL, numbers, text, blobs."""
+        if self.kind in ("q", "d"):
+            if self.nulls is None:
+                return self.data
+            low = float("-inf")
+            return [low if n else v for v, n in zip(self.data, self.nulls)]
+        if self.kind == "s":
+            rank = array("l", [0]) * len(self.values)
+            for r, code in enumerate(sorted(range(len(self.values)), key=self.values.__getitem__)):
+                rank[code] = r + 1
+            keys = array("l", (rank[c] for c in self.data))
+            if self.nulls is not None:
+                for i, n in enumerate(self.nulls):
+                    if n:
+                        keys[i] = 0
+            return keys
+        def key(v):
+            if v is None:
+                return (0, 0)
+            if isinstance(v, (int, float)):
+                return (1, v)
+            if isinstance(v, str):
+                return (2, v)
+            return (3, bytes(v))
+        return [key(v) for v in self.data]
+
+    def nbytes(self) -> int:
+        n = len(self.nulls) if self.nulls is not None else 0
+        if self.kind in ("q", "d", "s"):
+            n += self.data.itemsize * len(self.data)
+        else:
+            n += 8 * len(self.data)
+        if self.values is not None:
+            n += sum(49 + len(v) for v in self.values) + 8 * len(self.values)
+        return n
+
+class RowView:
+    """A row read through to the column storage; tuple(view) materializes it."""
+    __slots__ = ("_cols", "_i")
+
+    def __init__(self, cols, i):
+        self._cols = cols
+        self._i = i
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return tuple(c.get(self._i) for c in self._cols[k])
+        return self._cols[k].get(self._i)
+
+    def __len__(self):
+        return len(self._cols)
+
+    def __iter__(self):
+        i = self._i
+        for c in self._cols:
+            yield c.get(i)
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+class ResultSet:
+    """Columns plus an index of row numbers; iterating yields plain tuples."""
+    __slots__ = ("columns", "_cols", "_index", "_sort_cache")
+
+    def __init__(self, columns: Sequence[str], cols: List[_Column], index=None, sort_cache=None):
+        self.columns = list(columns)
+        self._cols = cols
+        size = cols[0].size if cols else 0
+        self._index = range(size) if index is None else index
+        # column number -> full ascending permutation, shared by every view
+        self._sort_cache: Dict[int, array] = {} if sort_cache is None else sort_cache
+
+    @classmethod
+    def from_cursor(cls, cur, chunk: int = FETCH_CHUNK) -> "ResultSet":
+        columns = [d[0] for d in cur.description] if cur.description else []
+        cols = [_Column() for _ in columns]
+        while True:
+            batch = cur.fetchmany(chunk)
+            if not batch:
+                break
+            for c, vals in zip(cols, zip(*batch)):
+                c.extend(vals)
+        for c in cols:
+            c.finish()
+        return cls(columns, cols)
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows) -> "ResultSet":
+        cols = [_Column() for _ in columns]
+        rows = list(rows)
+        for start in range(0, len(rows), FETCH_CHUNK):
+            for c, vals in zip(cols, zip(*rows[start:start + FETCH_CHUNK])):
+                c.extend(vals)
+        for c in cols:
+            c.finish()
+        return cls(columns, cols)
+
+    def _view(self, index) -> "ResultSet":
+        return ResultSet(self.columns, self._cols, index, self._sort_cache)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        # Rows are assembled a chunk at a time by zipping column slices
+        for start in range(0, len(self._index), FETCH_CHUNK):
+            idx = self._index[start:start + FETCH_CHUNK]
+            yield from zip(*[c.take(idx) for c in self._cols])
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return self._view(self._index[k])
+        i = self._index[k]
+        return tuple(c.get(i) for c in self._cols)
+
+    def row(self, k) -> RowView:
+        return RowView(self._cols, self._index[k])
+
+    def column_index(self, col) -> int:
+        return col if isinstance(col, int) else self.columns.index(col)
+
+    def column(self, col) -> List:
+        return self._cols[self.column_index(col)].take(self._index)
+
+    def _permutation(self, k: int) -> array:
+        perm = self._sort_cache.get(k)
+        if perm is None:
+            c = self._cols[k]
+            keys = c.sort_keys()
+            perm = self._sort_cache[k] = array("l", sorted(range(c.size), key=keys.__getitem__))
+        return perm
+
+    def sorted_by(self, col, descending: bool = False) -> "ResultSet":
+        """A view ordered by one column; the permutation is computed once per column."""
+        k = self.column_index(col)
+        perm = self._permutation(k)
+        if isinstance(self._index, range) and self._index == range(self._cols[k].size):
+            order = perm
+        else:
+            # Keep the full permutation's order, restricted to this view's rows
+            member = bytearray(self._cols[k].size)
+            for i in self._index:
+                member[i] = 1
+            order = array("l", (i for i in perm if member[i]))
+        if descending:
+            order = order[::-1]
+        return self._view(order)
+
+    def filter(self, keep: Callable[[Tuple], bool]) -> "ResultSet":
+        cols = self._cols
+        return self._view(array("l", (i for i in self._index if keep(tuple(c.get(i) for c in cols)))))
+
+    def where(self, col, keep: Callable[[object], bool]) -> "ResultSet":
+        c = self._cols[self.column_index(col)]
+        return self._view(array("l", (i for i in self._index if keep(c.get(i)))))
+
+    def search(self, text: str) -> "ResultSet":
+        """Rows where any value contains text (case-insensitive). Each
+        distinct value is tested once; rows are then picked by membership."""
+        needle = text.lower()
+        size = self._cols[0].size if self._cols else 0
+        mask = bytearray(size)
+        for c in self._cols:
+            if c.kind == "s":
+                hits = {code for code, v in enumerate(c.values) if needle in v.lower()}
+            elif c.kind in ("q", "d"):
+                hits = {v for v in set(c.data) if needle in str(v).lower()}
+            else:
+                hits = None
+            if hits is None:
+                rows = (i for i, v in enumerate(c.data) if v is not None and needle in str(v).lower())
+            elif hits:
+                rows = compress(range(size), map(hits.__contains__, c.data))
+            else:
+                continue
+            nulls = c.nulls if c.kind != "o" else None
+            for i in rows:
+                if not (nulls and nulls[i]):
+                    mask[i] = 1
+        return self._view(array("l", compress(self._index, map(mask.__getitem__, self._index))))
+
+    def to_list(self) -> List[Tuple]:
+        return list(self)
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the column storage and this view's index."""
+        n = sum(c.nbytes() for c in self._cols)
+        if not isinstance(self._index, range):
+            n += self._index.itemsize * len(self._index)
+        return n
+
+    def __repr__(self):
+        return f"<ResultSet {len(self)} rows x {len(self.columns)} columns>"
+
+def fetch(conn, sql: str, params=()) -> ResultSet:
+    return ResultSet.from_cursor(conn.execute(sql, params))
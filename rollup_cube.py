@@ -0,0 +1,253 @@
+# rollup_cube.py
+# Precomputed aggregates over geography (all > state > district > market) and
+# crop (all > crop_group > crop) x season, answered by primary-key lookup.
+#
+# The cube is filled from the already-aggregated crop_district_rollup and
+# price_daily tables, never from raw fact rows. Triggers on those two tables
+# (and on markets, districts and crops) record which districts changed, and
+# refresh_cube() recomputes only the cells under those districts (plus their
+# states and the grand total).
+from typing import List, Optional, Tuple
+
+GEO_LEVELS = ["all", "state", "district", "market"]
+CROP_LEVELS = ["all", "group", "crop"]
+
+MEASURES = ("record_count", "area", "production", "yield_sum", "yield_count",
+            "arrivals", "tonnes", "price_sum", "price_count")
+
+def create_cube(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS cube_cells (
+        geo_level TEXT NOT NULL,
+        geo_key TEXT NOT NULL,
+        crop_level TEXT NOT NULL,
+        crop_key TEXT NOT NULL,
+        season TEXT NOT NULL,          -- '*' = all seasons
+        geo_parent TEXT,
+        crop_parent TEXT,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        area REAL NOT NULL DEFAULT 0,
+        production REAL NOT NULL DEFAULT 0,
+        yield_sum REAL NOT NULL DEFAULT 0,
+        yield_count INTEGER NOT NULL DEFAULT 0,
+        arrivals INTEGER NOT NULL DEFAULT 0,
+        tonnes REAL NOT NULL DEFAULT 0,
+        price_sum REAL NOT NULL DEFAULT 0,
+        price_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (geo_level, geo_key, crop_level, crop_key, season)
+    ) WITHOUT ROWID;
+    """)
+    cur.execute("""CREATE INDEX IF NOT EXISTS idx_cube_geo_parent
+                   ON cube_cells (geo_level, geo_parent, crop_level, crop_key, season)""")
+    cur.execute("""CREATE INDEX IF NOT EXISTS idx_cube_crop_parent
+                   ON cube_cells (crop_level, crop_parent, geo_level, geo_key, season)""")
+    cur.execute("CREATE TABLE IF NOT EXISTS cube_dirty (district_id INTEGER PRIMARY KEY)")
+    # States a district moved out of; their cells are recomputed even if no
+    # district is left in them
+    cur.execute("CREATE TABLE IF NOT EXISTS cube_dirty_states (state_name TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    # NOT EXISTS rather than OR IGNORE: price_daily is written by an upsert,
+    # and an outer ON CONFLICT clause overrides the trigger's own OR clause
+    for event, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cube_dirty_rollup_{event.lower()}
+        AFTER {event} ON crop_district_rollup
+        BEGIN
+            INSERT INTO cube_dirty (district_id)
+            SELECT {ref}.district_id
+            WHERE NOT EXISTS (SELECT 1 FROM cube_dirty WHERE district_id = {ref}.district_id);
+        END;
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cube_dirty_price_{event.lower()}
+        AFTER {event} ON price_daily
+        BEGIN
+            INSERT INTO cube_dirty (district_id)
+            SELECT m.district_id FROM markets m
+            WHERE m.market_id = {ref}.market_id AND m.district_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM cube_dirty WHERE district_id = m.district_id);
+        END;
+        """)
+
+    # Changes to the dimensions move cells without touching either source.
+    # price_daily rows of a deleted market are only removed at the next
+    # refresh, when the market can no longer be looked up, so the market's
+    # own delete marks its district
+    mark = """INSERT INTO cube_dirty (district_id)
+            SELECT {ref}.district_id
+            WHERE {ref}.district_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM cube_dirty WHERE district_id = {ref}.district_id);"""
+    mark_state = """
+            INSERT INTO cube_dirty_states (state_name)
+            SELECT COALESCE(OLD.state_name, 'Unknown')
+            WHERE NOT EXISTS (SELECT 1 FROM cube_dirty_states WHERE state_name = COALESCE(OLD.state_name, 'Unknown'));"""
+    for name, event, body in (
+            ("market_delete", "DELETE ON markets", mark.format(ref="OLD")),
+            ("market_update", "UPDATE OF district_id ON markets", mark.format(ref="OLD") + mark.format(ref="NEW")),
+            ("district_delete", "DELETE ON districts", mark.format(ref="OLD") + mark_state),
+            ("district_update", "UPDATE OF state_name ON districts", mark.format(ref="NEW") + mark_state),
+            ("crop_update", "UPDATE OF crop_group ON crops", """
+            INSERT INTO cube_dirty (district_id)
+            SELECT DISTINCT r.district_id FROM crop_district_rollup r
+            WHERE r.crop_id = NEW.crop_id
+              AND NOT EXISTS (SELECT 1 FROM cube_dirty WHERE district_id = r.district_id);
+            INSERT INTO cube_dirty (district_id)
+            SELECT DISTINCT m.district_id FROM price_daily p JOIN markets m ON m.market_id = p.market_id
+            WHERE p.crop_id = NEW.crop_id AND m.district_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM cube_dirty WHERE district_id = m.district_id);""")):
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cube_dirty_{name}
+        AFTER {event}
+        BEGIN
+            {body}
+        END;
+        """)
+
+# geo level -> (key expr, parent expr) over aliases d (districts) and r/p
+_PRODUCTION_GEO = {
+    "all": ("'*'", "NULL"),
+    "state": ("COALESCE(d.state_name, 'Unknown')", "'*'"),
+    "district": ("CAST(r.district_id AS TEXT)", "COALESCE(d.state_name, 'Unknown')"),
+}
+_ARRIVAL_GEO = {
+    "all": ("'*'", "NULL"),
+    "state": ("COALESCE(d.state_name, 'Unknown')", "'*'"),
+    "district": ("CAST(m.district_id AS TEXT)", "COALESCE(d.state_name, 'Unknown')"),
+    "market": ("CAST(p.market_id AS TEXT)", "CAST(m.district_id AS TEXT)"),
+}
+
+def _crop_exprs(alias):
+    return {
+        "all": ("'*'", "NULL"),
+        "group": ("COALESCE(c.crop_group, 'Unknown')", "'*'"),
+        "crop": (f"CAST({alias}.crop_id AS TEXT)", "COALESCE(c.crop_group, 'Unknown')"),
+    }
+
+def _fill(cur, geo_levels, where_production="1", where_arrival="1"):
+    for geo in geo_levels:
+        for crop_level, (crop_key, crop_parent) in _crop_exprs("r").items():
+            if geo not in _PRODUCTION_GEO:
+                continue
+            geo_key, geo_parent = _PRODUCTION_GEO[geo]
+            for season in ("'*'", "r.season"):
+                cur.execute(f"""
+                INSERT INTO cube_cells (geo_level, geo_key, crop_level, crop_key, season, geo_parent, crop_parent,
+                                        record_count, area, production, yield_sum, yield_count)
+                SELECT '{geo}', {geo_key}, '{crop_level}', {crop_key}, {season}, {geo_parent}, {crop_parent},
+                       SUM(r.record_count), SUM(r.sum_area), SUM(r.sum_production), SUM(r.sum_yield), SUM(r.yield_count)
+                FROM crop_district_rollup r
+                LEFT JOIN districts d ON r.district_id = d.district_id
+                LEFT JOIN crops c ON r.crop_id = c.crop_id
+                WHERE {where_production}
+                GROUP BY 2, 4, 5
+                """)
+        for crop_level, (crop_key, crop_parent) in _crop_exprs("p").items():
+            geo_key, geo_parent = _ARRIVAL_GEO[geo]
+            cur.execute(f"""
+            INSERT INTO cube_cells (geo_level, geo_key, crop_level, crop_key, season, geo_parent, crop_parent,
+                                    arrivals, tonnes, price_sum, price_count)
+            SELECT '{geo}', {geo_key}, '{crop_level}', {crop_key}, '*', {geo_parent}, {crop_parent},
+                   SUM(p.arrivals), TOTAL(p.arrival_tonnes), TOTAL(p.modal_sum), SUM(p.modal_count)
+            FROM price_daily p
+            JOIN markets m ON p.market_id = m.market_id
+            LEFT JOIN districts d ON m.district_id = d.district_id
+            LEFT JOIN crops c ON p.crop_id = c.crop_id
+            WHERE m.district_id IS NOT NULL AND {where_arrival}
+            GROUP BY 2, 4
+            ON CONFLICT(geo_level, geo_key, crop_level, crop_key, season) DO UPDATE SET
+                arrivals = excluded.arrivals,
+                tonnes = excluded.tonnes,
+                price_sum = excluded.price_sum,
+                price_count = excluded.price_count
+            """)
+
+def _fill_total(cur):
+    # The grand total is the sum of the state cells
+    cur.execute("DELETE FROM cube_cells WHERE geo_level = 'all'")
+    cur.execute(f"""
+    INSERT INTO cube_cells (geo_level, geo_key, crop_level, crop_key, season, geo_parent, crop_parent,
+                            {", ".join(MEASURES)})
+    SELECT 'all', '*', crop_level, crop_key, season, NULL, crop_parent,
+           {", ".join(f"SUM({m})" for m in MEASURES)}
+    FROM cube_cells WHERE geo_level = 'state'
+    GROUP BY crop_level, crop_key, season
+    """)
+
+def rebuild_cube(conn):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM cube_cells")
+    cur.execute("DELETE FROM cube_dirty")
+    cur.execute("DELETE FROM cube_dirty_states")
+    _fill(cur, ["state", "district", "market"])
+    _fill_total(cur)
+    conn.commit()
+
+def refresh_cube(conn):
+    """Recompute cells under districts touched since the last refresh."""
+    cur = conn.cursor()
+    cur.execute("SELECT EXISTS (SELECT 1 FROM cube_cells)")
+    if not cur.fetchone()[0]:
+        rebuild_cube(conn)
+        return
+    cur.execute("SELECT EXISTS (SELECT 1 FROM cube_dirty) OR EXISTS (SELECT 1 FROM cube_dirty_states)")
+    if not cur.fetchone()[0]:
+        return
+    dirty = "(SELECT district_id FROM cube_dirty)"
+    dirty_states = f"""(SELECT COALESCE(state_name, 'Unknown') FROM districts WHERE district_id IN {dirty}
+                        UNION SELECT state_name FROM cube_dirty_states)"""
+    cur.execute(f"""DELETE FROM cube_cells WHERE geo_level = 'district'
+                    AND geo_key IN (SELECT CAST(district_id AS TEXT) FROM cube_dirty)""")
+    cur.execute(f"""DELETE FROM cube_cells WHERE geo_level = 'market'
+                    AND geo_parent IN (SELECT CAST(district_id AS TEXT) FROM cube_dirty)""")
+    cur.execute(f"DELETE FROM cube_cells WHERE geo_level = 'state' AND geo_key IN {dirty_states}")
+    _fill(cur, ["district"], f"r.district_id IN {dirty}", f"m.district_id IN {dirty}")
+    _fill(cur, ["market"], where_arrival=f"m.district_id IN {dirty}")
+    _fill(cur, ["state"], f"COALESCE(d.state_name, 'Unknown') IN {dirty_states}",
+          f"COALESCE(d.state_name, 'Unknown') IN {dirty_states}")
+    _fill_total(cur)
+    cur.execute("DELETE FROM cube_dirty")
+    cur.execute("DELETE FROM cube_dirty_states")
+    conn.commit()
+
+# -------------------------
+# QUERIES
+# -------------------------
+
+CELL_COLUMNS = ["geo_level", "geo_key", "crop_level", "crop_key", "season", "records",
+                "area", "production", "avg_yield", "arrivals", "tonnes", "avg_price"]
+
+_CELL_SELECT = """SELECT geo_level, geo_key, crop_level, crop_key, season, record_count,
+       ROUND(area, 2), ROUND(production, 2), ROUND(yield_sum / NULLIF(yield_count, 0), 3),
+       arrivals, ROUND(tonnes, 2), ROUND(price_sum / NULLIF(price_count, 0), 2)
+FROM cube_cells"""
+
+def cell(conn, geo_level="all", geo_key="*", crop_level="all", crop_key="*", season="*") -> Optional[Tuple]:
+    return conn.execute(_CELL_SELECT + """ WHERE geo_level = ? AND geo_key = ? AND crop_level = ?
+                        AND crop_key = ? AND season = ?""",
+                        (geo_level, geo_key, crop_level, crop_key, season)).fetchone()
+
+def drill_down_geo(conn, geo_level, geo_key, crop_level="all", crop_key="*", season="*") -> List[Tuple]:
+    i = GEO_LEVELS.index(geo_level)
+    if i + 1 >= len(GEO_LEVELS):
+        return []
+    return conn.execute(_CELL_SELECT + """ WHERE geo_level = ? AND geo_parent = ? AND crop_level = ?
+                        AND crop_key = ? AND season = ? ORDER BY production DESC, tonnes DESC""",
+                        (GEO_LEVELS[i + 1], geo_key, crop_level, crop_key, season)).fetchall()
+
+def drill_down_crop(conn, crop_level, crop_key, geo_level="all", geo_key="*", season="*") -> List[Tuple]:
+    i = CROP_LEVELS.index(crop_level)
+    if i + 1 >= len(CROP_LEVELS):
+        return []
+    return conn.execute(_CELL_SELECT + """ WHERE crop_level = ? AND crop_parent = ? AND geo_level = ?
+                        AND geo_key = ? AND season = ? ORDER BY production DESC, tonnes DESC""",
+                        (CROP_LEVELS[i + 1], crop_key, geo_level, geo_key, season)).fetchall()
+
+def roll_up_geo(conn, geo_level, geo_key, crop_level="all", crop_key="*", season="*") -> Optional[Tuple]:
+    row = conn.execute("""SELECT geo_parent FROM cube_cells WHERE geo_level = ? AND geo_key = ?
+                          AND crop_level = ? AND crop_key = ? AND season = ?""",
+                       (geo_level, geo_key, crop_level, crop_key, season)).fetchone()
+    i = GEO_LEVELS.index(geo_level)
+    if not row or i == 0:
+        return None
+    return cell(conn, GEO_LEVELS[i - 1], row[0], crop_level, crop_key, season)
@@ -0,0 +1,109 @@
+# search_index.py
+# FTS5 name/prefix search over crops, districts, markets, compounds and varieties.
+import sqlite3
+from typing import List, Optional, Tuple
+from profiles import ANALYTICS, connect
+
+# kind -> (code, source table, key column, label column, detail column)
+# The FTS rowid is key * 8 + code, so triggers can update or delete an entry
+# by rowid instead of scanning the index for it.
+SEARCH_SOURCES = {
+    "crop": (1, "crops", "crop_id", "crop_name", "crop_group"),
+    "district": (2, "districts", "district_id", "district_name", "state_name"),
+    "market": (3, "markets", "market_id", "market_name", None),
+    "compound": (4, "pesticide_use", "pesticide_id", "compound", None),
+    "variety": (5, "crop_arrival_price", "arrival_id", "variety", None),
+}
+
+def create_search_index(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED,
+        ref_id UNINDEXED,
+        label,
+        detail,
+        prefix = '1 2 3',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+    """)
+
+    for kind, (code, table, key, label, detail) in SEARCH_SOURCES.items():
+        detail_new = f"NEW.{detail}" if detail else "NULL"
+        watched = f"{label}, {detail}" if detail else label
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_insert
+        AFTER INSERT ON {table}
+        WHEN NEW.{label} IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO search_index (rowid, kind, ref_id, label, detail)
+            VALUES (NEW.{key} * 8 + {code}, '{kind}', NEW.{key}, NEW.{label}, {detail_new});
+        END;
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_update
+        AFTER UPDATE OF {key}, {watched} ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.{key} * 8 + {code};
+            INSERT INTO search_index (rowid, kind, ref_id, label, detail)
+            SELECT NEW.{key} * 8 + {code}, '{kind}', NEW.{key}, NEW.{label}, {detail_new}
+            WHERE NEW.{label} IS NOT NULL;
+        END;
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_search_{table}_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.{key} * 8 + {code};
+        END;
+        """)
+
+    cur.execute("SELECT EXISTS (SELECT 1 FROM search_index)")
+    if not cur.fetchone()[0]:
+        rebuild_search_index(conn)
+
+def rebuild_search_index(conn):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM search_index")
+    for kind, (code, table, key, label, detail) in SEARCH_SOURCES.items():
+        cur.execute(f"""
+        INSERT INTO search_index (rowid, kind, ref_id, label, detail)
+        SELECT {key} * 8 + {code}, '{kind}', {key}, {label}, {detail or "NULL"}
+        FROM {table} WHERE {label} IS NOT NULL
+        """)
+    cur.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    conn.commit()
+
+def match_expression(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query where every word is a prefix term."""
+    terms = []
+    for word in text.split():
+        word = word.replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*')
+    return " AND ".join(terms) if terms else None
+
+def search(conn, text: str, kinds=None, limit: int = 200) -> List[Tuple]:
+    """Return (kind, ref_id, label, detail) rows best match first."""
+    expr = match_expression(text)
+    if not expr:
+        return []
+    q = "SELECT kind, ref_id, label, detail FROM search_index WHERE search_index MATCH ?"
+    params = [expr]
+    if kinds:
+        kinds = [kinds] if isinstance(kinds, str) else list(kinds)
+        q += f" AND kind IN ({', '.join(['?'] * len(kinds))})"
+        params.extend(kinds)
+    q += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    return conn.execute(q, params).fetchall()
+
+def search_ids(db_path: str, text: str, kind: str, limit: int = 100000):
+    """Set of matching ids for one kind, or None if the index is unavailable."""
+    conn = connect(db_path, ANALYTICS)
+    try:
+        return {r[1] for r in search(conn, text, kind, limit)}
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
@@ -0,0 +1,200 @@
+# sharded.py
+# Read scaling for the grouped analytics: a query is split into district_id
+# ranges, each range is aggregated in its own process over a read-only
+# connection, and the partial sums are merged here. Workers only ship back
+# one small row per group, so the row-building that holds the GIL is spread
+# over the pool instead of done in the GUI process.
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from resultset import ResultSet
+from profiles import ANALYTICS, connect
+
+DB_FILE = "agriculture.db"
+
+# Worker processes for sharded reads; 1 runs everything in-process
+READ_WORKERS = os.cpu_count() or 1
+
+# Below this many driving rows per worker the pool costs more than it saves
+MIN_ROWS_PER_SHARD = 20000
+
+class ShardedQuery(NamedTuple):
+    title: str
+    # Partial aggregate over district_id BETWEEN :lo AND :hi; the first
+    # `keys` columns are the group key, the rest are summed across shards
+    partial_sql: str
+    keys: int
+    driver: str                 # table whose size decides whether to shard
+    columns: Tuple[str, ...]
+    # (parent connection, {key: summed measures}) -> display rows
+    finalize: Callable[[sqlite3.Connection, Dict[tuple, list]], List[tuple]]
+
+def _avg(s, n):
+    return s / n if n else None
+
+def _district_risk(conn, groups):
+    rows = []
+    for (district_id, name), (pest_sum, pest_n, rain_sum, rain_n, sust_sum, sust_n) in groups.items():
+        hi, rain, sust = _avg(pest_sum, pest_n), _avg(rain_sum, rain_n), _avg(sust_sum, sust_n)
+        if hi is not None and hi > 50 and ((rain is not None and rain < 200) or (sust is not None and sust < 3)):
+            rows.append((district_id, name, hi, rain, sust))
+    rows.sort(key=lambda r: -r[2])
+    return rows
+
+def _sustainability_analysis(conn, groups):
+    # COUNT(DISTINCT) does not merge across shards, and it is per crop name
+    # anyway, so the pesticide counts come from one query in the parent
+    names = dict(conn.execute("SELECT crop_id, crop_name FROM crops"))
+    counts = dict(conn.execute("""
+        SELECT c.crop_name, COUNT(DISTINCT cp.pesticide_id)
+        FROM crops c LEFT JOIN crop_pesticide cp ON cp.crop_id = c.crop_id
+        GROUP BY c.crop_name"""))
+    by_name = {}
+    for (crop_id,), (yield_sum, yield_n) in groups.items():
+        if crop_id not in names or not yield_n or yield_sum is None:
+            continue
+        total = by_name.setdefault(names[crop_id], [0.0, 0])
+        total[0] += yield_sum
+        total[1] += yield_n
+    rows = []
+    for name, (yield_sum, yield_n) in by_name.items():
+        count = counts[name]
+        score = "High" if count <= 2 else "Medium" if count <= 5 else "Low"
+        rows.append((name, round(yield_sum / yield_n, 2), count, score))
+    rows.sort(key=lambda r: (r[2], -r[1]))
+    return rows
+
+def _high_prod_low_sustain(conn, groups):
+    names = dict(conn.execute("SELECT crop_id, crop_name FROM crops"))
+    rows = []
+    for (crop_id,), (production, sust_sum, sust_n) in groups.items():
+        avg_sustain = _avg(sust_sum, sust_n)
+        if production is not None and production > 1000 and (avg_sustain is None or avg_sustain < 3):
+            rows.append((crop_id, names.get(crop_id), production, avg_sustain))
+    rows.sort(key=lambda r: -r[2])
+    return rows
+
+SHARDED_QUERIES: Dict[str, ShardedQuery] = {
+    "district_risk": ShardedQuery(
+        "District risk",
+        """SELECT d.district_id, d.district_name, pu.s, pu.n, sd.rs, sd.rn, sd.ss, sd.sn
+        FROM districts d
+        LEFT JOIN (SELECT district_id, SUM(high_sum) AS s, SUM(high_count) AS n
+                   FROM exposure_district WHERE district_id BETWEEN :lo AND :hi
+                   GROUP BY district_id) pu ON pu.district_id = d.district_id
+        LEFT JOIN (SELECT district_id, SUM(rainfall_mm) AS rs, COUNT(rainfall_mm) AS rn,
+                          SUM(sustainability_score) AS ss, COUNT(sustainability_score) AS sn
+                   FROM sustainability_data WHERE district_id BETWEEN :lo AND :hi
+                   GROUP BY district_id) sd ON sd.district_id = d.district_id
+        WHERE d.district_id BETWEEN :lo AND :hi""",
+        2, "sustainability_data",
+        ("district_id", "district_name", "avg_pesticide_hi", "avg_rainfall", "avg_sustain"),
+        _district_risk),
+    "sustainability_analysis": ShardedQuery(
+        "Sustainability Score Analysis",
+        """SELECT crop_id, SUM(sum_yield), SUM(yield_count)
+        FROM crop_district_rollup
+        WHERE district_id BETWEEN :lo AND :hi
+        GROUP BY crop_id""",
+        1, "crop_district_rollup",
+        ("crop_name", "avg_yield", "pesticide_count", "sustainability_score"),
+        _sustainability_analysis),
+    "high_production_low_sustainability": ShardedQuery(
+        "High production / low sustainability",
+        """SELECT p.crop_id, SUM(p.production), SUM(sd.sustainability_score), COUNT(sd.sustainability_score)
+        FROM crop_production_statistic p
+        LEFT JOIN sustainability_data sd ON p.crop_id = sd.crop_id AND p.district_id = sd.district_id
+        WHERE p.district_id BETWEEN :lo AND :hi
+        GROUP BY p.crop_id""",
+        1, "crop_production_statistic",
+        ("crop_id", "crop_name", "total_production", "avg_sustain"),
+        _high_prod_low_sustain),
+}
+
+# Each partial query reads its shard through one of these rather than
+# scanning the whole table once per worker
+SHARD_INDEXES = {
+    "idx_shard_rollup_district": "crop_district_rollup (district_id, crop_id, sum_yield, yield_count)",
+    "idx_shard_production_district": "crop_production_statistic (district_id, crop_id, production)",
+    "idx_shard_sustainability_district":
+        "sustainability_data (district_id, crop_id, rainfall_mm, sustainability_score)",
+}
+
+def create_shard_indexes(conn):
+    for name, target in SHARD_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    # district_risk reads exposure_district (keyed by district) instead
+    conn.execute("DROP INDEX IF EXISTS idx_shard_pesticide_district")
+
+def district_shards(conn, n: int) -> List[Tuple[int, int]]:
+    """n contiguous district_id ranges with about the same number of districts."""
+    ids = [r[0] for r in conn.execute("SELECT district_id FROM districts ORDER BY district_id")]
+    if not ids:
+        return []
+    n = max(1, min(n, len(ids)))
+    size = -(-len(ids) // n)
+    shards = [(ids[i], ids[min(i + size, len(ids)) - 1]) for i in range(0, len(ids), size)]
+    # Open-ended outer bounds so rows whose district is missing from
+    # districts still land in a shard
+    shards[0] = (-(2 ** 63), shards[0][1])
+    shards[-1] = (shards[-1][0], 2 ** 63 - 1)
+    return shards
+
+def aggregate_shard(args) -> List[tuple]:
+    """Worker: run one partial aggregate over one district range."""
+    db_path, sql, lo, hi = args
+    conn = connect(db_path, ANALYTICS)
+    try:
+        return conn.execute(sql, {"lo": lo, "hi": hi}).fetchall()
+    finally:
+        conn.close()
+
+def merge_partials(partials, keys: int) -> Dict[tuple, list]:
+    groups: Dict[tuple, list] = {}
+    for rows in partials:
+        for r in rows:
+            key, measures = r[:keys], r[keys:]
+            acc = groups.get(key)
+            if acc is None:
+                groups[key] = list(measures)
+                continue
+            for i, v in enumerate(measures):
+                if v is not None:
+                    acc[i] = v if acc[i] is None else acc[i] + v
+    return groups
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # Kept between calls so a panel refresh does not pay for process startup.
+    # Spawned, not forked: the GUI process has Tk and other threads running,
+    # and a forked child can inherit a lock one of them held
+    global _pool, _pool_size
+    if _pool is None or _pool_size != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_size = workers
+    return _pool
+
+def run_sharded(db_path: str, name: str, workers: Optional[int] = None) -> Tuple[List[str], ResultSet]:
+    q = SHARDED_QUERIES[name]
+    workers = workers or READ_WORKERS
+    conn = connect(db_path, ANALYTICS)
+    try:
+        size = conn.execute(f"SELECT COUNT(*) FROM {q.driver}").fetchone()[0]
+        workers = max(1, min(workers, size // MIN_ROWS_PER_SHARD))
+        # A few shards per worker evens out districts with many rows
+        shards = district_shards(conn, workers * 4 if workers > 1 else 1)
+        tasks = [(db_path, q.partial_sql, lo, hi) for lo, hi in shards]
+        if workers <= 1:
+            partials = [aggregate_shard(t) for t in tasks]
+        else:
+            partials = list(_get_pool(workers).map(aggregate_shard, tasks))
+        rows = q.finalize(conn, merge_partials(partials, q.keys))
+    finally:
+        conn.close()
+    return list(q.columns), ResultSet.from_rows(q.columns, rows)
@@ -0,0 +1,226 @@
+# suitability.py
+# Weather-to-crop matching without joining weather rows to production rows.
+#
+# district_weather_profile holds one compact feature row per district (mean
+# min/max temperature, humidity, precipitation and wind stats), and
+# crop_climate_profile one requirement row per crop, averaged over
+# crop_requirements. Triggers record which districts and crops changed, and
+# refresh_climate_profiles() recomputes only those rows.
+#
+# Climate suitability of every crop x district pair is the weighted sum of
+# three fits (temperature against the district's min..max band, humidity,
+# seasonal rainfall), each 1 inside the band and falling linearly to 0 at
+# the tolerance. Crop features are binned once; a district's row of the
+# matrix is then three table lookups per crop (map() over arrays, no
+# per-pair Python code), and rows are cached until the profiles change.
+import heapq
+import os
+from array import array
+from operator import add
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from profiles import ANALYTICS, connect
+
+DB_FILE = "agriculture.db"
+
+class Feature(NamedTuple):
+    weight: float
+    tolerance: float       # distance outside the band where the fit reaches 0
+    step: float            # bin width for the crop values
+
+TEMPERATURE = Feature(0.40, 8.0, 0.1)      # degrees C
+HUMIDITY = Feature(0.25, 30.0, 0.5)        # percent
+RAINFALL = Feature(0.35, 150.0, 1.0)       # mm per season
+
+# crop_requirements.rainfall is a seasonal total; farm_weather.precipitation
+# is per observation day
+SEASON_DAYS = 120
+
+def create_climate_profiles(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS district_weather_profile (
+        district_id INTEGER PRIMARY KEY,
+        observations INTEGER NOT NULL,
+        min_temp REAL,                 -- mean of minT
+        max_temp REAL,                 -- mean of maxT
+        temp_range REAL,               -- mean of maxT - minT
+        humidity REAL,
+        humidity_min REAL,
+        humidity_max REAL,
+        precip_sum REAL,
+        precip_count INTEGER NOT NULL,
+        precip_min REAL,
+        precip_max REAL,
+        rainy_days INTEGER NOT NULL,
+        windspeed REAL,
+        windspeed_max REAL
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS crop_climate_profile (
+        crop_id INTEGER PRIMARY KEY,
+        requirements INTEGER NOT NULL,
+        temperature REAL,
+        humidity REAL,
+        rainfall REAL,
+        ph REAL,
+        N REAL,
+        P REAL,
+        K REAL
+    );
+    """)
+    cur.execute("CREATE TABLE IF NOT EXISTS weather_profile_dirty (district_id INTEGER PRIMARY KEY)")
+    cur.execute("CREATE TABLE IF NOT EXISTS crop_profile_dirty (crop_id INTEGER PRIMARY KEY)")
+    for table, dirty, key in (("farm_weather", "weather_profile_dirty", "district_id"),
+                              ("crop_requirements", "crop_profile_dirty", "crop_id")):
+        for event, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+            marks = "\n".join(f"INSERT OR IGNORE INTO {dirty} ({key}) SELECT {r}.{key} WHERE {r}.{key} IS NOT NULL;"
+                              for r in refs)
+            cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{dirty}_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                {marks}
+            END;
+            """)
+
+_WEATHER_SELECT = """SELECT district_id, COUNT(*), AVG(minT), AVG(maxT), AVG(maxT - minT),
+       AVG(humidity), MIN(humidity), MAX(humidity),
+       SUM(precipitation), COUNT(precipitation), MIN(precipitation), MAX(precipitation),
+       COUNT(CASE WHEN precipitation > 0 THEN 1 END), AVG(windspeed), MAX(windspeed)
+FROM farm_weather WHERE district_id IS NOT NULL"""
+
+_CROP_SELECT = """SELECT crop_id, COUNT(*), AVG(temperature), AVG(humidity), AVG(rainfall),
+       AVG(ph), AVG(N), AVG(P), AVG(K)
+FROM crop_requirements WHERE crop_id IS NOT NULL"""
+
+def refresh_climate_profiles(conn):
+    """Recompute the profile rows of districts and crops touched since the last refresh."""
+    cur = conn.cursor()
+    for profile, dirty, key, select in (
+            ("district_weather_profile", "weather_profile_dirty", "district_id", _WEATHER_SELECT),
+            ("crop_climate_profile", "crop_profile_dirty", "crop_id", _CROP_SELECT)):
+        if not cur.execute(f"SELECT EXISTS (SELECT 1 FROM {profile})").fetchone()[0]:
+            cur.execute(f"INSERT INTO {profile} {select} GROUP BY {key}")
+        elif cur.execute(f"SELECT EXISTS (SELECT 1 FROM {dirty})").fetchone()[0]:
+            cur.execute(f"DELETE FROM {profile} WHERE {key} IN (SELECT {key} FROM {dirty})")
+            cur.execute(f"INSERT INTO {profile} {select} AND {key} IN (SELECT {key} FROM {dirty}) GROUP BY {key}")
+        cur.execute(f"DELETE FROM {dirty}")
+    conn.commit()
+
+# -------------------------
+# SUITABILITY MATRIX
+# -------------------------
+
+def _ramp(feature: Feature, weight: float) -> List[float]:
+    # Fit at 0, 1, 2 ... bins outside the band; zero from the tolerance on
+    k = int(round(feature.tolerance / feature.step))
+    return [weight * (1 - i / k) for i in range(k)]
+
+def _fit_table(lo: float, hi: float, base: float, n: int, feature: Feature, ramp: List[float]) -> List[float]:
+    """Fit for every crop bin 0..n-1 (bin b holds values near base + b*step),
+    plus a trailing 0 that crops missing the feature point at. Built from
+    slices of the ramp: falling away below the band, flat inside it,
+    falling away above it."""
+    lo_bin = round((lo - base) / feature.step)
+    hi_bin = round((hi - base) / feature.step)
+
+    def span(start, stop):
+        part = ramp[start:stop]
+        return part + [0.0] * (stop - start - len(part))
+
+    below = max(0, min(lo_bin, n))
+    left = span(lo_bin - below + 1, lo_bin + 1)[::-1] if below else []
+    plateau = [ramp[0]] * max(0, min(hi_bin, n - 1) - max(lo_bin, 0) + 1)
+    first_above = max(hi_bin + 1, 0)
+    right = span(first_above - hi_bin, n - hi_bin) if first_above < n else []
+    return left + plateau + right + [0.0]
+
+class SuitabilityMatrix:
+    """Scores for every district (row) x crop (column), built from the two profile tables."""
+
+    def __init__(self, districts, crops):
+        self.district_ids = [d[0] for d in districts]
+        self.crop_ids = [c[0] for c in crops]
+        self.district_pos = {d: i for i, d in enumerate(self.district_ids)}
+        self.crop_pos = {c: j for j, c in enumerate(self.crop_ids)}
+        self.districts = districts
+        self.bins = []
+        for k, feature in enumerate((TEMPERATURE, HUMIDITY, RAINFALL), start=1):
+            values = [c[k] for c in crops]
+            present = [v for v in values if v is not None]
+            base = min(present) if present else 0.0
+            n = round((max(present) - base) / feature.step) + 1 if present else 0
+            # Missing values point at the trailing 0 of every fit table
+            self.bins.append((base, n, array("l", (n if v is None else round((v - base) / feature.step)
+                                                 for v in values))))
+        self.rows: List[Optional[array]] = [None] * len(self.district_ids)
+
+    def _compute_row(self, i: int) -> array:
+        _, min_temp, max_temp, humidity, precip_sum, precip_count = self.districts[i]
+        rain = precip_sum / precip_count * SEASON_DAYS if precip_count else None
+        bands = [(min_temp, max_temp), (humidity, humidity), (rain, rain)]
+        # A district missing a feature is scored on the ones it has
+        present = sum(f.weight for f, (lo, hi) in zip((TEMPERATURE, HUMIDITY, RAINFALL), bands)
+                      if lo is not None and hi is not None)
+        tables = []
+        for feature, (lo, hi), (base, n, _) in zip((TEMPERATURE, HUMIDITY, RAINFALL), bands, self.bins):
+            if lo is None or hi is None or not present:
+                tables.append([0.0] * (n + 1))
+            else:
+                lo, hi = min(lo, hi), max(lo, hi)
+                tables.append(_fit_table(lo, hi, base, n, feature, _ramp(feature, feature.weight / present)))
+        (t, th), (h, hh), (r, rh) = zip(tables, (b[2] for b in self.bins))
+        return array("f", map(add, map(add, map(t.__getitem__, th), map(h.__getitem__, hh)), map(r.__getitem__, rh)))
+
+    def row(self, district_id: int) -> Optional[array]:
+        i = self.district_pos.get(district_id)
+        if i is None:
+            return None
+        if self.rows[i] is None:
+            self.rows[i] = self._compute_row(i)
+        return self.rows[i]
+
+    def build(self) -> "SuitabilityMatrix":
+        """Fill every row; needed before anything reads a whole column."""
+        for i, r in enumerate(self.rows):
+            if r is None:
+                self.rows[i] = self._compute_row(i)
+        return self
+
+    def score(self, district_id: int, crop_id: int) -> Optional[float]:
+        row, j = self.row(district_id), self.crop_pos.get(crop_id)
+        return None if row is None or j is None else row[j]
+
+    def best_crops(self, district_id: int, k: int = 10) -> List[Tuple[int, float]]:
+        row = self.row(district_id)
+        if row is None:
+            return []
+        return [(c, s) for s, c in heapq.nlargest(k, zip(row, self.crop_ids))]
+
+    def best_districts(self, crop_id: int, k: int = 10) -> List[Tuple[int, float]]:
+        j = self.crop_pos.get(crop_id)
+        if j is None:
+            return []
+        self.build()
+        return [(d, s) for s, d in heapq.nlargest(k, zip((r[j] for r in self.rows), self.district_ids))]
+
+_cache: Dict[str, Tuple[tuple, SuitabilityMatrix]] = {}
+
+def load_matrix(db_path: str = DB_FILE) -> SuitabilityMatrix:
+    """The matrix for the current profiles. Reading the two small profile
+    tables is cheap; the rows computed from them are kept while they match."""
+    conn = connect(db_path, ANALYTICS)
+    try:
+        districts = conn.execute("""SELECT district_id, min_temp, max_temp, humidity, precip_sum, precip_count
+                                    FROM district_weather_profile ORDER BY district_id""").fetchall()
+        crops = conn.execute("""SELECT crop_id, temperature, humidity, rainfall
+                                FROM crop_climate_profile ORDER BY crop_id""").fetchall()
+    finally:
+        conn.close()
+    key = (tuple(districts), tuple(crops))
+    path = os.path.abspath(db_path)
+    cached = _cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = _cache[path] = (key, SuitabilityMatrix(districts, crops))
+    return cached[1]
@@ -0,0 +1,143 @@
+# telemetry.py
+# Live numbers for the importer: rows/s, bytes/s, time per phase (parse,
+# convert, parents, insert, commit), batch latencies and peak RSS. Every
+# batch and every finished table is written as one JSON object per line
+# when a telemetry file is given, and drawn as a progress bar on stderr
+# when that is a terminal. Timing is a few perf_counter() calls per batch,
+# so it stays on even when nothing is written anywhere.
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:      # not on Windows
+    resource = None
+
+PHASES = ("parse", "convert", "parents", "insert", "commit")
+
+BAR_WIDTH = 30
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+class Telemetry:
+    """One per import run; start_table() resets the counters for each feed."""
+
+    def __init__(self, path: Optional[str] = None, progress: Optional[bool] = None):
+        self.out = open(path, "a", encoding="utf-8") if path else None
+        self.progress = sys.stderr.isatty() if progress is None else progress
+        self.table = None
+
+    def start_table(self, table: str, source: str, total_bytes: Optional[int] = None, start_rows: int = 0):
+        self.table = table
+        self.source = source
+        self.total_bytes = total_bytes
+        # Rates count this run only; rows_done includes what a resumed
+        # import had already committed
+        self.start_rows = start_rows
+        self.rows = 0
+        self.bytes = 0
+        self.position = None
+        self.batches = 0
+        self.latencies: List[float] = []
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.started = self.last = time.perf_counter()
+        self.emit({"event": "start", "table": table, "source": source, "total_bytes": total_bytes,
+                   "resumed_at_row": start_rows or None})
+
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - t
+
+    def timed(self, iterable, name: str = "parse"):
+        """Yields from iterable, charging the time spent producing each item to a phase."""
+        it = iter(iterable)
+        while True:
+            t = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            self.phases[name] += time.perf_counter() - t
+            yield item
+
+    def batch(self, rows: int, nbytes: int, position: Optional[int] = None):
+        """nbytes is what this batch read; position, for plain files, is the
+        byte offset reached, which the progress bar measures against the size."""
+        now = time.perf_counter()
+        latency, self.last = now - self.last, now
+        self.latencies.append(latency)
+        self.batches += 1
+        self.rows += rows
+        self.bytes += nbytes
+        self.position = position
+        elapsed = now - self.started
+        self.emit({"event": "batch", "table": self.table, "batch": self.batches, "rows": rows,
+                   "rows_done": self.start_rows + self.rows, "bytes_done": self.bytes,
+                   "latency_ms": round(latency * 1000, 2),
+                   "rows_per_s": round(self.rows / elapsed, 1) if elapsed else None,
+                   "bytes_per_s": round(self.bytes / elapsed, 1) if elapsed else None,
+                   "peak_rss_kb": peak_rss_kb()})
+        if self.progress:
+            self.draw(elapsed)
+
+    def draw(self, elapsed: float):
+        rate = self.rows / elapsed if elapsed else 0
+        mb_s = self.bytes / elapsed / 1e6 if elapsed else 0
+        if self.total_bytes and self.position is not None:
+            done = min(1.0, self.position / self.total_bytes)
+            fill = int(done * BAR_WIDTH)
+            bar = f"[{'#' * fill}{'.' * (BAR_WIDTH - fill)}] {done * 100:5.1f}%"
+        else:
+            bar = f"[{'?' * BAR_WIDTH}]       "
+        sys.stderr.write(f"\r{self.table[:26]:26s} {bar} {self.start_rows + self.rows:>11,} rows {rate:>9,.0f} rows/s {mb_s:6.1f} MB/s")
+        sys.stderr.flush()
+
+    def finish_table(self, loaded: int, collapsed: int = 0, rejected: int = 0) -> str:
+        """Emits the table's summary and returns the phase line to print."""
+        elapsed = time.perf_counter() - self.started
+        if self.progress and self.batches:
+            sys.stderr.write("\n")
+        lat = sorted(self.latencies)
+        self.emit({"event": "finish", "table": self.table, "source": self.source, "rows": self.rows,
+                   "rows_done": self.start_rows + self.rows,
+                   "loaded": loaded, "collapsed": collapsed, "rejected": rejected, "bytes": self.bytes,
+                   "seconds": round(elapsed, 3),
+                   "rows_per_s": round(self.rows / elapsed, 1) if elapsed else None,
+                   "bytes_per_s": round(self.bytes / elapsed, 1) if elapsed else None,
+                   "phases_s": {k: round(v, 3) for k, v in self.phases.items()},
+                   "batches": self.batches,
+                   "batch_latency_ms": {"min": round(lat[0] * 1000, 2) if lat else None,
+                                        "p50": round(_percentile(lat, 0.5) * 1000, 2),
+                                        "p95": round(_percentile(lat, 0.95) * 1000, 2),
+                                        "max": round(lat[-1] * 1000, 2) if lat else None},
+                   "peak_rss_kb": peak_rss_kb()})
+        phases = ", ".join(f"{k} {v:.2f}s" for k, v in self.phases.items())
+        return f"  {elapsed:.2f}s: {phases}; {self.rows / elapsed if elapsed else 0:,.0f} rows/s"
+
+    def emit(self, event: dict):
+        if self.out is not None:
+            event["ts"] = round(time.time(), 3)
+            self.out.write(json.dumps(event) + "\n")
+            self.out.flush()
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
@@ -1,8 +1,8 @@
 # test_database.py
 # Quick script to test if database is properly set up
 
-import sqlite3
 import os
+from profiles import ANALYTICS, connect
 
 def test_database():
     """Test if agriculture.db exists and has data"""
@@ -15,7 +15,7 @@ def test_database():
     print("✅ Database file found")
     
     try:
-        conn = sqlite3.connect("agriculture.db")
+        conn = connect("agriculture.db", ANALYTICS)
         cur = conn.cursor()
         
         # Test each table
@@ -95,7 +95,7 @@ def test_database():
 def show_sample_data():
     """Show sample data from key tables"""
     try:
-        conn = sqlite3.connect("agriculture.db")
+        conn = connect("agriculture.db", ANALYTICS)
         cur = conn.cursor()
         
         print("\n\n📋 Sample Data Preview:")
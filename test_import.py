@@ -0,0 +1,157 @@
+# test_import.py
+# The importer's bookkeeping: an import stopped part way and continued with
+# resume=True ends up with the same rows as one that ran straight through,
+# and feeds that repeat a key leave one row per key however often they are
+# loaded.
+import gzip
+import os
+from itertools import islice
+import pytest
+import agriculture
+from agriculture import collapseDuplicates, createTables, importCSV, openConnection
+from checkpoints import DONE, load_checkpoint
+from feeds import FeedSource, read_feed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def feed_lines(table, rows):
+    with open(os.path.join(HERE, f"{table}.csv"), "rb") as f:
+        return list(islice(f, rows + 1))
+
+def new_db(path, parents=()):
+    """A database holding the head of each parent feed; crops and districts
+    are created on demand, markets are not."""
+    conn = openConnection(str(path))
+    createTables(conn)
+    for table in parents:
+        feed = path.parent / f"{table}.csv"
+        if not feed.exists():
+            feed.write_bytes(b"".join(feed_lines(table, 200)))
+        importCSV(conn, table, source=FeedSource(str(feed)))
+    return conn
+
+def small_batches(stop_after=None):
+    """read_feed in batches of a few rows, raising KeyboardInterrupt in
+    place of batch number stop_after as a killed import would."""
+    def read(source, table=None, start=0):
+        header, batches = read_feed(source, table, start, batch_bytes=1024, batch_rows=25)
+        def cut():
+            for i, batch in enumerate(batches):
+                if i == stop_after:
+                    raise KeyboardInterrupt
+                yield batch
+        return header, cut()
+    return read
+
+def table_rows(conn, table):
+    return conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+
+def blank_lines(lines):
+    """The feed with blank lines scattered through it, and one run longer
+    than a whole stream batch."""
+    out = [lines[0]]
+    for i, line in enumerate(lines[1:], 1):
+        out.append(line)
+        if i % 9 == 0:
+            out.append(b"\r\n" if i % 2 else b"\n")
+        if i == 60:
+            out.extend([b"\n"] * 40)
+    return out
+
+@pytest.mark.parametrize("kind", ["plain", "gzip"])
+def test_resume_after_interrupt(kind, tmp_path, monkeypatch):
+    table = "crop_arrival_price"
+    lines = blank_lines(feed_lines(table, 200))
+    if kind == "plain":
+        path = tmp_path / f"{table}.csv"
+        path.write_bytes(b"".join(lines))
+    else:
+        path = tmp_path / f"{table}.csv.gz"
+        path.write_bytes(gzip.compress(b"".join(lines)))
+    source = FeedSource(str(path))
+
+    whole = new_db(tmp_path / "whole.db", ["markets"])
+    monkeypatch.setattr(agriculture, "read_feed", small_batches())
+    importCSV(whole, table, source=source)
+
+    conn = new_db(tmp_path / "resumed.db", ["markets"])
+    monkeypatch.setattr(agriculture, "read_feed", small_batches(stop_after=3))
+    with pytest.raises(KeyboardInterrupt):
+        importCSV(conn, table, source=source)
+    conn.rollback()
+    stopped = load_checkpoint(conn, table)
+    assert 0 < stopped.rows_done < 200
+    assert len(table_rows(conn, table)) == stopped.loaded
+
+    monkeypatch.setattr(agriculture, "read_feed", small_batches())
+    importCSV(conn, table, source=source, resume=True)
+    done = load_checkpoint(conn, table)
+    assert done.status == DONE
+    assert done.rows_done == done.loaded == 200
+    assert conn.execute("SELECT COUNT(*) FROM import_quarantine").fetchone()[0] == 0
+    assert table_rows(conn, table) == table_rows(whole, table)
+
+def test_resume_after_finished_feed_changed(tmp_path):
+    table = "crop_district"
+    path = tmp_path / f"{table}.csv"
+    path.write_bytes(b"".join(feed_lines(table, 50)))
+    source = FeedSource(str(path))
+    conn = new_db(tmp_path / "agriculture.db")
+    importCSV(conn, table, source=source)
+    assert load_checkpoint(conn, table).status == DONE
+
+    # The same feed is skipped
+    before = table_rows(conn, table)
+    importCSV(conn, table, source=source, resume=True)
+    assert table_rows(conn, table) == before
+
+    # A touched one is not taken for the feed that finished
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with pytest.raises(SystemExit):
+        importCSV(conn, table, source=source, resume=True)
+
+def test_collapse_duplicates_keeps_last_of_each_key():
+    good = [(1, 1, "a"), (1, 2, "b"), (1, 1, "c"), (None, 1, "d"), (None, 1, "e"), (2, None, "f")]
+    lines = [2, 3, 4, 5, 6, 7]
+    kept, kept_lines, dropped = collapseDuplicates(good, lines, [0, 1])
+    # NULL keys never match, as in the unique index
+    assert kept == [(1, 2, "b"), (1, 1, "c"), (None, 1, "d"), (None, 1, "e"), (2, None, "f")]
+    assert kept_lines == [3, 4, 5, 6, 7]
+    assert dropped == 1
+
+def test_reimport_keeps_one_row_per_key(tmp_path, monkeypatch):
+    table = "crop_district"
+    lines = feed_lines(table, 100)
+    header, rows = lines[0], lines[1:]
+    monkeypatch.setattr(agriculture, "read_feed", small_batches())
+    conn = new_db(tmp_path / "agriculture.db")
+
+    def load(name, feed):
+        path = tmp_path / name
+        path.write_bytes(b"".join([header] + feed))
+        importCSV(conn, table, source=FeedSource(str(path)))
+        return load_checkpoint(conn, table).loaded
+
+    def count(sql):
+        return conn.execute(sql).fetchone()[0]
+
+    # Repeats within a batch and across batches
+    assert load(f"{table}.csv", rows + rows[:3] + rows[40:45]) == 100
+    assert count(f"SELECT COUNT(*) FROM {table}") == 100
+    assert count(f"SELECT COUNT(*) FROM (SELECT DISTINCT crop_id, district_id FROM {table})") == 100
+
+    # Loading the same feed again changes nothing
+    before = table_rows(conn, table)
+    assert load(f"{table}.csv", rows + rows[:3] + rows[40:45]) == 0
+    assert table_rows(conn, table) == before
+
+    # A later feed that corrects a row replaces it
+    changed = rows[4].replace(b",1.", b",9.", 1)
+    assert changed != rows[4]
+    assert load(f"{table}_fix.csv", [changed]) == 1
+    assert count(f"SELECT COUNT(*) FROM {table}") == 100
+    crop_id, district_id, avg_yield = changed.decode("utf-8").split(",")[:3]
+    assert count(f"""SELECT avg_yield FROM {table}
+                     WHERE crop_id = {int(crop_id)} AND district_id = {int(district_id)}""") \
+        == pytest.approx(float(avg_yield))
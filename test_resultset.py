@@ -0,0 +1,62 @@
+# test_resultset.py
+# ResultSet views against SQLite: sorted_by orders like ORDER BY, and
+# where/sorted_by views compose over the shared column storage.
+import sqlite3
+import pytest
+from resultset import ResultSet, fetch
+
+ROWS = [
+    (1, "Rice", 2.5, 10),
+    (2, "wheat", None, 3),
+    (3, "Maize", 1.25, None),
+    (4, None, -4.0, 7),
+    (5, "Rice", 2.5, 3),
+    (6, "Äpfel", 0.0, -1),
+    (7, "barley", 1e9, 3),
+    (8, "Rice", None, 12),
+]
+COLUMNS = ["id", "name", "price", "qty"]
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, price REAL, qty INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", ROWS)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def rs(conn):
+    return fetch(conn, "SELECT * FROM t ORDER BY id")
+
+def test_round_trip(rs):
+    assert rs.columns == COLUMNS
+    assert list(rs) == ROWS
+    assert rs[2] == ROWS[2]
+    assert rs.column("price") == [r[2] for r in ROWS]
+    assert list(ResultSet.from_rows(COLUMNS, ROWS)) == ROWS
+
+@pytest.mark.parametrize("col", COLUMNS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_sorted_by_matches_order_by(conn, rs, col, descending):
+    order = "DESC" if descending else "ASC"
+    expected = [r[0] for r in conn.execute(f"SELECT {col} FROM t ORDER BY {col} {order}")]
+    view = rs.sorted_by(col, descending)
+    assert view.column(col) == expected
+    # Whole rows travel together
+    assert sorted(view) == sorted(ROWS)
+
+def test_where(rs):
+    cheap = rs.where("price", lambda v: v is not None and v < 2)
+    assert list(cheap) == [r for r in ROWS if r[2] is not None and r[2] < 2]
+    assert list(rs.where(1, lambda v: v == "Rice")) == [r for r in ROWS if r[1] == "Rice"]
+    assert len(rs.where("qty", lambda v: False)) == 0
+
+def test_views_compose(conn, rs):
+    expected = [r for r in conn.execute("SELECT * FROM t WHERE name = 'Rice' ORDER BY qty DESC")]
+    rice = rs.where("name", lambda v: v == "Rice")
+    assert list(rice.sorted_by("qty", descending=True)) == expected
+    # Filtering a sorted view keeps its order
+    assert list(rs.sorted_by("qty", descending=True).where("name", lambda v: v == "Rice")) == expected
+    # The unsorted set is untouched by its views
+    assert list(rs) == ROWS
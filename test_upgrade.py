@@ -0,0 +1,48 @@
+# test_upgrade.py
+# The agriculture.db shipped in the repository predates most of the schema;
+# after upgradeDatabase every catalog read and the derived tables behind the
+# GUI panels work on a copy of it.
+import os
+import shutil
+import pytest
+import query_catalog
+from agriculture import upgradeDatabase
+from mutations import refresh_derived
+from profiles import INTERACTIVE, connect
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(scope="module")
+def upgraded(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("shipped") / "agriculture.db")
+    shutil.copyfile(os.path.join(HERE, "agriculture.db"), path)
+    upgradeDatabase(path)
+    return path
+
+def test_catalog_reads(upgraded):
+    conn = query_catalog.connect(upgraded)
+    try:
+        for name in query_catalog.read_queries():
+            query_catalog.run(conn, name)
+    finally:
+        conn.close()
+
+def test_derived_tables_filled(upgraded):
+    conn = connect(upgraded, INTERACTIVE)
+    try:
+        for table in ("crop_district_rollup", "search_index", "price_daily", "cube_cells", "column_stats"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0], table
+        # An edit through the interactive connection refreshes cleanly
+        conn.execute("UPDATE crop_production_statistic SET production = production + 1 WHERE stat_id = 1")
+        conn.commit()
+        refresh_derived(conn)
+    finally:
+        conn.close()
+
+def test_upgrade_is_repeatable(upgraded):
+    upgradeDatabase(upgraded)
+    conn = query_catalog.connect(upgraded)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM yearly_state_production").fetchone()[0]
+    finally:
+        conn.close()
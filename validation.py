@@ -0,0 +1,269 @@
+# validation.py
+# Per-column type and range rules for the CSV importer, and the quarantine
+# that rejected rows go to. Rules are compiled once per table into lists of
+# column positions, so a clean row costs one converter call per column plus
+# a few comparisons; only a rejected row builds anything extra.
+import json
+import math
+import operator
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Reason codes stored with every quarantined row
+BAD_NUMBER = "bad_number"
+OUT_OF_RANGE = "out_of_range"
+BAD_ORDER = "bad_order"
+DUPLICATE = "duplicate"
+CONSTRAINT = "constraint"
+
+# Columns that are integers in the feeds even where the declared type is not
+INTEGER_COLUMNS = {"crop_id", "district_id", "pesticide_id", "arrival_id", "stat_id",
+                   "requirement_id", "weather_id", "record_id", "market_id", "year"}
+
+# (table, column) -> (min, max); None leaves that side open
+RANGES = {
+    ("crop_requirements", "ph"): (0, 14),
+    ("crop_requirements", "humidity"): (0, 100),
+    ("crop_requirements", "rainfall"): (0, None),
+    ("sustainability_data", "soil_ph"): (0, 14),
+    ("sustainability_data", "rainfall_mm"): (0, None),
+    ("sustainability_data", "fertilizer_used"): (0, None),
+    ("sustainability_data", "pesticide_usage"): (0, None),
+    ("sustainability_data", "crop_yield"): (0, None),
+    ("crop_arrival_price", "arrival_tonnes"): (0, None),
+    ("crop_arrival_price", "min_price_rs_per_quintal"): (0, None),
+    ("crop_arrival_price", "max_price_rs_per_quintal"): (0, None),
+    ("crop_arrival_price", "modal_price_rs_per_quintal"): (0, None),
+    ("crop_production_statistic", "area"): (0, None),
+    ("crop_production_statistic", "production"): (0, None),
+    ("crop_production_statistic", "yield"): (0, None),
+    ("crop_district", "avg_yield"): (0, None),
+    ("crop_district", "total_area"): (0, None),
+    ("pesticide_use", "low_estimate"): (0, None),
+    ("pesticide_use", "high_estimate"): (0, None),
+    ("farm_weather", "humidity"): (0, 100),
+    ("farm_weather", "windspeed"): (0, None),
+    ("farm_weather", "precipitation"): (0, None),
+}
+
+# table -> chains of columns that must be non-decreasing where present
+ORDERS = {
+    "crop_arrival_price": [("min_price_rs_per_quintal", "modal_price_rs_per_quintal", "max_price_rs_per_quintal")],
+    "farm_weather": [("minT", "maxT")],
+}
+
+class Reject(Exception):
+    def __init__(self, reason: str, column: Optional[str], detail: str):
+        super().__init__(f"{reason}: {detail}")
+        self.reason = reason
+        self.column = column
+        self.detail = detail
+
+def _to_int(v):
+    return int(float(v))
+
+def _to_float(v):
+    f = float(v)
+    if not math.isfinite(f):
+        raise ValueError(v)
+    return f
+
+class TableRules:
+    """Converts one table's raw CSV strings to typed values, or raises Reject."""
+
+    def __init__(self, table: str, columns: Sequence[str], types: Sequence[str]):
+        self.table = table
+        self.columns = list(columns)
+        self.converters = []
+        # Builtins tried first on a whole column; the checked converters
+        # above only run when a column has something they would catch
+        self.fast = []
+        for col, decl in zip(columns, types):
+            decl = (decl or "").upper()
+            if col in INTEGER_COLUMNS or "INT" in decl:
+                self.converters.append(_to_int)
+                self.fast.append(int)
+            elif "REAL" in decl or "FLOA" in decl or "DOUB" in decl:
+                self.converters.append(_to_float)
+                self.fast.append(float)
+            else:
+                self.converters.append(None)
+                self.fast.append(None)
+        pos = {c: i for i, c in enumerate(columns)}
+        self.ranges = [(pos[c], lo, hi, c) for (t, c), (lo, hi) in RANGES.items() if t == table and c in pos]
+        self.orders = [[(pos[c], c) for c in chain if c in pos] for chain in ORDERS.get(table, [])]
+
+    def convert(self, raw: Sequence[Optional[str]]) -> List:
+        """raw holds one stripped string (or None when absent/empty) per column."""
+        values = list(raw)
+        for i, conv in enumerate(self.converters):
+            v = values[i]
+            if v is not None and conv is not None:
+                try:
+                    values[i] = conv(v)
+                except (ValueError, OverflowError):
+                    raise Reject(BAD_NUMBER, self.columns[i], f"{self.columns[i]}={v!r} is not a number")
+        for i, lo, hi, col in self.ranges:
+            v = values[i]
+            if v is not None and ((lo is not None and v < lo) or (hi is not None and v > hi)):
+                bound = f"below {lo}" if hi is None else f"above {hi}" if lo is None else f"outside [{lo}, {hi}]"
+                raise Reject(OUT_OF_RANGE, col, f"{col}={v} {bound}")
+        for chain in self.orders:
+            prev = None
+            for i, col in chain:
+                v = values[i]
+                if v is None:
+                    continue
+                if prev is not None and v < prev[0]:
+                    raise Reject(BAD_ORDER, col, f"{prev[1]}={prev[0]} > {col}={v}")
+                prev = (v, col)
+        return values
+
+    def convert_columns(self, raw_columns: Sequence[Optional[Sequence[str]]], n: int) -> Tuple[List[List], Dict[int, Reject]]:
+        """Batch form of convert(): one list of unstripped strings per
+        column (None for a column the feed lacks). Conversions and range
+        checks run a column at a time; rows that trip anything are re-run
+        through convert() so the reject matches the per-row path exactly.
+        Returns the converted columns and {row number: Reject}."""
+        suspect = set()
+        out = []
+        for i, conv in enumerate(self.converters):
+            col = raw_columns[i]
+            if col is None:
+                out.append([None] * n)
+                continue
+            col = list(map(str.strip, col))
+            if "" in col:
+                col = [v or None for v in col]
+            if conv is not None:
+                try:
+                    converted = list(map(self.fast[i], col))
+                    if self.fast[i] is float and not math.isfinite(sum(converted)):
+                        raise ValueError
+                    col = converted
+                except (ValueError, TypeError, OverflowError):
+                    slow = []
+                    for j, v in enumerate(col):
+                        if v is None:
+                            slow.append(None)
+                            continue
+                        try:
+                            slow.append(conv(v))
+                        except (ValueError, OverflowError):
+                            suspect.add(j)
+                            slow.append(None)
+                    col = slow
+            out.append(col)
+        for i, lo, hi, _ in self.ranges:
+            col = out[i]
+            present = [v for v in col if v is not None] if None in col else col
+            if present and ((lo is not None and min(present) < lo) or (hi is not None and max(present) > hi)):
+                suspect.update(j for j, v in enumerate(col) if v is not None and
+                               ((lo is not None and v < lo) or (hi is not None and v > hi)))
+        for chain in self.orders:
+            cols = [out[i] for i, _ in chain]
+            if not any(None in c for c in cols):
+                for a, b in zip(cols, cols[1:]):
+                    if any(map(operator.gt, a, b)):
+                        suspect.update(j for j, (x, y) in enumerate(zip(a, b)) if x > y)
+            else:
+                for j, values in enumerate(zip(*cols)):
+                    present = [v for v in values if v is not None]
+                    if any(x > y for x, y in zip(present, present[1:])):
+                        suspect.add(j)
+        rejects = {}
+        for j in suspect:
+            raw = [None if c is None else (c[j].strip() or None) for c in raw_columns]
+            try:
+                values = self.convert(raw)
+            except Reject as r:
+                rejects[j] = r
+                continue
+            for i, v in enumerate(values):
+                out[i][j] = v
+        return out, rejects
+
+def table_rules(conn, table: str) -> TableRules:
+    info = conn.execute(f"PRAGMA table_info({table});").fetchall()
+    return TableRules(table, [c[1] for c in info], [c[2] for c in info])
+
+def classify_error(e: sqlite3.Error) -> Tuple[str, Optional[str], str]:
+    msg = str(e)
+    if "UNIQUE constraint failed" in msg:
+        return DUPLICATE, msg.split(": ", 1)[-1], msg
+    return CONSTRAINT, None, msg
+
+# -------------------------
+# QUARANTINE
+# -------------------------
+
+QUARANTINE_BATCH = 500
+
+def create_quarantine(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS import_quarantine (
+        quarantine_id INTEGER PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        line INTEGER,
+        reason TEXT NOT NULL,
+        column_name TEXT,
+        detail TEXT,
+        raw TEXT,                      -- the CSV row as JSON
+        imported_at TEXT
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quarantine_table_reason ON import_quarantine (table_name, reason)")
+
+class Quarantine:
+    """Buffers rejected rows and writes them in batches, to the
+    import_quarantine table or, with a path, as JSON lines to a file."""
+
+    def __init__(self, conn, path: Optional[str] = None, batch: int = QUARANTINE_BATCH):
+        self.conn = conn
+        self.path = path
+        self.batch = batch
+        self.pending: List[Tuple] = []
+        self.counts: Counter = Counter()
+        self.stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def start_table(self, table: str, resume: bool = False):
+        # A re-import replaces that table's earlier rejects; a resumed one
+        # keeps those from the batches already committed
+        if self.path is None and not resume:
+            self.conn.execute("DELETE FROM import_quarantine WHERE table_name = ?", (table,))
+
+    def add(self, table: str, line: int, reason: str, column: Optional[str], detail: str, raw):
+        self.counts[(table, reason)] += 1
+        self.pending.append((table, line, reason, column, detail, json.dumps(raw, ensure_ascii=False)))
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.path is None:
+            self.conn.executemany("""INSERT INTO import_quarantine
+                                     (table_name, line, reason, column_name, detail, raw, imported_at)
+                                     VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                  [p + (self.stamp,) for p in self.pending])
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for table, line, reason, column, detail, raw in self.pending:
+                    f.write(json.dumps({"table": table, "line": line, "reason": reason, "column": column,
+                                        "detail": detail, "raw": json.loads(raw), "imported_at": self.stamp}) + "\n")
+        self.pending = []
+
+    def table_summary(self, table: str) -> Dict[str, int]:
+        return {reason: n for (t, reason), n in sorted(self.counts.items()) if t == table}
+
+    def report(self):
+        self.flush()
+        if not self.counts:
+            print("Validation: no rows quarantined")
+            return
+        where = self.path or "import_quarantine"
+        print(f"Validation: {sum(self.counts.values())} rows quarantined to {where}")
+        for (table, reason), n in sorted(self.counts.items()):
+            print(f"  {table:28s} {reason:14s} {n}")
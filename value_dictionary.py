@@ -0,0 +1,148 @@
+# value_dictionary.py
+# Per-column distinct values, frequencies and numeric ranges built at import
+# time, so filter dropdowns never have to scan the table they describe.
+import sqlite3
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from feeds import FEED_TABLES
+from profiles import ANALYTICS, connect
+
+# Most frequent values kept per column; the stats row still records the
+# full distinct count for key-like columns that exceed it.
+MAX_VALUES_PER_COLUMN = 5000
+
+def create_value_dictionary(conn):
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS column_values (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        value,
+        frequency INTEGER NOT NULL,
+        PRIMARY KEY (table_name, column_name, value)
+    ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS column_stats (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        non_null_count INTEGER,
+        distinct_count INTEGER,
+        min_value REAL,
+        max_value REAL,
+        PRIMARY KEY (table_name, column_name)
+    ) WITHOUT ROWID;
+    """)
+
+def build_value_dictionary(conn, tables=None):
+    # Only the feed tables: derived and bookkeeping tables are never filtered on
+    cur = conn.cursor()
+    if tables is None:
+        tables = FEED_TABLES
+        keep = ", ".join("?" * len(tables))
+        cur.execute(f"DELETE FROM column_values WHERE table_name NOT IN ({keep})", tables)
+        cur.execute(f"DELETE FROM column_stats WHERE table_name NOT IN ({keep})", tables)
+    for table in tables:
+        cur.execute("DELETE FROM column_values WHERE table_name = ?", (table,))
+        cur.execute("DELETE FROM column_stats WHERE table_name = ?", (table,))
+        cur.execute(f"PRAGMA table_info({table});")
+        for col in cur.fetchall():
+            name, decl = col[1], (col[2] or "").upper()
+            numeric = any(t in decl for t in ("INT", "REAL", "FLOA", "DOUB", "NUM"))
+            cur.execute(f"""
+            INSERT INTO column_values (table_name, column_name, value, frequency)
+            SELECT ?, ?, {name}, COUNT(*) FROM {table}
+            WHERE {name} IS NOT NULL
+            GROUP BY {name}
+            ORDER BY COUNT(*) DESC
+            LIMIT ?
+            """, (table, name, MAX_VALUES_PER_COLUMN))
+            range_sql = f"MIN({name}), MAX({name})" if numeric else "NULL, NULL"
+            cur.execute(f"""
+            INSERT INTO column_stats (table_name, column_name, non_null_count, distinct_count, min_value, max_value)
+            SELECT ?, ?, COUNT({name}), COUNT(DISTINCT {name}), {range_sql} FROM {table}
+            """, (table, name))
+    conn.commit()
+
+class ValueDictionary:
+    """In-memory view of column_values for top-N and prefix lookups."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # PRAGMA data_version on a connection kept open moves whenever
+        # another connection commits, WAL commits and backups included
+        self._conn: Optional[sqlite3.Connection] = None
+        self.version = None
+        self.top: Dict[Tuple[str, str], List[str]] = {}
+        self.sorted_keys: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        self.stats: Dict[Tuple[str, str], Tuple] = {}
+        self.available = False
+
+    def _data_version(self) -> int:
+        if self._conn is None:
+            self._conn = connect(self.db_path, ANALYTICS, check_same_thread=False)
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self):
+        self.version = self._data_version()
+        self.top, self.sorted_keys, self.stats = {}, {}, {}
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            for table, column, non_null, distinct, lo, hi in conn.execute("SELECT * FROM column_stats"):
+                self.stats[(table, column)] = (non_null, distinct, lo, hi)
+            self.available = True
+        except sqlite3.OperationalError:
+            self.available = False
+        finally:
+            conn.close()
+
+    def refresh_if_stale(self):
+        if self.version != self._data_version():
+            self.load()
+
+    def values(self, table: str, column: str) -> List[str]:
+        # Columns are pulled in on first use with one primary-key range read
+        key = (table, column)
+        if key not in self.top:
+            values = []
+            if self.available:
+                conn = connect(self.db_path, ANALYTICS)
+                try:
+                    cur = conn.execute("""SELECT value FROM column_values
+                                          WHERE table_name = ? AND column_name = ?
+                                          ORDER BY frequency DESC""", key)
+                    values = [str(r[0]) for r in cur.fetchall()]
+                finally:
+                    conn.close()
+            self.top[key] = values
+            self.sorted_keys[key] = sorted((v.lower(), v) for v in values)
+        return self.top[key]
+
+    def top_values(self, table: str, column: str, n: int = 50) -> List[str]:
+        return self.values(table, column)[:n]
+
+    def complete(self, table: str, column: str, prefix: str, n: int = 50) -> List[str]:
+        self.values(table, column)
+        keys = self.sorted_keys[(table, column)]
+        prefix = prefix.lower()
+        out = []
+        i = bisect_left(keys, (prefix, ""))
+        while i < len(keys) and len(out) < n and keys[i][0].startswith(prefix):
+            out.append(keys[i][1])
+            i += 1
+        return out
+
+    def column_stats(self, table: str, column: str) -> Optional[Tuple]:
+        """(non_null_count, distinct_count, min_value, max_value) or None."""
+        return self.stats.get((table, column))
+
+_dictionaries: Dict[str, ValueDictionary] = {}
+
+def get_value_dictionary(db_path: str) -> ValueDictionary:
+    vd = _dictionaries.get(db_path)
+    if vd is None:
+        vd = _dictionaries[db_path] = ValueDictionary(db_path)
+        vd.load()
+    else:
+        vd.refresh_if_stale()
+    return vd
@@ -1,42 +1,116 @@
 # view_panels.py - COMPLETE VERSION
-import sqlite3
+import json
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import List, Tuple
 from gui_components import TreeTable, info_popup
-
-def run_query(db_path: str, query: str, params: tuple = ()) -> Tuple[List[str], List[Tuple]]:
-    conn = sqlite3.connect(db_path)
+from search_index import search_ids
+from price_series import series_report
+from resultset import ResultSet
+from sharded import run_sharded
+from profiles import ANALYTICS, connect
+from suitability import load_matrix
+from exposure import LEVELS as EXPOSURE_LEVELS, RANK_BY, by_compound, rank
+from rollup_cube import CELL_COLUMNS, GEO_LEVELS, CROP_LEVELS, cell, drill_down_geo, drill_down_crop, roll_up_geo
+
+def run_query(db_path: str, query: str, params: tuple = ()) -> Tuple[List[str], ResultSet]:
+    conn = connect(db_path, ANALYTICS)
     cur = conn.cursor()
     try:
         cur.execute(query, params)
-        cols = [d[0] for d in cur.description] if cur.description else []
-        rows = cur.fetchall()
-        return cols, rows
+        rows = ResultSet.from_cursor(cur)
+        return rows.columns, rows
     finally:
         conn.close()
 
 class BasePanel(ttk.Frame):
+    # Panels listing one searchable entity set these so the filter box goes
+    # through the FTS index (see search_index.SEARCH_SOURCES); others fall
+    # back to a substring match over the rows already shown.
+    search_kind = None
+    search_key = None
+    # Whether the panel can load itself when its tab is first shown
+    auto_refresh = True
+
     def __init__(self, parent, db_path: str, status_bar, **kwargs):
         super().__init__(parent, **kwargs)
         self.db_path = db_path
         self.status = status_bar
+        self.cols = []
+        self.rows = ResultSet([], [])
+        self.shown = self.rows
+        self.sort_col = None
+        self.sort_desc = False
+        self._filter_job = None
         self.topbar = ttk.Frame(self)
         self.topbar.pack(fill=tk.X, pady=6)
         self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", self.schedule_filter)
         ttk.Label(self.topbar, text="Filter / Search:").pack(side=tk.LEFT, padx=(2,4))
         ttk.Entry(self.topbar, textvariable=self.filter_var, width=30).pack(side=tk.LEFT)
         ttk.Button(self.topbar, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=6)
         ttk.Button(self.topbar, text="Export CSV", command=self.export_csv).pack(side=tk.LEFT)
-        self.table = TreeTable(self)
+        self.table = TreeTable(self, on_heading=self.sort_by)
         self.table.pack(fill=tk.BOTH, expand=True, pady=(6,0))
 
     def refresh(self):
         raise NotImplementedError
 
+    def show_results(self, cols, rows):
+        self.cols = list(cols)
+        self.rows = rows if isinstance(rows, ResultSet) else ResultSet.from_rows(cols, rows)
+        self.table.set_columns(cols)
+        # A refresh keeps the current sort when the column is still there
+        if self.sort_col not in self.cols:
+            self.sort_col, self.sort_desc = None, False
+        self.table.mark_sorted(self.sort_col, self.sort_desc)
+        self.apply_filter()
+
+    def sort_by(self, col):
+        # Reorders the cached result; the permutation per column is computed
+        # once (ResultSet.sorted_by), so flipping or re-sorting is a view
+        start = time.perf_counter()
+        self.sort_desc = not self.sort_desc if col == self.sort_col else False
+        self.sort_col = col
+        self.table.mark_sorted(col, self.sort_desc)
+        self.apply_filter()
+        self.status.set_status(f"Sorted {len(self.shown)} rows by {col} "
+                               f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    def schedule_filter(self, *args):
+        # Debounce keystrokes so fast typing only runs the last search
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(80, self.apply_filter)
+
+    def apply_filter(self):
+        self._filter_job = None
+        text = self.filter_var.get().strip()
+        rows = self.rows
+        if self.sort_col is not None:
+            # Filtering a sorted view keeps its order
+            rows = rows.sorted_by(self.sort_col, self.sort_desc)
+        if text:
+            ids = None
+            if self.search_kind and self.search_key in self.cols:
+                ids = search_ids(self.db_path, text, self.search_kind)
+            if ids is not None:
+                rows = rows.where(self.search_key, ids.__contains__)
+            else:
+                rows = rows.search(text)
+        self.shown = rows
+        self.table.clear()
+        self.table.insert_rows(rows)
+        if text:
+            self.status.set_status(f"{len(rows)} of {len(self.rows)} rows match '{text}'")
+
     def export_csv(self):
-        rows = self.table.get_all_rows()
-        cols = self.table.tree["columns"]
+        # Written from the cached result, so values keep their SQLite types
+        rows, cols = self.shown, self.cols
         if not rows:
             info_popup("No data to export")
             return
@@ -51,18 +125,69 @@ class BasePanel(ttk.Frame):
         info_popup(f"Exported {len(rows)} rows to {path}")
 
 # ============ DASHBOARD ============
+# Every scalar on the dashboard in one statement; run together with the two
+# list queries inside a single read transaction.
+DASHBOARD_SCALARS_SQL = """
+SELECT
+    (SELECT COUNT(DISTINCT district_id) FROM districts) AS total_districts,
+    (SELECT COUNT(DISTINCT crop_id) FROM crops) AS total_crops,
+    (SELECT COUNT(DISTINCT market_id) FROM markets) AS total_markets,
+    (SELECT COUNT(*) FROM crop_production_statistic) AS total_records,
+    (SELECT ROUND(AVG(sustainability_score), 2) FROM sustainability_data) AS avg_sustain,
+    (SELECT COUNT(DISTINCT district_id) FROM pesticide_use WHERE high_estimate > 50) AS high_pesticide_districts,
+    (SELECT ROUND(AVG(rainfall_mm), 2) FROM sustainability_data) AS avg_rainfall,
+    (SELECT COUNT(DISTINCT state_name) FROM districts) AS states_count,
+    (SELECT COUNT(DISTINCT compound) FROM pesticide_use) AS pesticide_compounds,
+    (SELECT COUNT(*) FROM farm_weather) AS weather_records,
+    (SELECT COUNT(*) FROM crop_requirements) AS requirements_count
+"""
+
+DASHBOARD_TOP_CROPS_SQL = """
+SELECT c.crop_name, ROUND(SUM(r.sum_yield) / SUM(r.yield_count), 3) as avg_yield,
+       ROUND(SUM(r.yield_production), 2) as total_prod
+FROM crop_district_rollup r
+JOIN crops c ON r.crop_id = c.crop_id
+GROUP BY c.crop_name
+HAVING SUM(r.yield_count) > 0
+ORDER BY avg_yield DESC
+LIMIT 5
+"""
+
+DASHBOARD_MARKET_SQL = """
+SELECT c.crop_name, m.market_name, ROUND(cap.modal_price_rs_per_quintal, 2) as price, ROUND(cap.arrival_tonnes, 2) as arrival
+FROM crop_arrival_price cap
+LEFT JOIN crops c ON cap.crop_id = c.crop_id
+LEFT JOIN markets m ON cap.market_id = m.market_id
+WHERE cap.modal_price_rs_per_quintal IS NOT NULL
+ORDER BY cap.arrival_date DESC
+LIMIT 5
+"""
+
 class DashboardPanel(ttk.Frame):
-    def __init__(self, parent, db_path: str, status_bar, **kwargs):
+    def __init__(self, parent, db_path: str, status_bar, refresh_interval: int = 0, **kwargs):
         super().__init__(parent, **kwargs)
         self.db_path = db_path
         self.status = status_bar
+        self.snapshot_path = os.path.splitext(db_path)[0] + "_dashboard.json"
+        self.values = {}
+        self.results = queue.Queue()
+        self.loading = False
+        self.last_version = None
+        self.version_conn = None
+        self.auto_var = tk.IntVar(value=refresh_interval)
         self.create_dashboard()
 
     def create_dashboard(self):
         title_frame = ttk.Frame(self)
         title_frame.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(title_frame, text="📊 Agricultural Database Dashboard", font=('Arial', 16, 'bold')).pack()
-        ttk.Label(title_frame, text="Real-time insights from agricultural data", font=('Arial', 10)).pack()
+        self.subtitle = ttk.Label(title_frame, text="Real-time insights from agricultural data", font=('Arial', 10))
+        self.subtitle.pack()
+        auto = ttk.Frame(title_frame)
+        auto.pack()
+        ttk.Label(auto, text="Auto-refresh (s, 0 = off):").pack(side=tk.LEFT)
+        ttk.Spinbox(auto, from_=0, to=3600, increment=15, width=6, textvariable=self.auto_var).pack(side=tk.LEFT, padx=4)
+        ttk.Button(auto, text="Refresh", command=self.refresh).pack(side=tk.LEFT)
 
         canvas = tk.Canvas(self)
         scrollbar = ttk.Scrollbar(self, orient="vertical", command=canvas.yview)
@@ -71,7 +196,7 @@ class DashboardPanel(ttk.Frame):
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
         self.content_frame = scrollable_frame
-        
+
         self.create_key_metrics()
         self.create_production_insights()
         self.create_sustainability_insights()
@@ -81,11 +206,58 @@ class DashboardPanel(ttk.Frame):
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-    def create_metric_card(self, parent, title: str, value: str, color: str = "#2196F3"):
+        # Paint last session's numbers straight away; live figures replace
+        # them when the background query finishes
+        snapshot = self.load_snapshot()
+        if snapshot:
+            self.update_view(snapshot)
+            self.subtitle.config(text=f"Snapshot from {snapshot['taken_at']} - refreshing...")
+        self.refresh()
+        self.after(1000, self.poll_auto_refresh)
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_snapshot(self, data):
+        try:
+            with open(self.snapshot_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+    def collect_metrics(self) -> dict:
+        conn = connect(self.db_path, ANALYTICS)
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN")
+            cur.execute(DASHBOARD_SCALARS_SQL)
+            s = cur.fetchone()
+            cur.execute(DASHBOARD_TOP_CROPS_SQL)
+            top_crops = cur.fetchall()
+            cur.execute(DASHBOARD_MARKET_SQL)
+            market_activity = cur.fetchall()
+            conn.rollback()
+        finally:
+            conn.close()
+        return {
+            "key_metrics": list(s[0:4]),
+            "top_crops": top_crops,
+            "sustainability": [s[4] or 0, s[5], s[6] or 0],
+            "market_activity": market_activity,
+            "quick_stats": list(s[7:11]),
+            "taken_at": time.strftime("%Y-%m-%d %H:%M"),
+        }
+
+    def create_metric_card(self, parent, key: str, title: str, color: str = "#2196F3"):
         card = ttk.Frame(parent, relief=tk.RAISED, borderwidth=2)
         card.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.BOTH, expand=True)
         ttk.Label(card, text=title, font=('Arial', 9, 'bold'), foreground='gray').pack(pady=(10, 5))
-        ttk.Label(card, text=value, font=('Arial', 20, 'bold'), foreground=color).pack(pady=(0, 10))
+        self.values[key] = ttk.Label(card, text="…", font=('Arial', 20, 'bold'), foreground=color)
+        self.values[key].pack(pady=(0, 10))
         return card
 
     def create_section_header(self, parent, text: str):
@@ -99,21 +271,10 @@ class DashboardPanel(ttk.Frame):
         self.create_section_header(self.content_frame, "📈 Key Metrics")
         metrics_frame = ttk.Frame(self.content_frame)
         metrics_frame.pack(fill=tk.X, padx=10)
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(DISTINCT district_id) FROM districts")
-        total_districts = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(DISTINCT crop_id) FROM crops")
-        total_crops = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(DISTINCT market_id) FROM markets")
-        total_markets = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM crop_production_statistic")
-        total_records = cur.fetchone()[0]
-        conn.close()
-        self.create_metric_card(metrics_frame, "Total Districts", str(total_districts), "#4CAF50")
-        self.create_metric_card(metrics_frame, "Total Crops", str(total_crops), "#2196F3")
-        self.create_metric_card(metrics_frame, "Active Markets", str(total_markets), "#FF9800")
-        self.create_metric_card(metrics_frame, "Production Records", str(total_records), "#9C27B0")
+        self.create_metric_card(metrics_frame, "districts", "Total Districts", "#4CAF50")
+        self.create_metric_card(metrics_frame, "crops", "Total Crops", "#2196F3")
+        self.create_metric_card(metrics_frame, "markets", "Active Markets", "#FF9800")
+        self.create_metric_card(metrics_frame, "records", "Production Records", "#9C27B0")
 
     def create_production_insights(self):
         self.create_section_header(self.content_frame, "🌾 Production Insights")
@@ -122,44 +283,19 @@ class DashboardPanel(ttk.Frame):
         table_frame = ttk.LabelFrame(insights_frame, text="Top 5 Crops by Average Yield", padding=10)
         table_frame.pack(fill=tk.BOTH, pady=5, expand=True)
         columns = ("Rank", "Crop Name", "Avg Yield", "Total Production")
-        tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=5)
+        self.top_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=5)
         for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120, anchor='center')
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT c.crop_name, ROUND(AVG(p.yield), 3) as avg_yield, ROUND(SUM(p.production), 2) as total_prod
-            FROM crop_production_statistic p
-            JOIN crops c ON p.crop_id = c.crop_id
-            WHERE p.yield IS NOT NULL
-            GROUP BY c.crop_name
-            ORDER BY avg_yield DESC
-            LIMIT 5
-        """)
-        for idx, row in enumerate(cur.fetchall(), 1):
-            tree.insert("", "end", values=(idx, row[0], row[1], row[2]))
-        conn.close()
-        tree.pack(fill=tk.BOTH, expand=True)
+            self.top_tree.heading(col, text=col)
+            self.top_tree.column(col, width=120, anchor='center')
+        self.top_tree.pack(fill=tk.BOTH, expand=True)
 
     def create_sustainability_insights(self):
         self.create_section_header(self.content_frame, "🌱 Sustainability Insights")
         sustain_frame = ttk.Frame(self.content_frame)
         sustain_frame.pack(fill=tk.X, padx=10)
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT ROUND(AVG(sustainability_score), 2) FROM sustainability_data WHERE sustainability_score IS NOT NULL")
-        result = cur.fetchone()
-        avg_sustain = result[0] if result and result[0] else 0
-        cur.execute("SELECT COUNT(DISTINCT district_id) FROM pesticide_use WHERE high_estimate > 50")
-        high_pesticide_districts = cur.fetchone()[0]
-        cur.execute("SELECT ROUND(AVG(rainfall_mm), 2) FROM sustainability_data WHERE rainfall_mm IS NOT NULL")
-        result = cur.fetchone()
-        avg_rainfall = result[0] if result and result[0] else 0
-        conn.close()
-        self.create_metric_card(sustain_frame, "Avg Sustainability Score", f"{avg_sustain}/10", "#4CAF50")
-        self.create_metric_card(sustain_frame, "High Pesticide Districts", str(high_pesticide_districts), "#F44336")
-        self.create_metric_card(sustain_frame, "Avg Rainfall (mm)", str(avg_rainfall), "#03A9F4")
+        self.create_metric_card(sustain_frame, "sustain", "Avg Sustainability Score", "#4CAF50")
+        self.create_metric_card(sustain_frame, "high_pesticide", "High Pesticide Districts", "#F44336")
+        self.create_metric_card(sustain_frame, "rainfall", "Avg Rainfall (mm)", "#03A9F4")
 
     def create_market_insights(self):
         self.create_section_header(self.content_frame, "💰 Market Insights")
@@ -168,146 +304,177 @@ class DashboardPanel(ttk.Frame):
         table_frame = ttk.LabelFrame(market_frame, text="Recent Market Activity (Top 5)", padding=10)
         table_frame.pack(fill=tk.BOTH, pady=5, expand=True)
         columns = ("Crop", "Market", "Price (₹/Quintal)", "Arrival (Tonnes)")
-        tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=5)
+        self.market_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=5)
         for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=150, anchor='center')
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT c.crop_name, m.market_name, ROUND(cap.modal_price_rs_per_quintal, 2) as price, ROUND(cap.arrival_tonnes, 2) as arrival
-            FROM crop_arrival_price cap
-            LEFT JOIN crops c ON cap.crop_id = c.crop_id
-            LEFT JOIN markets m ON cap.market_id = m.market_id
-            WHERE cap.modal_price_rs_per_quintal IS NOT NULL
-            ORDER BY cap.arrival_date DESC
-            LIMIT 5
-        """)
-        for row in cur.fetchall():
-            tree.insert("", "end", values=row)
-        conn.close()
-        tree.pack(fill=tk.BOTH, expand=True)
+            self.market_tree.heading(col, text=col)
+            self.market_tree.column(col, width=150, anchor='center')
+        self.market_tree.pack(fill=tk.BOTH, expand=True)
 
     def create_quick_stats(self):
         self.create_section_header(self.content_frame, "⚡ Quick Statistics")
         stats_frame = ttk.Frame(self.content_frame)
         stats_frame.pack(fill=tk.BOTH, padx=10, pady=(5, 20), expand=True)
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(DISTINCT state_name) FROM districts WHERE state_name IS NOT NULL")
-        states_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(DISTINCT compound) FROM pesticide_use WHERE compound IS NOT NULL")
-        pesticide_compounds = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM farm_weather")
-        weather_records = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM crop_requirements")
-        requirements_count = cur.fetchone()[0]
-        conn.close()
         info_frame = ttk.Frame(stats_frame)
         info_frame.pack(fill=tk.BOTH, expand=True)
         stats_data = [
-            ("📍 States Covered", states_count),
-            ("🧪 Pesticide Compounds", pesticide_compounds),
-            ("🌤️ Weather Records", weather_records),
-            ("📋 Crop Requirements", requirements_count)
+            ("states", "📍 States Covered"),
+            ("compounds", "🧪 Pesticide Compounds"),
+            ("weather", "🌤️ Weather Records"),
+            ("requirements", "📋 Crop Requirements")
         ]
-        for i, (label, value) in enumerate(stats_data):
+        for i, (key, label) in enumerate(stats_data):
             row = i // 2
             col = i % 2
             card = ttk.Frame(info_frame, relief=tk.GROOVE, borderwidth=1)
             card.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
             ttk.Label(card, text=label, font=('Arial', 10, 'bold')).pack(pady=(10, 5))
-            ttk.Label(card, text=str(value), font=('Arial', 16), foreground='#2196F3').pack(pady=(0, 10))
+            self.values[key] = ttk.Label(card, text="…", font=('Arial', 16), foreground='#2196F3')
+            self.values[key].pack(pady=(0, 10))
         info_frame.columnconfigure(0, weight=1)
         info_frame.columnconfigure(1, weight=1)
 
+    def update_view(self, data):
+        texts = dict(zip(["districts", "crops", "markets", "records"], data["key_metrics"]))
+        avg_sustain, high_pesticide, avg_rainfall = data["sustainability"]
+        texts.update(sustain=f"{avg_sustain}/10", high_pesticide=high_pesticide, rainfall=avg_rainfall)
+        texts.update(zip(["states", "compounds", "weather", "requirements"], data["quick_stats"]))
+        for key, value in texts.items():
+            self.values[key].config(text=str(value))
+        self.top_tree.delete(*self.top_tree.get_children())
+        for idx, row in enumerate(data["top_crops"], 1):
+            self.top_tree.insert("", "end", values=(idx, row[0], row[1], row[2]))
+        self.market_tree.delete(*self.market_tree.get_children())
+        for row in data["market_activity"]:
+            self.market_tree.insert("", "end", values=row)
+
     def refresh(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-        self.create_key_metrics()
-        self.create_production_insights()
-        self.create_sustainability_insights()
-        self.create_market_insights()
-        self.create_quick_stats()
+        if self.loading:
+            return
+        self.loading = True
+        self.last_version = self.data_version()
+        self.status.set_status("Refreshing dashboard...")
+        threading.Thread(target=self.load_in_background, daemon=True).start()
+        self.after(50, self.poll_results)
+
+    def load_in_background(self):
+        try:
+            data = self.collect_metrics()
+            self.save_snapshot(data)
+            self.results.put((data, None))
+        except Exception as e:
+            self.results.put((None, e))
+
+    def poll_results(self):
+        # Tk widgets are only touched from the UI thread
+        try:
+            data, err = self.results.get_nowait()
+        except queue.Empty:
+            self.after(50, self.poll_results)
+            return
+        self.loading = False
+        if err is not None:
+            self.status.set_status(f"Dashboard refresh failed: {err}")
+            return
+        self.update_view(data)
+        self.subtitle.config(text="Real-time insights from agricultural data")
         self.status.set_status("Dashboard refreshed")
 
+    def data_version(self):
+        if self.version_conn is None:
+            self.version_conn = connect(self.db_path, ANALYTICS)
+        return self.version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll_auto_refresh(self):
+        try:
+            interval = int(self.auto_var.get())
+        except (tk.TclError, ValueError):
+            interval = 0
+        if interval > 0:
+            # data_version only moves when another connection commits, so an
+            # idle database costs one PRAGMA per tick instead of a re-query
+            version = self.data_version()
+            if version != self.last_version:
+                self.last_version = version
+                self.refresh()
+        self.after(max(interval, 1) * 1000, self.poll_auto_refresh)
+
 # ============ SIMPLE VIEW PANELS ============
 class CropsPanel(BasePanel):
+    search_kind = "crop"
+    search_key = "crop_id"
+
     def refresh(self):
         q = "SELECT crop_id, crop_name, crop_group FROM crops ORDER BY crop_name"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class DistrictsPanel(BasePanel):
+    search_kind = "district"
+    search_key = "district_id"
+
     def refresh(self):
         q = "SELECT district_id, state_name, district_name FROM districts ORDER BY state_name, district_name"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class MarketsPanel(BasePanel):
+    search_kind = "market"
+    search_key = "market_id"
+
     def refresh(self):
-        q = """SELECT m.market_id, m.market_name, d.district_name, d.state_name
+        q = """SELECT m.market_id, m.market_name, d.district_name, d.state_name,
+               e.crops_fitted, e.avg_elasticity
         FROM markets m LEFT JOIN districts d ON m.district_id = d.district_id
+        LEFT JOIN (SELECT market_id, COUNT(*) AS crops_fitted, ROUND(AVG(elasticity), 3) AS avg_elasticity
+                   FROM price_elasticity WHERE market_id <> 0 GROUP BY market_id) e
+               ON e.market_id = m.market_id
         ORDER BY d.state_name, m.market_name"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class PesticidePanel(BasePanel):
+    search_kind = "compound"
+    search_key = "pesticide_id"
+
     def refresh(self):
         q = "SELECT pesticide_id, district_id, compound, low_estimate, high_estimate FROM pesticide_use ORDER BY compound"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class CropDistrictPanel(BasePanel):
     def refresh(self):
         q = "SELECT crop_id, district_id, avg_yield, total_area, best_season FROM crop_district"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class CropPesticidePanel(BasePanel):
     def refresh(self):
         q = "SELECT crop_id, pesticide_id FROM crop_pesticide"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class WeatherPanel(BasePanel):
     def refresh(self):
         q = "SELECT weather_id, district_id, maxT, minT, windspeed, humidity, precipitation FROM farm_weather ORDER BY weather_id DESC"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class SustainabilityPanel(BasePanel):
     def refresh(self):
         q = "SELECT record_id, crop_id, district_id, rainfall_mm, pesticide_usage, sustainability_score FROM sustainability_data ORDER BY record_id DESC"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class RequirementsPanel(BasePanel):
     def refresh(self):
         q = "SELECT requirement_id, crop_id, N, P, K, temperature, humidity, ph, rainfall FROM crop_requirements"
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 # ============ QUERY PANELS ============
 class CropsInDistrictPanel(BasePanel):
+    auto_refresh = False
+
     def __init__(self, parent, db_path, status_bar, **kwargs):
         super().__init__(parent, db_path, status_bar, **kwargs)
         dd = ttk.Frame(self.topbar)
@@ -327,16 +494,17 @@ class CropsInDistrictPanel(BasePanel):
         except:
             messagebox.showwarning("Input", "District ID must be integer")
             return
-        q = """SELECT DISTINCT c.crop_id, c.crop_name
+        # (crop_id, district_id) is unique, so no DISTINCT pass is needed
+        q = """SELECT c.crop_id, c.crop_name
         FROM crop_district cd JOIN crops c ON cd.crop_id = c.crop_id
         WHERE cd.district_id = ?
         ORDER BY c.crop_name"""
         cols, rows = run_query(self.db_path, q, (did_i,))
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class PesticidesInDistrictPanel(BasePanel):
+    auto_refresh = False
+
     def __init__(self, parent, db_path, status_bar, **kwargs):
         super().__init__(parent, db_path, status_bar, **kwargs)
         dd = ttk.Frame(self.topbar)
@@ -356,12 +524,12 @@ class PesticidesInDistrictPanel(BasePanel):
         except:
             messagebox.showwarning("Input", "District ID must be integer")
             return
-        q = """SELECT pu.pesticide_id, pu.compound, pu.low_estimate, pu.high_estimate
-        FROM pesticide_use pu WHERE pu.district_id = ? ORDER BY pu.compound"""
-        cols, rows = run_query(self.db_path, q, (did_i,))
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            cols, rows = by_compound(conn, "district", did_i)
+        finally:
+            conn.close()
+        self.show_results(cols, rows)
 
 # ============ ADVANCED PANELS ============
 class ArrivalPricePanel(BasePanel):
@@ -372,33 +540,198 @@ class ArrivalPricePanel(BasePanel):
         LEFT JOIN markets m ON cap.market_id = m.market_id
         ORDER BY cap.arrival_date DESC LIMIT 500"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
+
+class PriceSeriesPanel(BasePanel):
+    auto_refresh = False
+
+    def __init__(self, parent, db_path, status_bar, **kwargs):
+        super().__init__(parent, db_path, status_bar, **kwargs)
+        dd = ttk.Frame(self.topbar)
+        dd.pack(side=tk.RIGHT)
+        self.crop_id_var = tk.StringVar()
+        self.market_id_var = tk.StringVar()
+        self.window_var = tk.StringVar(value="7")
+        self.period_var = tk.StringVar(value="D")
+        ttk.Label(dd, text="Crop ID:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.crop_id_var, width=6).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Label(dd, text="Market ID:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.market_id_var, width=6).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Label(dd, text="Window:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.window_var, width=4).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Combobox(dd, textvariable=self.period_var, values=["D", "W", "M"], width=3, state="readonly").pack(side=tk.LEFT, padx=(0,6))
+        ttk.Button(dd, text="Show Series", command=self.refresh).pack(side=tk.LEFT)
+
+    def refresh(self):
+        try:
+            crop_id = int(self.crop_id_var.get().strip())
+            market_id = int(self.market_id_var.get().strip())
+            window = max(int(self.window_var.get().strip()), 1)
+        except ValueError:
+            messagebox.showwarning("Input", "Crop ID, Market ID and window must be integers")
+            return
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            rows = series_report(conn, crop_id, market_id, window, self.period_var.get())
+        finally:
+            conn.close()
+        cols = ["date", "arrival_tonnes", "min_price", "max_price", "modal_price",
+                f"mean_{window}", f"volatility_{window}", "band_low", "band_high"]
+        self.show_results(cols, rows)
+        self.status.set_status(f"{len(rows)} points for crop {crop_id} at market {market_id}")
+
+class ElasticityPanel(BasePanel):
+    def refresh(self):
+        q = """SELECT c.crop_name, COALESCE(m.market_name, 'All markets') AS market,
+               e.n_points, ROUND(e.elasticity, 3) AS elasticity, ROUND(e.r_squared, 3) AS r_squared, e.computed_at
+        FROM price_elasticity e
+        LEFT JOIN crops c ON e.crop_id = c.crop_id
+        LEFT JOIN markets m ON e.market_id = m.market_id
+        ORDER BY c.crop_name, e.market_id"""
+        cols, rows = run_query(self.db_path, q)
+        self.show_results(cols, rows)
+
+class CubePanel(BasePanel):
+    """Browse cube_cells: drill from all India down to markets, or across crop groups."""
+
+    def __init__(self, parent, db_path, status_bar, **kwargs):
+        super().__init__(parent, db_path, status_bar, **kwargs)
+        dd = ttk.Frame(self.topbar)
+        dd.pack(side=tk.RIGHT)
+        self.geo_level_var = tk.StringVar(value="all")
+        self.geo_key_var = tk.StringVar(value="*")
+        self.crop_level_var = tk.StringVar(value="all")
+        self.crop_key_var = tk.StringVar(value="*")
+        self.season_var = tk.StringVar(value="*")
+        ttk.Combobox(dd, textvariable=self.geo_level_var, values=GEO_LEVELS, width=8, state="readonly").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.geo_key_var, width=14).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Combobox(dd, textvariable=self.crop_level_var, values=CROP_LEVELS, width=6, state="readonly").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.crop_key_var, width=14).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Label(dd, text="Season:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.season_var, width=8).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Button(dd, text="Drill Geo", command=lambda: self.drill("geo")).pack(side=tk.LEFT)
+        ttk.Button(dd, text="Drill Crop", command=lambda: self.drill("crop")).pack(side=tk.LEFT, padx=4)
+        ttk.Button(dd, text="Roll Up", command=self.roll_up).pack(side=tk.LEFT)
+
+    def position(self):
+        return (self.geo_level_var.get(), self.geo_key_var.get().strip() or "*",
+                self.crop_level_var.get(), self.crop_key_var.get().strip() or "*",
+                self.season_var.get().strip() or "*")
+
+    def refresh(self):
+        geo_level, geo_key, crop_level, crop_key, season = self.position()
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            row = cell(conn, geo_level, geo_key, crop_level, crop_key, season)
+        finally:
+            conn.close()
+        self.show_results(CELL_COLUMNS, [row] if row else [])
+
+    def drill(self, axis):
+        geo_level, geo_key, crop_level, crop_key, season = self.position()
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            if axis == "geo":
+                rows = drill_down_geo(conn, geo_level, geo_key, crop_level, crop_key, season)
+            else:
+                rows = drill_down_crop(conn, crop_level, crop_key, geo_level, geo_key, season)
+        finally:
+            conn.close()
+        self.show_results(CELL_COLUMNS, rows)
+        self.status.set_status(f"{len(rows)} cells below {geo_level}={geo_key}, {crop_level}={crop_key}")
+
+    def roll_up(self):
+        geo_level, geo_key, crop_level, crop_key, season = self.position()
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            row = roll_up_geo(conn, geo_level, geo_key, crop_level, crop_key, season)
+        finally:
+            conn.close()
+        if row:
+            self.geo_level_var.set(row[0])
+            self.geo_key_var.set(row[1])
+        self.show_results(CELL_COLUMNS, [row] if row else [])
+
+class ExposurePanel(BasePanel):
+    """Districts, crops or compounds ranked by pesticide exposure (see exposure.py)."""
+
+    def __init__(self, parent, db_path, status_bar, **kwargs):
+        super().__init__(parent, db_path, status_bar, **kwargs)
+        dd = ttk.Frame(self.topbar)
+        dd.pack(side=tk.RIGHT)
+        self.level_var = tk.StringVar(value="district")
+        self.by_var = tk.StringVar(value="avg_high")
+        self.limit_var = tk.StringVar(value="50")
+        ttk.Combobox(dd, textvariable=self.level_var, values=list(EXPOSURE_LEVELS), width=9, state="readonly").pack(side=tk.LEFT)
+        ttk.Label(dd, text="by").pack(side=tk.LEFT, padx=4)
+        ttk.Combobox(dd, textvariable=self.by_var, values=list(RANK_BY), width=10, state="readonly").pack(side=tk.LEFT)
+        ttk.Label(dd, text="Top:").pack(side=tk.LEFT, padx=(6,0))
+        ttk.Entry(dd, textvariable=self.limit_var, width=5).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Button(dd, text="Rank", command=self.refresh).pack(side=tk.LEFT)
+
+    def refresh(self):
+        try:
+            limit = max(int(self.limit_var.get().strip()), 1)
+        except ValueError:
+            messagebox.showwarning("Input", "Top must be an integer")
+            return
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            cols, rows = rank(conn, self.level_var.get(), self.by_var.get(), limit)
+        finally:
+            conn.close()
+        self.show_results(cols, rows)
 
 class ProductionJoinPanel(BasePanel):
     def refresh(self):
-        q = """SELECT p.stat_id, c.crop_name, d.district_name, p.season, p.area, p.production, p.yield
+        q = """SELECT p.stat_id, p.year, c.crop_name, d.district_name, p.season, p.area, p.production, p.yield
         FROM crop_production_statistic p
         LEFT JOIN crops c ON p.crop_id = c.crop_id
         LEFT JOIN districts d ON p.district_id = d.district_id
         ORDER BY p.production DESC LIMIT 500"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
+
+class YearlyProductionPanel(BasePanel):
+    """One year's state totals next to the year before, read from the rollup by year key."""
+    auto_refresh = False
+
+    def __init__(self, parent, db_path, status_bar, **kwargs):
+        super().__init__(parent, db_path, status_bar, **kwargs)
+        dd = ttk.Frame(self.topbar)
+        dd.pack(side=tk.RIGHT)
+        self.year_var = tk.StringVar()
+        ttk.Label(dd, text="Year:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.year_var, width=6).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Button(dd, text="Compare", command=self.refresh).pack(side=tk.LEFT)
+
+    def refresh(self):
+        try:
+            year = int(self.year_var.get().strip())
+        except ValueError:
+            messagebox.showwarning("Input", "Year must be an integer")
+            return
+        q = """SELECT cur.state_name,
+               ROUND(cur.state_production, 2) AS production,
+               ROUND(prev.state_production, 2) AS previous_year,
+               ROUND(100.0 * (cur.state_production - prev.state_production) / NULLIF(prev.state_production, 0), 2) AS change_pct
+        FROM (SELECT state_name, state_production FROM yearly_state_production WHERE year = ?) cur
+        LEFT JOIN (SELECT state_name, state_production FROM yearly_state_production WHERE year = ?) prev
+          ON cur.state_name = prev.state_name
+        ORDER BY production DESC"""
+        cols, rows = run_query(self.db_path, q, (year, year - 1))
+        self.show_results(cols, rows)
+        self.status.set_status(f"{len(rows)} states for {year} vs {year - 1}")
 
 class PesticidePerCropPanel(BasePanel):
     def refresh(self):
-        q = """SELECT c.crop_name, pu.compound, pu.low_estimate, pu.high_estimate
-        FROM crop_pesticide cp
-        JOIN crops c ON cp.crop_id = c.crop_id
-        JOIN pesticide_use pu ON cp.pesticide_id = pu.pesticide_id
-        ORDER BY c.crop_name"""
-        cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        # One row per crop and compound, from the exposure model
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            cols, rows = by_compound(conn, "crop")
+        finally:
+            conn.close()
+        self.show_results(cols, rows)
 
 class SustainabilityJoinPanel(BasePanel):
     def refresh(self):
@@ -408,11 +741,11 @@ class SustainabilityJoinPanel(BasePanel):
         LEFT JOIN crops c ON s.crop_id = c.crop_id
         ORDER BY s.record_id DESC"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class BestCropForDistrictPanel(BasePanel):
+    auto_refresh = False
+
     def __init__(self, parent, db_path, status_bar, **kwargs):
         super().__init__(parent, db_path, status_bar, **kwargs)
         dd = ttk.Frame(self.topbar)
@@ -441,40 +774,62 @@ class BestCropForDistrictPanel(BasePanel):
         LEFT JOIN crop_district cd ON cd.crop_id = c.crop_id AND cd.district_id = ?
         GROUP BY c.crop_name ORDER BY score DESC LIMIT 10"""
         cols, rows = run_query(self.db_path, q, (did_i, did_i))
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
+
+class ClimateSuitabilityPanel(BasePanel):
+    """Crops whose climate requirements best fit a district's weather, or the
+    districts best suited to a crop (see suitability.py)."""
+    auto_refresh = False
+
+    def __init__(self, parent, db_path, status_bar, **kwargs):
+        super().__init__(parent, db_path, status_bar, **kwargs)
+        dd = ttk.Frame(self.topbar)
+        dd.pack(side=tk.RIGHT)
+        self.district_id_var = tk.StringVar()
+        self.crop_id_var = tk.StringVar()
+        ttk.Label(dd, text="District ID:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.district_id_var, width=6).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Label(dd, text="or Crop ID:").pack(side=tk.LEFT)
+        ttk.Entry(dd, textvariable=self.crop_id_var, width=6).pack(side=tk.LEFT, padx=(4,6))
+        ttk.Button(dd, text="Match", command=self.refresh).pack(side=tk.LEFT)
+
+    def refresh(self):
+        did, cid = self.district_id_var.get().strip(), self.crop_id_var.get().strip()
+        if not did and not cid:
+            messagebox.showwarning("Input", "District ID or Crop ID required")
+            return
+        try:
+            key = int(did or cid)
+        except ValueError:
+            messagebox.showwarning("Input", "IDs must be integers")
+            return
+        start = time.perf_counter()
+        matrix = load_matrix(self.db_path)
+        if did:
+            matches, names_sql = matrix.best_crops(key, 20), "SELECT crop_id, crop_name FROM crops"
+            cols = ["crop_id", "crop_name", "suitability"]
+        else:
+            matches, names_sql = matrix.best_districts(key, 20), "SELECT district_id, district_name FROM districts"
+            cols = ["district_id", "district_name", "suitability"]
+        conn = connect(self.db_path, ANALYTICS)
+        try:
+            names = dict(conn.execute(names_sql).fetchall())
+        finally:
+            conn.close()
+        rows = [(i, names.get(i), round(s, 3)) for i, s in matches]
+        self.show_results(cols, rows)
+        self.status.set_status(f"{len(rows)} matches ({(time.perf_counter() - start) * 1000:.0f} ms)")
 
 class HighProdLowSustainPanel(BasePanel):
     def refresh(self):
-        q = """SELECT p.crop_id, c.crop_name, SUM(p.production) as total_production, AVG(sd.sustainability_score) as avg_sustain
-        FROM crop_production_statistic p
-        LEFT JOIN sustainability_data sd ON p.crop_id = sd.crop_id AND p.district_id = sd.district_id
-        LEFT JOIN crops c ON p.crop_id = c.crop_id
-        GROUP BY p.crop_id
-        HAVING total_production > 1000 AND (avg_sustain IS NULL OR avg_sustain < 3)
-        ORDER BY total_production DESC"""
-        cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        # Aggregated per district range in worker processes (see sharded.py)
+        cols, rows = run_sharded(self.db_path, "high_production_low_sustainability")
+        self.show_results(cols, rows)
 
 class DistrictRiskPanel(BasePanel):
     def refresh(self):
-        q = """SELECT d.district_id, d.district_name,
-               AVG(pu.high_estimate) as avg_pesticide_hi,
-               AVG(sd.rainfall_mm) as avg_rainfall,
-               AVG(sd.sustainability_score) as avg_sustain
-        FROM districts d
-        LEFT JOIN pesticide_use pu ON pu.district_id = d.district_id
-        LEFT JOIN sustainability_data sd ON sd.district_id = d.district_id
-        GROUP BY d.district_id
-        HAVING avg_pesticide_hi > 50 AND (avg_rainfall < 200 OR avg_sustain < 3)
-        ORDER BY avg_pesticide_hi DESC"""
-        cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        cols, rows = run_sharded(self.db_path, "district_risk")
+        self.show_results(cols, rows)
 
 class YieldVsRainfallPanel(BasePanel):
     def refresh(self):
@@ -484,21 +839,17 @@ class YieldVsRainfallPanel(BasePanel):
         GROUP BY sd.district_id
         ORDER BY avg_rain DESC"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 class TopYieldCropsPanel(BasePanel):
     def refresh(self):
-        q = """SELECT c.crop_name, ROUND(AVG(p.yield),3) as avg_yield
-        FROM crop_production_statistic p
-        JOIN crops c ON p.crop_id = c.crop_id
-        GROUP BY p.crop_id
+        q = """SELECT c.crop_name, ROUND(SUM(r.sum_yield) / NULLIF(SUM(r.yield_count), 0),3) as avg_yield
+        FROM crop_district_rollup r
+        JOIN crops c ON r.crop_id = c.crop_id
+        GROUP BY r.crop_id
         ORDER BY avg_yield DESC LIMIT 10"""
         cols, rows = run_query(self.db_path, q)
-        self.table.set_columns(cols)
-        self.table.clear()
-        self.table.insert_rows(rows)
+        self.show_results(cols, rows)
 
 # ============ CUSTOM QUERY ============
 class CustomQueryPanel(ttk.Frame):